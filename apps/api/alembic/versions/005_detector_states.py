@@ -0,0 +1,67 @@
+"""detector states
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-19
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+
+revision: str = "005"
+down_revision: Union[str, None] = "004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "detector_states",
+        sa.Column("id", UUID(as_uuid=True), primary_key=True),
+        sa.Column(
+            "user_id", UUID(as_uuid=True), sa.ForeignKey("users.id"), nullable=False
+        ),
+        sa.Column("merchant_key", sa.String(), nullable=False),
+        sa.Column("merchant_name", sa.String(), nullable=False),
+        sa.Column("txn_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("first_date", sa.Date(), nullable=False),
+        sa.Column("last_date", sa.Date(), nullable=False),
+        sa.Column(
+            "amount_total", sa.Numeric(14, 2), nullable=False, server_default="0"
+        ),
+        sa.Column("amount_min", sa.Numeric(12, 2), nullable=False),
+        sa.Column("amount_max", sa.Numeric(12, 2), nullable=False),
+        sa.Column(
+            "recent_dates", ARRAY(sa.Date()), nullable=False, server_default="{}"
+        ),
+        sa.Column(
+            "recent_amounts",
+            ARRAY(sa.Numeric(12, 2)),
+            nullable=False,
+            server_default="{}",
+        ),
+        sa.Column("watermark", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index(
+        "ux_detector_states_user_merchant",
+        "detector_states",
+        ["user_id", "merchant_key"],
+        unique=True,
+    )
+    # Detection reads only transactions ingested after the watermark
+    op.create_index(
+        "ix_transactions_account_created",
+        "transactions",
+        ["account_id", "created_at"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_transactions_account_created", table_name="transactions")
+    op.drop_index("ux_detector_states_user_merchant", table_name="detector_states")
+    op.drop_table("detector_states")
@@ -0,0 +1,74 @@
+"""recurring alerts
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-19
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+revision: str = "006"
+down_revision: Union[str, None] = "005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "recurring_groups", sa.Column("last_seen_date", sa.Date(), nullable=True)
+    )
+    op.add_column(
+        "recurring_groups",
+        sa.Column("last_amount", sa.Numeric(12, 2), nullable=True),
+    )
+    op.create_index(
+        "ix_recurring_groups_user_merchant",
+        "recurring_groups",
+        ["user_id", "merchant_name"],
+    )
+    op.create_table(
+        "recurring_alerts",
+        sa.Column("id", UUID(as_uuid=True), primary_key=True),
+        sa.Column(
+            "user_id",
+            UUID(as_uuid=True),
+            sa.ForeignKey("users.id"),
+            nullable=False,
+            index=True,
+        ),
+        sa.Column(
+            "recurring_group_id",
+            UUID(as_uuid=True),
+            sa.ForeignKey("recurring_groups.id"),
+            nullable=False,
+        ),
+        sa.Column(
+            "kind",
+            sa.Enum("price_change", "missed_payment", name="alertkind"),
+            nullable=False,
+        ),
+        sa.Column("expected_date", sa.Date(), nullable=False),
+        sa.Column("previous_amount", sa.Numeric(12, 2), nullable=True),
+        sa.Column("new_amount", sa.Numeric(12, 2), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index(
+        "ux_recurring_alerts_group_kind_date",
+        "recurring_alerts",
+        ["recurring_group_id", "kind", "expected_date"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ux_recurring_alerts_group_kind_date", table_name="recurring_alerts")
+    op.drop_table("recurring_alerts")
+    op.execute("DROP TYPE IF EXISTS alertkind")
+    op.drop_index("ix_recurring_groups_user_merchant", table_name="recurring_groups")
+    op.drop_column("recurring_groups", "last_amount")
+    op.drop_column("recurring_groups", "last_seen_date")
@@ -0,0 +1,55 @@
+"""transactions user_id
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-19
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+revision: str = "007"
+down_revision: Union[str, None] = "006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "transactions",
+        sa.Column(
+            "user_id", UUID(as_uuid=True), sa.ForeignKey("users.id"), nullable=True
+        ),
+    )
+    op.execute(
+        "UPDATE transactions SET user_id = accounts.user_id "
+        "FROM accounts WHERE transactions.account_id = accounts.id"
+    )
+    op.alter_column("transactions", "user_id", nullable=False)
+    op.create_index(
+        "ix_transactions_user_date_id",
+        "transactions",
+        ["user_id", sa.text("date DESC"), sa.text("id DESC")],
+    )
+    # Detection's watermark scan is per user now, not per account
+    op.create_index(
+        "ix_transactions_user_created",
+        "transactions",
+        ["user_id", "created_at"],
+    )
+    op.drop_index("ix_transactions_account_created", table_name="transactions")
+
+
+def downgrade() -> None:
+    op.create_index(
+        "ix_transactions_account_created",
+        "transactions",
+        ["account_id", "created_at"],
+    )
+    op.drop_index("ix_transactions_user_created", table_name="transactions")
+    op.drop_index("ix_transactions_user_date_id", table_name="transactions")
+    op.drop_column("transactions", "user_id")
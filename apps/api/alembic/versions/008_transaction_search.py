@@ -0,0 +1,46 @@
+"""transaction search
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-19
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import TSVECTOR
+
+revision: str = "008"
+down_revision: Union[str, None] = "007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # GIN operator classes for plain columns, so user_id can lead the index
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gin")
+    op.add_column(
+        "transactions",
+        sa.Column(
+            "search_vector",
+            TSVECTOR(),
+            sa.Computed(
+                "to_tsvector('simple', coalesce(merchant_name, '') || ' ' || "
+                "description)",
+                persisted=True,
+            ),
+        ),
+    )
+    op.create_index(
+        "ix_transactions_user_search",
+        "transactions",
+        ["user_id", "search_vector"],
+        postgresql_using="gin",
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_transactions_user_search", table_name="transactions")
+    op.drop_column("transactions", "search_vector")
@@ -0,0 +1,74 @@
+"""daily spend rollup
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-19
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+revision: str = "009"
+down_revision: Union[str, None] = "008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "daily_spend",
+        sa.Column(
+            "id",
+            UUID(as_uuid=True),
+            primary_key=True,
+            server_default=sa.text("gen_random_uuid()"),
+        ),
+        sa.Column(
+            "user_id", UUID(as_uuid=True), sa.ForeignKey("users.id"), nullable=False
+        ),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column(
+            "category_id",
+            UUID(as_uuid=True),
+            sa.ForeignKey("categories.id"),
+            nullable=True,
+        ),
+        sa.Column(
+            "account_id",
+            UUID(as_uuid=True),
+            sa.ForeignKey("accounts.id"),
+            nullable=False,
+        ),
+        sa.Column("outflow", sa.Numeric(14, 2), nullable=False, server_default="0"),
+        sa.Column("inflow", sa.Numeric(14, 2), nullable=False, server_default="0"),
+        sa.Column("txn_count", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.create_index(
+        "ux_daily_spend_key",
+        "daily_spend",
+        ["user_id", "day", "category_id", "account_id"],
+        unique=True,
+        postgresql_nulls_not_distinct=True,
+    )
+    # Backfill from existing history
+    op.execute(
+        """
+        INSERT INTO daily_spend
+            (user_id, day, category_id, account_id, outflow, inflow, txn_count)
+        SELECT user_id, CAST(date AS DATE), category_id, account_id,
+               sum(CASE WHEN amount < 0 THEN -amount ELSE 0 END),
+               sum(CASE WHEN amount > 0 THEN amount ELSE 0 END),
+               count(*)
+        FROM transactions
+        GROUP BY user_id, CAST(date AS DATE), category_id, account_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ux_daily_spend_key", table_name="daily_spend")
+    op.drop_table("daily_spend")
@@ -0,0 +1,29 @@
+"""daily spend timeline index
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-19
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "010"
+down_revision: Union[str, None] = "009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_daily_spend_user_day",
+        "daily_spend",
+        ["user_id", "day"],
+        postgresql_include=["inflow", "outflow"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_daily_spend_user_day", table_name="daily_spend")
@@ -0,0 +1,33 @@
+"""detector state merchant keys
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-19
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import ARRAY
+
+revision: str = "011"
+down_revision: Union[str, None] = "010"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "detector_states",
+        sa.Column(
+            "merchant_keys", ARRAY(sa.String()), nullable=False, server_default="{}"
+        ),
+    )
+    # Existing states were keyed by a single raw merchant string
+    op.execute("UPDATE detector_states SET merchant_keys = ARRAY[merchant_key]")
+
+
+def downgrade() -> None:
+    op.drop_column("detector_states", "merchant_keys")
@@ -0,0 +1,44 @@
+"""recurring group merchant key
+
+Revision ID: 012
+Revises: 011
+Create Date: 2026-10-19
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "012"
+down_revision: Union[str, None] = "011"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "recurring_groups", sa.Column("merchant_key", sa.String(), nullable=True)
+    )
+    # Groups so far were matched on the raw merchant string, which is also
+    # the key of the detector state they were created from
+    op.execute("UPDATE recurring_groups SET merchant_key = lower(btrim(merchant_name))")
+    op.drop_index("ix_recurring_groups_user_merchant", table_name="recurring_groups")
+    op.create_index(
+        "ix_recurring_groups_user_merchant_key",
+        "recurring_groups",
+        ["user_id", "merchant_key"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_recurring_groups_user_merchant_key", table_name="recurring_groups"
+    )
+    op.create_index(
+        "ix_recurring_groups_user_merchant",
+        "recurring_groups",
+        ["user_id", "merchant_name"],
+    )
+    op.drop_column("recurring_groups", "merchant_key")
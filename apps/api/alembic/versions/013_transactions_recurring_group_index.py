@@ -0,0 +1,29 @@
+"""transactions recurring group index
+
+Revision ID: 013
+Revises: 012
+Create Date: 2026-10-19
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "013"
+down_revision: Union[str, None] = "012"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_transactions_recurring_group_date",
+        "transactions",
+        ["recurring_group_id", sa.text("date DESC")],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_transactions_recurring_group_date", table_name="transactions")
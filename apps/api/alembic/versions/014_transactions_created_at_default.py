@@ -0,0 +1,25 @@
+"""transactions created_at server default
+
+Revision ID: 014
+Revises: 013
+Create Date: 2026-10-19
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "014"
+down_revision: Union[str, None] = "013"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.alter_column("transactions", "created_at", server_default=sa.func.now())
+
+
+def downgrade() -> None:
+    op.alter_column("transactions", "created_at", server_default=None)
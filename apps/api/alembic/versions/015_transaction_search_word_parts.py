@@ -0,0 +1,52 @@
+"""transaction search word parts
+
+Revision ID: 015
+Revises: 014
+Create Date: 2026-10-19
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import TSVECTOR
+
+revision: str = "015"
+down_revision: Union[str, None] = "014"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_TOKENS = "to_tsvector('simple', coalesce(merchant_name, '') || ' ' || description)"
+_WORD_PARTS = (
+    "to_tsvector('simple', regexp_replace("
+    "coalesce(merchant_name, '') || ' ' || description, '[^[:alnum:]]+', ' ', 'g'))"
+)
+
+
+def _replace_search_vector(expression: str) -> None:
+    # A generated column's expression can't be altered: drop and re-add it
+    op.drop_index("ix_transactions_user_search", table_name="transactions")
+    op.drop_column("transactions", "search_vector")
+    op.add_column(
+        "transactions",
+        sa.Column(
+            "search_vector",
+            TSVECTOR(),
+            sa.Computed(expression, persisted=True),
+        ),
+    )
+    op.create_index(
+        "ix_transactions_user_search",
+        "transactions",
+        ["user_id", "search_vector"],
+        postgresql_using="gin",
+    )
+
+
+def upgrade() -> None:
+    _replace_search_vector(f"{_TOKENS} || {_WORD_PARTS}")
+
+
+def downgrade() -> None:
+    _replace_search_vector(_TOKENS)
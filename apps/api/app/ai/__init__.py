@@ -1,4 +1,4 @@
-from app.ai.base import AIResponse, TokenUsage
+from app.ai.base import AIResponse, TokenUsage, TransactionRecord
 from app.ai.client import AIClient, ai_client
 
-__all__ = ["AIClient", "ai_client", "AIResponse", "TokenUsage"]
+__all__ = ["AIClient", "ai_client", "AIResponse", "TokenUsage", "TransactionRecord"]
@@ -1,5 +1,12 @@
 from dataclasses import dataclass, field
+from datetime import datetime
 from decimal import Decimal
+from uuid import UUID
+
+from sqlalchemy import ColumnElement, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.transaction import Transaction
 
 
 @dataclass
@@ -15,3 +22,48 @@ class AIResponse:
     content: str = ""
     usage: TokenUsage = field(default_factory=TokenUsage)
     success: bool = True
+
+
+@dataclass(slots=True)
+class TransactionRecord:
+    """The columns the AI pipelines read from a transaction.
+
+    Loaded with a column select instead of as ORM instances, so rows skip
+    the session identity map and instrumentation and leave wide columns
+    such as notes and tags in the database.
+    """
+
+    id: UUID
+    date: datetime
+    amount: Decimal
+    merchant_name: str | None
+    description: str
+    category_id: UUID | None
+    ai_confidence: float | None
+    created_at: datetime
+
+
+def transaction_record_columns() -> tuple[ColumnElement, ...]:
+    """Columns to select for a TransactionRecord, in field order."""
+    return (
+        Transaction.id,
+        Transaction.date,
+        Transaction.amount,
+        Transaction.merchant_name,
+        Transaction.description,
+        Transaction.category_id,
+        Transaction.ai_confidence,
+        Transaction.created_at,
+    )
+
+
+async def load_transaction_records(
+    db: AsyncSession, *criteria: ColumnElement[bool]
+) -> list[TransactionRecord]:
+    """Load TransactionRecords for the transactions matching `criteria`."""
+    result = await db.execute(
+        select(*transaction_record_columns())
+        .where(*criteria)
+        .order_by(Transaction.date)
+    )
+    return [TransactionRecord(*row) for row in result.all()]
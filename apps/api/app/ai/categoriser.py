@@ -5,9 +5,9 @@ from uuid import UUID
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.ai.base import TransactionRecord
 from app.ai.client import ai_client
 from app.models.category import Category
-from app.models.transaction import Transaction
 
 logger = logging.getLogger(__name__)
 
@@ -17,7 +17,7 @@ _merchant_cache: dict[str, dict] = {}
 
 async def categorise_transactions(
     db: AsyncSession,
-    transactions: list[Transaction],
+    transactions: list[TransactionRecord],
     user_id: UUID,
 ) -> list[dict]:
     """Batch categorise transactions using Claude AI.
@@ -82,7 +82,7 @@ async def categorise_transactions(
 
 
 async def _categorise_batch(
-    transactions: list[Transaction],
+    transactions: list[TransactionRecord],
     category_names: list[str],
 ) -> list[dict]:
     """Send a batch of transactions to Claude for categorisation."""
@@ -0,0 +1,90 @@
+"""Calendar-aware next-charge prediction for recurring series.
+
+Instead of adding a flat 30/91/365 days, each series' anchor is learned from
+its history: the day of month for monthly, quarterly and annual series
+(charges on a month's last day anchor to month end) and the weekday for
+weekly ones. The next date is the anchor in the month `step` months after
+the last charge, clamped to the month's length; the neighbouring months are
+considered too, so a charge that landed a few days early or late doesn't
+shift the prediction a whole period. All series are predicted in one numpy
+pass, which lets the nightly refresh cover every active group at once.
+"""
+
+from collections.abc import Sequence
+from datetime import date
+
+import numpy as np
+
+from app.ai.periodicity import masked_median, pack_ordinals
+from app.models.recurring_group import Frequency
+
+# Months between charges for calendar-month based frequencies
+MONTH_STEPS = {Frequency.monthly: 1, Frequency.quarterly: 3, Frequency.annual: 12}
+# Nominal period used to pick between candidate months, in days
+NOMINAL_DAYS = {
+    Frequency.weekly: 7,
+    Frequency.monthly: 30,
+    Frequency.quarterly: 91,
+    Frequency.annual: 365,
+}
+# Day-of-month anchor meaning "last day of the month"
+MONTH_END = 31
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def _month_lengths(months: np.ndarray) -> np.ndarray:
+    return (
+        (months + 1).astype("datetime64[D]") - months.astype("datetime64[D]")
+    ).astype(np.int64)
+
+
+def predict_next_dates(
+    series: Sequence[Sequence[date]], frequencies: Sequence[Frequency]
+) -> list[date]:
+    """Predict the next charge date for each non-empty date series."""
+    if not series:
+        return []
+
+    ordinals = pack_ordinals(series)
+    present = ~np.isnan(ordinals)
+    days = np.where(present, ordinals - _EPOCH_ORDINAL, 0).astype(np.int64)
+    charged = days.astype("datetime64[D]")
+    last = charged[np.arange(len(series)), present.sum(axis=1) - 1]
+
+    # Day-of-month anchor: median charge day, month-end charges count as 31
+    months = charged.astype("datetime64[M]")
+    day_of_month = (charged - months.astype("datetime64[D]")).astype(np.int64) + 1
+    day_of_month = np.where(
+        day_of_month == _month_lengths(months), MONTH_END, day_of_month
+    )
+    anchor_day = np.rint(masked_median(day_of_month.astype(float), present))
+
+    # Weekday anchor: most common weekday (1970-01-01 was a Thursday)
+    weekdays = (days + 3) % 7
+    weekday_counts = ((weekdays[..., None] == np.arange(7)) & present[..., None]).sum(
+        axis=1
+    )
+    anchor_weekday = weekday_counts.argmax(axis=1)
+
+    step = np.array([MONTH_STEPS.get(f, 1) for f in frequencies])
+    nominal = np.array([NOMINAL_DAYS[f] for f in frequencies])
+    target = last + nominal
+
+    # Anchor day in the expected month and its neighbours, clamped to length
+    expected = last.astype("datetime64[M]") + step
+    candidate_months = expected[:, None] + np.array([-1, 0, 1])
+    candidate_days = np.minimum(anchor_day[:, None], _month_lengths(candidate_months))
+    candidates = candidate_months.astype("datetime64[D]") + (
+        candidate_days.astype(np.int64) - 1
+    )
+    distance = np.abs((candidates - target[:, None]).astype(np.int64))
+    distance = np.where(candidates > last[:, None], distance, np.iinfo(np.int64).max)
+    monthly_next = candidates[np.arange(len(series)), distance.argmin(axis=1)]
+
+    # Next anchor weekday 4-10 days after the last charge
+    offset = (anchor_weekday - (last.astype(np.int64) + 3) % 7) % 7
+    weekly_next = last + np.where(offset <= 3, offset + 7, offset)
+
+    is_weekly = np.array([f == Frequency.weekly for f in frequencies])
+    return np.where(is_weekly, weekly_next, monthly_next).astype(object).tolist()
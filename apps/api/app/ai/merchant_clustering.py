@@ -0,0 +1,117 @@
+"""Fuzzy grouping of merchant strings for recurring detection.
+
+Bank descriptions for one merchant often differ only by a reference number
+or suffix ("NETFLIX.COM 1234", "NETFLIX.COM 5678"), which splits its charges
+across several keys. Keys are normalised (digits and punctuation dropped),
+shingled into character n-grams and MinHashed; locality-sensitive hashing
+over bands of the signatures yields candidate pairs in near-linear time,
+which are confirmed by Jaccard similarity and merged with union-find.
+"""
+
+import re
+import zlib
+from collections import defaultdict
+from collections.abc import Iterable
+
+import numpy as np
+
+NGRAM = 3
+NUM_HASHES = 32
+BANDS = 8
+# Shingle-set Jaccard similarity needed to merge two candidate keys
+SIMILARITY_THRESHOLD = 0.6
+
+# Universal hashing (a * x + b) mod p over 32-bit shingle hashes; every
+# intermediate stays below 2**64
+_PRIME = np.uint64(4294967291)
+_rng = np.random.default_rng(20261019)
+_A = _rng.integers(1, int(_PRIME), NUM_HASHES, dtype=np.uint64)[:, None]
+_B = _rng.integers(0, int(_PRIME), NUM_HASHES, dtype=np.uint64)[:, None]
+
+_NOISE = re.compile(r"[^a-z]+")
+
+
+def normalise_merchant(key: str) -> str:
+    """Lowercase and drop digits/punctuation runs; falls back to the raw key."""
+    normalised = _NOISE.sub(" ", key.lower()).strip()
+    return normalised or key.lower().strip()
+
+
+def _shingles(text: str) -> set[str]:
+    padded = f" {text} "
+    if len(padded) <= NGRAM:
+        return {padded}
+    return {padded[i : i + NGRAM] for i in range(len(padded) - NGRAM + 1)}
+
+
+def _signature(shingles: set[str]) -> np.ndarray:
+    hashes = np.fromiter(
+        (zlib.crc32(s.encode()) for s in shingles), dtype=np.uint64, count=len(shingles)
+    )
+    return ((_A * hashes[None, :] + _B) % _PRIME).min(axis=1)
+
+
+def _jaccard(a: set[str], b: set[str]) -> float:
+    return len(a & b) / len(a | b)
+
+
+def cluster_merchant_keys(keys: Iterable[str]) -> dict[str, str]:
+    """Map every merchant key to a canonical key shared by similar keys.
+
+    The canonical key is the shortest normalised form in the cluster (ties
+    broken alphabetically).
+    """
+    keys = list(dict.fromkeys(keys))
+    forms = sorted({normalise_merchant(key) for key in keys}, key=lambda f: (len(f), f))
+    shingles = [_shingles(form) for form in forms]
+
+    parent = list(range(len(forms)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    rows = NUM_HASHES // BANDS
+    signatures = [_signature(s) for s in shingles]
+    for band in range(BANDS):
+        buckets: dict[bytes, list[int]] = defaultdict(list)
+        for i, signature in enumerate(signatures):
+            buckets[signature[band * rows : (band + 1) * rows].tobytes()].append(i)
+        for members in buckets.values():
+            head = members[0]
+            for other in members[1:]:
+                if find(other) == find(head):
+                    continue
+                if _jaccard(shingles[head], shingles[other]) >= SIMILARITY_THRESHOLD:
+                    # Forms are sorted, so the lower index is the canonical one
+                    low, high = sorted((find(head), find(other)))
+                    parent[high] = low
+
+    canonical = {form: forms[find(i)] for i, form in enumerate(forms)}
+    return {key: canonical[normalise_merchant(key)] for key in keys}
+
+
+def assign_merchant_keys(keys: Iterable[str], known: dict[str, str]) -> dict[str, str]:
+    """Map merchant keys to cluster keys without moving keys already assigned.
+
+    `known` maps keys seen before to the cluster key they were given. Those
+    keep it; unseen keys are clustered together with the known ones and
+    join the (smallest) cluster key of the known keys they cluster with, or
+    start a new cluster under its canonical key.
+    """
+    keys = list(dict.fromkeys(keys))
+    assigned = {key: known[key] for key in keys if key in known}
+    unseen = [key for key in keys if key not in known]
+    if not unseen:
+        return assigned
+
+    clusters = cluster_merchant_keys([*known, *unseen])
+    anchors: dict[str, str] = {}
+    for key, cluster_key in known.items():
+        canonical = clusters[key]
+        anchors[canonical] = min(anchors.get(canonical, cluster_key), cluster_key)
+    for key in unseen:
+        assigned[key] = anchors.get(clusters[key], clusters[key])
+    return assigned
@@ -0,0 +1,186 @@
+"""Vectorised periodicity detection for recurring charges.
+
+Every candidate merchant is scored in one pass: charge dates are packed into
+a NaN-padded matrix of day ordinals and each gap is compared with every
+known period at once. A gap may span up to MAX_SKIPPED_PERIODS + 1 periods,
+so a series with a missed or skipped charge is still recognised. Each
+frequency gets a confidence score from how many gaps fit, how many periods
+were skipped and how tightly the gaps cluster (median absolute deviation).
+
+Most merchants are clear cases: too few charges to score, or every gap
+within tolerance of the period nearest their mean gap. A cheap prefilter
+settles those from per-row gap statistics, with the same result the matrix
+pass would give, and only the rest are scored against every frequency.
+"""
+
+from collections.abc import Sequence
+from datetime import date
+from itertools import chain
+from typing import NamedTuple
+
+import numpy as np
+
+from app.models.recurring_group import Frequency
+
+# Candidate frequencies with their nominal period and tolerance, in days
+FREQUENCIES = (
+    Frequency.weekly,
+    Frequency.monthly,
+    Frequency.quarterly,
+    Frequency.annual,
+)
+PERIOD_DAYS = np.array([7.0, 30.44, 91.31, 365.25])
+TOLERANCE_DAYS = np.array([2.0, 5.0, 10.0, 15.0])
+
+# A single gap may cover at most this many missed charges
+MAX_SKIPPED_PERIODS = 2
+# At least this many gaps must fit a frequency before it is considered
+MIN_MATCHING_GAPS = 2
+# Best score below this is reported as no frequency
+MIN_CONFIDENCE = 0.6
+# Merchants scored per matrix; keeps the intermediates cache-sized
+BATCH_SIZE = 1024
+
+
+class Periodicity(NamedTuple):
+    frequency: Frequency | None
+    confidence: float
+    period_days: float | None
+
+
+def pack_ordinals(series: Sequence[Sequence[date]]) -> np.ndarray:
+    """Pack date series into a sorted, NaN-padded (merchants, charges) matrix."""
+    lengths = np.fromiter((len(dates) for dates in series), dtype=np.intp)
+    width = int(lengths.max(initial=0))
+    packed = np.full((len(series), width), np.nan)
+    ordinals = np.fromiter(
+        map(date.toordinal, chain.from_iterable(series)),
+        dtype=float,
+        count=int(lengths.sum()),
+    )
+    rows = np.repeat(np.arange(len(series)), lengths)
+    starts = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    packed[rows, np.arange(len(ordinals)) - starts] = ordinals
+    # NaN sorts last, so padding stays at the end of each row
+    return np.sort(packed, axis=1)
+
+
+def masked_median(values: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """Median along the last axis over masked-in entries (NaN if none)."""
+    ordered = np.sort(np.where(mask, values, np.inf), axis=-1)
+    count = mask.sum(axis=-1)
+    low = np.take_along_axis(
+        ordered, np.maximum((count - 1) // 2, 0)[..., None], axis=-1
+    )[..., 0]
+    high = np.take_along_axis(
+        ordered, np.minimum(count // 2, values.shape[-1] - 1)[..., None], axis=-1
+    )[..., 0]
+    return np.where(count > 0, (low + high) / 2, np.nan)
+
+
+def score_periodicity(ordinals: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Score every merchant against every frequency.
+
+    Takes a matrix from pack_ordinals and returns (confidence, period_days),
+    both shaped (merchants, len(FREQUENCIES)). period_days is the median
+    per-period gap of the matching gaps.
+    """
+    merchants = ordinals.shape[0]
+    if ordinals.shape[1] < 2:
+        empty = np.zeros((merchants, len(FREQUENCIES)))
+        return empty, np.full_like(empty, np.nan)
+
+    # (merchants, 1, gaps) against (1, frequencies, 1)
+    gaps = np.diff(ordinals, axis=1)[:, None, :]
+    present = ~np.isnan(gaps)
+    gaps = np.where(present, gaps, 0.0)
+    period = PERIOD_DAYS[None, :, None]
+    tolerance = TOLERANCE_DAYS[None, :, None]
+
+    # How many periods each gap spans, and whether it lands near a multiple
+    spans = np.maximum(np.rint(gaps / period), 1.0)
+    fits = (
+        present
+        & (spans <= MAX_SKIPPED_PERIODS + 1)
+        & (np.abs(gaps - spans * period) <= tolerance)
+    )
+
+    per_period = gaps / spans
+    median = masked_median(per_period, fits)
+    deviation = np.abs(per_period - median[..., None])
+    mad = masked_median(deviation, fits)
+
+    matching = fits.sum(axis=-1)
+    total = present.sum(axis=-1)
+    skipped = np.where(fits, spans - 1, 0.0).sum(axis=-1)
+
+    hit_rate = matching / np.maximum(total, 1)
+    coverage = matching / np.maximum(matching + skipped, 1)
+    tightness = 1.0 - 0.5 * np.minimum(
+        np.nan_to_num(mad, nan=0.0) / TOLERANCE_DAYS, 1.0
+    )
+    confidence = np.where(
+        matching >= MIN_MATCHING_GAPS, hit_rate * coverage * tightness, 0.0
+    )
+    return confidence, median
+
+
+def prefilter_periodicity(
+    ordinals: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Settle the clear cases of a pack_ordinals matrix without the matrix pass.
+
+    A series with fewer than MIN_MATCHING_GAPS gaps scores 0. A series whose
+    gaps all lie within tolerance of the period nearest its mean gap fits
+    that frequency with no skips, which no other frequency can beat (the
+    periods are too far apart), so its confidence reduces to the MAD term.
+    Returns (settled, frequency index, confidence, period_days), each shaped
+    (merchants,); the last three are only meaningful where settled.
+    """
+    counts = (~np.isnan(ordinals)).sum(axis=1)
+    gaps = np.diff(ordinals, axis=1)
+    present = ~np.isnan(gaps)
+    low = np.where(present, gaps, np.inf).min(axis=1, initial=np.inf)
+    high = np.where(present, gaps, -np.inf).max(axis=1, initial=-np.inf)
+
+    last = np.take_along_axis(ordinals, np.maximum(counts - 1, 0)[:, None], axis=1)
+    mean_gap = (last[:, 0] - ordinals[:, 0]) / np.maximum(counts - 1, 1)
+    index = np.abs(np.nan_to_num(mean_gap)[:, None] - PERIOD_DAYS).argmin(axis=1)
+    period = PERIOD_DAYS[index]
+    tolerance = TOLERANCE_DAYS[index]
+
+    short = counts - 1 < MIN_MATCHING_GAPS
+    regular = ~short & (low >= period - tolerance) & (high <= period + tolerance)
+
+    fits = present & regular[:, None]
+    median = masked_median(gaps, fits)
+    mad = masked_median(np.abs(gaps - median[:, None]), fits)
+    tightness = 1.0 - 0.5 * np.minimum(np.nan_to_num(mad, nan=0.0) / tolerance, 1.0)
+    confidence = np.where(regular, tightness, 0.0)
+    return short | regular, index, confidence, median
+
+
+def detect_periodicity(series: Sequence[Sequence[date]]) -> list[Periodicity]:
+    """Detect the most likely frequency for each date series in one batch."""
+    if not series:
+        return []
+
+    results = []
+    for offset in range(0, len(series), BATCH_SIZE):
+        batch = pack_ordinals(series[offset : offset + BATCH_SIZE])
+        settled, best, scores, periods = prefilter_periodicity(batch)
+        unsettled = np.flatnonzero(~settled)
+        if len(unsettled):
+            confidence, period_days = score_periodicity(batch[unsettled])
+            rows = np.arange(len(unsettled))
+            best[unsettled] = confidence.argmax(axis=1)
+            scores[unsettled] = confidence[rows, best[unsettled]]
+            periods[unsettled] = period_days[rows, best[unsettled]]
+        for index, score, period in zip(
+            best.tolist(), scores.tolist(), periods.tolist()
+        ):
+            if score < MIN_CONFIDENCE:
+                results.append(Periodicity(None, score, None))
+            else:
+                results.append(Periodicity(FREQUENCIES[index], score, period))
+    return results
@@ -0,0 +1,238 @@
+"""Incremental monitoring of active recurring groups.
+
+process_new_transactions runs on each freshly categorised slice of an import:
+it matches the new charges to the user's active groups by merchant cluster
+(served by ix_recurring_groups_user_merchant_key), records each group's latest
+charge, rolls its next expected date forward and raises a price-change alert
+when a charge rises beyond the group's amount tolerance. sweep_missed_payments
+raises missed-payment alerts for groups whose expected charge is overdue.
+Neither reads a user's transaction history.
+"""
+
+import logging
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+from uuid import UUID
+
+from sqlalchemy import Date, case, cast, column, func, literal, select, update, values
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.ai.date_prediction import predict_next_dates
+from app.ai.subscription_detector import (
+    _amount_tolerance,
+    link_transactions,
+    merchant_key_expr,
+    resolve_merchant_keys,
+)
+from app.models.recurring_alert import AlertKind, RecurringAlert
+from app.models.recurring_group import (
+    Frequency,
+    RecurringGroup,
+    RecurringStatus,
+    RecurringType,
+)
+from app.models.transaction import Transaction
+
+logger = logging.getLogger(__name__)
+
+# Days past next_expected_date before a charge counts as missed
+MISSED_GRACE_DAYS = {
+    Frequency.weekly: 2,
+    Frequency.monthly: 5,
+    Frequency.quarterly: 10,
+    Frequency.annual: 15,
+}
+# Largest rise over a group's estimated amount, as a fraction of it, still
+# matched to the group (as a price change); bigger charges are one-offs
+MAX_PRICE_RISE = Decimal("0.5")
+
+
+async def _insert_alerts(db: AsyncSession, alerts: list[dict]) -> None:
+    """Insert alerts, skipping any already raised for the same group/kind/date."""
+    if not alerts:
+        return
+    await db.execute(
+        pg_insert(RecurringAlert).on_conflict_do_nothing(
+            index_elements=["recurring_group_id", "kind", "expected_date"]
+        ),
+        alerts,
+    )
+
+
+def _matches_group(group: RecurringGroup, amount: Decimal) -> bool:
+    """Whether a charge's amount is one of the group's.
+
+    Charges within _amount_tolerance of the estimate match, as do rises of
+    up to MAX_PRICE_RISE; anything else is a different purchase.
+    """
+    estimate = group.estimated_amount
+    tolerance = _amount_tolerance(estimate)
+    ceiling = max(estimate + tolerance, estimate * (1 + MAX_PRICE_RISE))
+    return estimate - tolerance <= amount <= ceiling
+
+
+async def process_new_transactions(
+    db: AsyncSession, user_id: UUID, transaction_ids: list[UUID]
+) -> list[dict]:
+    """Apply newly ingested charges to the user's active recurring groups.
+
+    Each charge's merchant string is resolved to the user's merchant cluster
+    (resolve_merchant_keys) and linked to the active group of that cluster
+    whose amount it matches (_matches_group; the closest estimated amount
+    wins when several do). For each group's newest charge, last_seen_date
+    and last_amount are updated and next_expected_date is re-predicted; a
+    charge more than _amount_tolerance above estimated_amount raises a
+    price-change alert and becomes the new estimate. Charges older than a
+    group's last_seen_date are only linked. Returns the alerts raised.
+    """
+    if not transaction_ids:
+        return []
+
+    result = await db.execute(
+        select(
+            Transaction.id,
+            cast(Transaction.date, Date),
+            func.abs(Transaction.amount),
+            merchant_key_expr(),
+        ).where(Transaction.id.in_(transaction_ids))
+    )
+    new_charges = result.all()
+    if not new_charges:
+        return []
+
+    assigned = await resolve_merchant_keys(
+        db, user_id, list({merchant for *_, merchant in new_charges})
+    )
+    group_result = await db.execute(
+        select(RecurringGroup).where(
+            RecurringGroup.user_id == user_id,
+            RecurringGroup.merchant_key.in_(set(assigned.values())),
+            RecurringGroup.status == RecurringStatus.active,
+        )
+    )
+    groups_by_key: dict[str, list[RecurringGroup]] = defaultdict(list)
+    for group in group_result.scalars().all():
+        groups_by_key[group.merchant_key].append(group)
+
+    candidates: dict[UUID, list[tuple[RecurringGroup, date, Decimal]]] = defaultdict(
+        list
+    )
+    for txn_id, day, amount, merchant in new_charges:
+        for group in groups_by_key.get(assigned[merchant], []):
+            if _matches_group(group, amount):
+                candidates[txn_id].append((group, day, amount))
+    if not candidates:
+        return []
+
+    links: list[tuple[UUID, UUID]] = []
+    latest: dict[UUID, tuple[RecurringGroup, date, Decimal]] = {}
+    for txn_id, matches in candidates.items():
+        group, day, amount = min(
+            matches, key=lambda match: abs(match[0].estimated_amount - match[2])
+        )
+        links.append((txn_id, group.id))
+        current = latest.get(group.id)
+        if current is None or day > current[1]:
+            latest[group.id] = (group, day, amount)
+
+    charges = [
+        (group, day, amount)
+        for group, day, amount in latest.values()
+        if group.last_seen_date is None or day > group.last_seen_date
+    ]
+    next_dates = predict_next_dates(
+        [[day] for _, day, _ in charges], [group.frequency for group, _, _ in charges]
+    )
+
+    alerts: list[dict] = []
+    group_updates: list[tuple[UUID, date, Decimal, Decimal, date]] = []
+    for (group, day, amount), next_date in zip(charges, next_dates):
+        estimate = group.estimated_amount
+        if group.type != RecurringType.salary and amount - estimate > _amount_tolerance(
+            estimate
+        ):
+            alerts.append(
+                {
+                    "user_id": user_id,
+                    "recurring_group_id": group.id,
+                    "kind": AlertKind.price_change,
+                    "expected_date": day,
+                    "previous_amount": estimate,
+                    "new_amount": amount,
+                }
+            )
+            estimate = amount
+        group_updates.append((group.id, day, amount, estimate, next_date))
+
+    if group_updates:
+        charged = values(
+            column("id", PG_UUID(as_uuid=True)),
+            column("last_seen_date", Date),
+            column("last_amount", RecurringGroup.last_amount.type),
+            column("estimated_amount", RecurringGroup.estimated_amount.type),
+            column("next_expected_date", Date),
+            name="charged",
+        ).data(group_updates)
+        await db.execute(
+            update(RecurringGroup)
+            .where(RecurringGroup.id == charged.c.id)
+            .values(
+                last_seen_date=charged.c.last_seen_date,
+                last_amount=charged.c.last_amount,
+                estimated_amount=charged.c.estimated_amount,
+                next_expected_date=charged.c.next_expected_date,
+            )
+            .execution_options(synchronize_session=False)
+        )
+    await link_transactions(db, links)
+    await _insert_alerts(db, alerts)
+
+    logger.info(
+        f"Matched {len(links)} new charges to {len(latest)} recurring groups "
+        f"for user {user_id}; {len(alerts)} price changes"
+    )
+    return alerts
+
+
+async def sweep_missed_payments(db: AsyncSession, today: date) -> int:
+    """Raise a missed-payment alert for every overdue active group.
+
+    A group is overdue once today is past next_expected_date plus its grace
+    period without a charge having moved the date on. Runs as one
+    INSERT ... SELECT over recurring_groups; returns the number of new alerts.
+    """
+    grace = case(MISSED_GRACE_DAYS, value=RecurringGroup.frequency)
+    overdue = select(
+        func.gen_random_uuid(),
+        RecurringGroup.user_id,
+        RecurringGroup.id,
+        literal(AlertKind.missed_payment, RecurringAlert.kind.type),
+        RecurringGroup.next_expected_date,
+        RecurringGroup.estimated_amount,
+        func.now(),
+    ).where(
+        RecurringGroup.status == RecurringStatus.active,
+        RecurringGroup.next_expected_date + grace < today,
+    )
+    result = await db.execute(
+        pg_insert(RecurringAlert)
+        .from_select(
+            [
+                "id",
+                "user_id",
+                "recurring_group_id",
+                "kind",
+                "expected_date",
+                "previous_amount",
+                "created_at",
+            ],
+            overdue,
+        )
+        .on_conflict_do_nothing(
+            index_elements=["recurring_group_id", "kind", "expected_date"]
+        )
+    )
+    return result.rowcount or 0
@@ -1,12 +1,39 @@
+import asyncio
 import logging
+import uuid
 from collections import defaultdict
-from datetime import date, timedelta
+from concurrent.futures import Executor
+from datetime import date, datetime
 from decimal import Decimal
+from typing import NamedTuple
 from uuid import UUID
 
-from sqlalchemy import select
+from sqlalchemy import (
+    Date,
+    Numeric,
+    String,
+    cast,
+    column,
+    func,
+    insert,
+    select,
+    table,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, aggregate_order_by
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.ai.base import TransactionRecord, transaction_record_columns
+from app.ai.date_prediction import predict_next_dates
+from app.ai.merchant_clustering import (
+    assign_merchant_keys,
+    cluster_merchant_keys,
+)
+from app.ai.periodicity import detect_periodicity
+from app.cache import mark_user_data_changed
+from app.models.detector_state import DetectorState
 from app.models.recurring_group import (
     Frequency,
     RecurringGroup,
@@ -14,138 +41,754 @@ from app.models.recurring_group import (
     RecurringType,
 )
 from app.models.transaction import Transaction
+from app.models.user import User
 
 logger = logging.getLogger(__name__)
 
+# Number of most recent charges kept per merchant in DetectorState
+RECENT_WINDOW = 24
+# Users loaded and evaluated per page by detect_subscriptions_fleet
+FLEET_USERS_PER_PAGE = 500
+# Transactions streamed per batch of whole users sent to a fleet worker
+FLEET_ROWS_PER_BATCH = 20_000
 
-def _detect_frequency(dates: list[date]) -> Frequency | None:
-    """Detect the frequency of a recurring transaction from a list of dates."""
-    if len(dates) < 2:
-        return None
 
-    sorted_dates = sorted(dates)
-    gaps = [
-        (sorted_dates[i + 1] - sorted_dates[i]).days
-        for i in range(len(sorted_dates) - 1)
-    ]
-    avg_gap = sum(gaps) / len(gaps)
-
-    if 5 <= avg_gap <= 9:
-        return Frequency.weekly
-    elif 25 <= avg_gap <= 35:
-        return Frequency.monthly
-    elif 80 <= avg_gap <= 100:
-        return Frequency.quarterly
-    elif 350 <= avg_gap <= 380:
-        return Frequency.annual
-    return None
-
-
-def _predict_next_date(dates: list[date], frequency: Frequency) -> date:
-    """Predict next expected date based on frequency."""
-    last_date = max(dates)
-    if frequency == Frequency.weekly:
-        return last_date + timedelta(days=7)
-    elif frequency == Frequency.monthly:
-        return last_date + timedelta(days=30)
-    elif frequency == Frequency.quarterly:
-        return last_date + timedelta(days=91)
-    elif frequency == Frequency.annual:
-        return last_date + timedelta(days=365)
-    return last_date + timedelta(days=30)
-
-
-async def detect_subscriptions(
+def _amount_tolerance(amount: Decimal) -> Decimal:
+    """How far a charge may drift from an amount and still match it: 10% or 1.00."""
+    return max(amount * Decimal("0.1"), Decimal("1.00"))
+
+
+def _amounts_consistent(avg_amount: Decimal, low: Decimal, high: Decimal) -> bool:
+    """All amounts lie within 10% (or 1.00) of the average."""
+    tolerance = _amount_tolerance(avg_amount)
+    return high - avg_amount <= tolerance and avg_amount - low <= tolerance
+
+
+def _amount_clusters(amounts: list[Decimal]) -> list[list[int]]:
+    """Split one merchant's amounts into clusters of similar charges.
+
+    Sorted-gap clustering: amounts are sorted and a new cluster starts
+    wherever the step up from the previous amount exceeds its tolerance, so
+    e.g. 2.99 and 9.99 charges from one merchant become separate series.
+    Returns lists of indices into `amounts`, each in original order.
+    """
+    order = sorted(range(len(amounts)), key=amounts.__getitem__)
+    clusters: list[list[int]] = []
+    previous = None
+    for index in order:
+        amount = amounts[index]
+        if previous is None or amount - previous > _amount_tolerance(previous):
+            clusters.append([])
+        clusters[-1].append(index)
+        previous = amount
+    return [sorted(cluster) for cluster in clusters]
+
+
+def _recurring_type(merchant_key: str) -> RecurringType:
+    if any(word in merchant_key for word in ["salary", "wages", "pay"]):
+        return RecurringType.salary
+    elif any(word in merchant_key for word in ["council", "water", "electric", "gas"]):
+        return RecurringType.direct_debit
+    return RecurringType.subscription
+
+
+def _as_date(value) -> date:
+    return value.date() if hasattr(value, "date") and callable(value.date) else value
+
+
+def merchant_key_expr():
+    """SQL expression for the normalised merchant key used to group charges."""
+    return func.lower(
+        func.btrim(func.coalesce(Transaction.merchant_name, Transaction.description))
+    )
+
+
+def _fold_into_state(state: DetectorState, txns: list[TransactionRecord]) -> None:
+    """Fold newly ingested transactions into a merchant's running state."""
+    ordered = sorted(txns, key=lambda t: t.date)
+    amounts = [abs(t.amount) for t in ordered]
+    dates = [_as_date(t.date) for t in ordered]
+
+    if state.txn_count == 0:
+        state.first_date, state.last_date = dates[0], dates[-1]
+        state.amount_total = Decimal("0")
+        state.amount_min, state.amount_max = min(amounts), max(amounts)
+    else:
+        state.first_date = min(state.first_date, dates[0])
+        state.amount_min = min(state.amount_min, *amounts)
+        state.amount_max = max(state.amount_max, *amounts)
+
+    if dates[-1] >= state.last_date:
+        state.last_date = dates[-1]
+        state.merchant_name = ordered[-1].merchant_name or ordered[-1].description
+
+    state.txn_count += len(ordered)
+    state.amount_total += sum(amounts)
+
+    recent = sorted(
+        [
+            *zip(state.recent_dates or [], state.recent_amounts or []),
+            *zip(dates, amounts),
+        ]
+    )[-RECENT_WINDOW:]
+    state.recent_dates = [d for d, _ in recent]
+    state.recent_amounts = [a for _, a in recent]
+
+
+_activity = table(
+    "pg_stat_activity",
+    column("datname"),
+    column("backend_type"),
+    column("xact_start"),
+)
+
+
+async def _ingest_horizon(db: AsyncSession) -> datetime:
+    """Start of the oldest transaction still open on the database.
+
+    transactions.created_at defaults to now() in Postgres, the start of the
+    inserting transaction on the same clock as xact_start, so any row not
+    yet committed (a slow import) has created_at at or after this horizon.
+    Folding only rows created before it and advancing the watermark to it
+    never skips a late-committing row.
+    """
+    return await db.scalar(
+        select(func.coalesce(func.min(_activity.c.xact_start), func.now())).where(
+            _activity.c.datname == func.current_database(),
+            _activity.c.backend_type == "client backend",
+        )
+    )
+
+
+async def _merchant_summaries(
     db: AsyncSession,
     user_id: UUID,
-    transactions: list[Transaction],
-) -> list[RecurringGroup]:
-    """Analyse transactions and create RecurringGroup records for detected subscriptions.
+    horizon: datetime,
+    *,
+    merchant_keys: list[str] | None = None,
+):
+    """Aggregate a user's history per normalised merchant inside Postgres.
 
-    Groups transactions by normalised merchant name + similar amount,
-    detects frequency, and creates RecurringGroup records.
+    Returns one compact row per merchant string, shaped like DetectorState:
+    count, first/last date, abs-amount total/min/max and the most recent
+    RECENT_WINDOW charges, over rows created before `horizon`. The mean gap is
+    (last - first) / (n - 1), so no per-row gap data needs to leave the
+    database.
     """
-    # Group by merchant name (normalised)
-    merchant_groups: dict[str, list[Transaction]] = defaultdict(list)
-    for txn in transactions:
-        key = (txn.merchant_name or txn.description).lower().strip()
-        merchant_groups[key].append(txn)
-
-    # Filter to groups with 3+ transactions (need at least 3 to detect pattern)
-    recurring_candidates = {
-        merchant: txns for merchant, txns in merchant_groups.items() if len(txns) >= 3
+    key = merchant_key_expr()
+    day = cast(Transaction.date, Date)
+    amount = func.abs(Transaction.amount)
+    newest_first = day.desc()
+
+    query = (
+        select(
+            key.label("merchant_key"),
+            func.array_agg(
+                aggregate_order_by(
+                    func.coalesce(Transaction.merchant_name, Transaction.description),
+                    newest_first,
+                ),
+                type_=ARRAY(String),
+            )[1].label("merchant_name"),
+            func.count().label("txn_count"),
+            func.min(day).label("first_date"),
+            func.max(day).label("last_date"),
+            func.sum(amount).label("amount_total"),
+            func.min(amount).label("amount_min"),
+            func.max(amount).label("amount_max"),
+            func.array_agg(aggregate_order_by(day, newest_first), type_=ARRAY(Date))[
+                1:RECENT_WINDOW
+            ].label("recent_dates"),
+            func.array_agg(
+                aggregate_order_by(amount, newest_first), type_=ARRAY(Numeric)
+            )[1:RECENT_WINDOW].label("recent_amounts"),
+        )
+        .where(Transaction.user_id == user_id, Transaction.created_at < horizon)
+        .group_by(key)
+    )
+    if merchant_keys is not None:
+        query = query.where(key.in_(merchant_keys))
+
+    result = await db.execute(query)
+    return result.all()
+
+
+def _state_from_summaries(
+    user_id: UUID, merchant_key: str, summaries: list, watermark: datetime
+) -> DetectorState:
+    """Build one cluster's DetectorState from its _merchant_summaries rows."""
+    newest = max(summaries, key=lambda summary: summary.last_date)
+    # Aggregated newest first; state keeps oldest first
+    recent = sorted(
+        charge
+        for summary in summaries
+        for charge in zip(summary.recent_dates, summary.recent_amounts)
+    )[-RECENT_WINDOW:]
+    return DetectorState(
+        user_id=user_id,
+        merchant_key=merchant_key,
+        merchant_keys=sorted(summary.merchant_key for summary in summaries),
+        merchant_name=newest.merchant_name,
+        txn_count=sum(summary.txn_count for summary in summaries),
+        first_date=min(summary.first_date for summary in summaries),
+        last_date=newest.last_date,
+        amount_total=sum(summary.amount_total for summary in summaries),
+        amount_min=min(summary.amount_min for summary in summaries),
+        amount_max=max(summary.amount_max for summary in summaries),
+        recent_dates=[d for d, _ in recent],
+        recent_amounts=[a for _, a in recent],
+        watermark=watermark,
+    )
+
+
+def _states_from_summaries(
+    user_id: UUID, summaries: list, assigned: dict[str, str], watermark: datetime
+) -> dict[str, DetectorState]:
+    """Build a DetectorState per cluster key from per-merchant summaries."""
+    by_cluster: dict[str, list] = defaultdict(list)
+    for summary in summaries:
+        by_cluster[assigned[summary.merchant_key]].append(summary)
+    return {
+        key: _state_from_summaries(user_id, key, members, watermark)
+        for key, members in by_cluster.items()
     }
 
-    created_groups: list[RecurringGroup] = []
 
-    for merchant_key, txns in recurring_candidates.items():
-        # Check amounts are similar (within 10% or 1.00)
-        amounts = [abs(txn.amount) for txn in txns]
-        avg_amount = sum(amounts) / len(amounts)
+async def resolve_merchant_keys(
+    db: AsyncSession, user_id: UUID, keys: list[str]
+) -> dict[str, str]:
+    """Map normalised merchant strings to the user's merchant cluster keys.
+
+    Strings already folded into a DetectorState keep that state's key;
+    unseen ones are clustered against them (see assign_merchant_keys).
+    """
+    result = await db.execute(
+        select(
+            func.unnest(DetectorState.merchant_keys), DetectorState.merchant_key
+        ).where(DetectorState.user_id == user_id)
+    )
+    return assign_merchant_keys(keys, dict(result.all()))
+
+
+class Detection(NamedTuple):
+    """A recurring series found within one merchant's charges."""
+
+    frequency: Frequency
+    next_date: date
+    amount: Decimal
+    amount_low: Decimal
+    amount_high: Decimal
+
+
+def _evaluate_series(
+    series: list[tuple[list[date], list[Decimal]]],
+) -> list[list[Detection]]:
+    """Return the recurring sub-series found in each (dates, amounts) series.
 
-        if avg_amount == 0:
+    Each series' amounts are split into clusters first, so one merchant can
+    carry several subscriptions at different prices. Periodicity and next
+    dates are then computed for every consistent cluster of every series in
+    one vectorised batch.
+    """
+    evaluations: list[list[Detection]] = [[] for _ in series]
+    candidates: list[tuple[int, list[date], list[Decimal]]] = []
+    for i, (series_dates, series_amounts) in enumerate(series):
+        if len(series_amounts) < 3:
             continue
+        for members in _amount_clusters(series_amounts):
+            if len(members) < 3:
+                continue
+            amounts = [series_amounts[m] for m in members]
+            avg_amount = sum(amounts) / len(amounts)
+            if avg_amount == 0 or not _amounts_consistent(
+                avg_amount, min(amounts), max(amounts)
+            ):
+                continue
+            candidates.append((i, [series_dates[m] for m in members], amounts))
 
-        amount_consistent = all(
-            abs(a - avg_amount) <= max(avg_amount * Decimal("0.1"), Decimal("1.00"))
-            for a in amounts
+    periodicity = detect_periodicity([dates for _, dates, _ in candidates])
+    recurring = [
+        (candidate, result.frequency)
+        for candidate, result in zip(candidates, periodicity)
+        if result.frequency is not None
+    ]
+    next_dates = predict_next_dates(
+        [dates for (_, dates, _), _ in recurring],
+        [frequency for _, frequency in recurring],
+    )
+    for ((i, _, amounts), frequency), next_date in zip(recurring, next_dates):
+        evaluations[i].append(
+            Detection(
+                frequency=frequency,
+                next_date=next_date,
+                amount=sum(amounts) / len(amounts),
+                amount_low=min(amounts),
+                amount_high=max(amounts),
+            )
         )
+    return evaluations
 
-        if not amount_consistent:
-            continue
 
-        # Detect frequency
-        dates = [
-            txn.date.date()
-            if hasattr(txn.date, "date") and callable(txn.date.date)
-            else txn.date
-            for txn in txns
+def _evaluate_states(states: list[DetectorState]) -> list[list[Detection]]:
+    """Return the recurring series found in each state's recent charges."""
+    return _evaluate_series(
+        [
+            (state.recent_dates or [], state.recent_amounts or [])
+            if state.txn_count >= 3
+            else ([], [])
+            for state in states
         ]
-        frequency = _detect_frequency(dates)
+    )
 
-        if frequency is None:
-            continue
 
-        # Check if RecurringGroup already exists for this merchant
-        merchant_name = txns[0].merchant_name or txns[0].description
-        existing = await db.execute(
-            select(RecurringGroup).where(
-                RecurringGroup.user_id == user_id,
-                RecurringGroup.merchant_name == merchant_name,
+async def _existing_groups_by_merchant(
+    db: AsyncSession, user_id: UUID
+) -> dict[str, list[RecurringGroup]]:
+    """Load all of a user's recurring groups once, keyed by merchant cluster."""
+    result = await db.execute(
+        select(RecurringGroup).where(RecurringGroup.user_id == user_id)
+    )
+    groups: dict[str, list[RecurringGroup]] = defaultdict(list)
+    for group in result.scalars().all():
+        groups[group.merchant_key].append(group)
+    return groups
+
+
+async def _existing_groups_for_users(
+    db: AsyncSession, user_ids: list[UUID]
+) -> dict[UUID, dict[str, list[RecurringGroup]]]:
+    """Load the recurring groups of many users at once, by user then cluster."""
+    result = await db.execute(
+        select(RecurringGroup).where(RecurringGroup.user_id.in_(user_ids))
+    )
+    groups: dict[UUID, dict[str, list[RecurringGroup]]] = defaultdict(
+        lambda: defaultdict(list)
+    )
+    for group in result.scalars().all():
+        groups[group.user_id][group.merchant_key].append(group)
+    return groups
+
+
+def _has_existing_group(
+    existing: dict[str, list[RecurringGroup]], merchant_key: str, amount: Decimal
+) -> bool:
+    """Whether the merchant cluster already has a group charging roughly this amount."""
+    tolerance = _amount_tolerance(amount)
+    return any(
+        abs(group.estimated_amount - amount) <= tolerance
+        for group in existing.get(merchant_key, [])
+    )
+
+
+def _new_group(
+    user_id: UUID,
+    merchant_key: str,
+    merchant_name: str,
+    frequency: Frequency,
+    estimated_amount: Decimal,
+    next_date: date,
+) -> RecurringGroup:
+    return RecurringGroup(
+        id=uuid.uuid4(),
+        user_id=user_id,
+        name=merchant_name,
+        type=_recurring_type(merchant_key),
+        frequency=frequency,
+        estimated_amount=estimated_amount,
+        status=RecurringStatus.active,
+        merchant_name=merchant_name,
+        merchant_key=merchant_key,
+        next_expected_date=next_date,
+    )
+
+
+async def _insert_groups(db: AsyncSession, groups: list[RecurringGroup]) -> None:
+    """Insert new groups with a single multi-row INSERT."""
+    if not groups:
+        return
+    columns = [
+        "id",
+        "user_id",
+        "name",
+        "type",
+        "frequency",
+        "estimated_amount",
+        "status",
+        "merchant_name",
+        "merchant_key",
+        "next_expected_date",
+    ]
+    await db.execute(
+        insert(RecurringGroup),
+        [{col: getattr(group, col) for col in columns} for group in groups],
+    )
+
+
+async def link_transactions(db: AsyncSession, links: list[tuple[UUID, UUID]]) -> None:
+    """Mark (transaction_id, group_id) pairs as recurring in one UPDATE."""
+    if not links:
+        return
+
+    linked = values(
+        column("transaction_id", PG_UUID(as_uuid=True)),
+        column("group_id", PG_UUID(as_uuid=True)),
+        name="linked",
+    ).data(links)
+
+    await db.execute(
+        update(Transaction)
+        .where(Transaction.id == linked.c.transaction_id)
+        .values(is_recurring=True, recurring_group_id=linked.c.group_id)
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def _mark_recurring(
+    db: AsyncSession,
+    user_id: UUID,
+    detected_groups: list[tuple[str, Decimal, Decimal, UUID]],
+) -> None:
+    """Link each merchant's charges to their new groups in one UPDATE.
+
+    Rows are (merchant_key, amount_low, amount_high, group_id); a charge is
+    linked when its absolute amount falls within the group's range.
+    """
+    await _mark_recurring_for_users(
+        db, [(user_id, *detected) for detected in detected_groups]
+    )
+
+
+async def _mark_recurring_for_users(
+    db: AsyncSession,
+    detected_groups: list[tuple[UUID, str, Decimal, Decimal, UUID]],
+) -> None:
+    """Like _mark_recurring, for rows of (user_id, merchant_key, low, high, group_id)."""
+    if not detected_groups:
+        return
+
+    detected = values(
+        column("user_id", PG_UUID(as_uuid=True)),
+        column("merchant_key", String),
+        column("amount_low", Numeric(12, 2)),
+        column("amount_high", Numeric(12, 2)),
+        column("group_id", PG_UUID(as_uuid=True)),
+        name="detected",
+    ).data(detected_groups)
+
+    await db.execute(
+        update(Transaction)
+        .where(
+            Transaction.user_id == detected.c.user_id,
+            merchant_key_expr() == detected.c.merchant_key,
+            func.abs(Transaction.amount).between(
+                detected.c.amount_low, detected.c.amount_high
+            ),
+        )
+        .values(is_recurring=True, recurring_group_id=detected.c.group_id)
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def detect_subscriptions_incremental(
+    db: AsyncSession, user_id: UUID
+) -> list[RecurringGroup]:
+    """Fold transactions ingested since the last run into per-merchant state.
+
+    Only transactions created between the user's watermark and the ingest
+    horizon (see _ingest_horizon) are loaded, and the watermark advances to
+    that horizon. Their merchant strings are resolved to merchant clusters
+    (resolve_merchant_keys), the clusters they touch are re-evaluated from their DetectorState and a
+    RecurringGroup is created for each one that now qualifies. A user's
+    first run seeds state for every cluster from SQL-side per-merchant
+    summaries instead of loading their history.
+    """
+    watermark = await db.scalar(
+        select(func.max(DetectorState.watermark)).where(
+            DetectorState.user_id == user_id
+        )
+    )
+    horizon = await _ingest_horizon(db)
+
+    if watermark is None:
+        # First run: seed state for every merchant cluster from SQL summaries
+        summaries = await _merchant_summaries(db, user_id, horizon)
+        assigned = cluster_merchant_keys(summary.merchant_key for summary in summaries)
+        states = _states_from_summaries(user_id, summaries, assigned, horizon)
+        for state in states.values():
+            db.add(state)
+        touched = list(states)
+        folded = sum(state.txn_count for state in states.values())
+    else:
+        result = await db.execute(
+            select(*transaction_record_columns(), merchant_key_expr()).where(
+                Transaction.user_id == user_id,
+                Transaction.created_at >= watermark,
+                Transaction.created_at < horizon,
             )
         )
-        if existing.scalar_one_or_none() is not None:
-            continue
+        new_by_merchant: dict[str, list[TransactionRecord]] = defaultdict(list)
+        for *columns, merchant in result.all():
+            new_by_merchant[merchant].append(TransactionRecord(*columns))
+        if not new_by_merchant:
+            return []
+
+        assigned = await resolve_merchant_keys(db, user_id, list(new_by_merchant))
+        new_by_key: dict[str, list[TransactionRecord]] = defaultdict(list)
+        for merchant, txns in new_by_merchant.items():
+            new_by_key[assigned[merchant]].extend(txns)
 
-        # Determine type
-        rec_type = RecurringType.subscription
-        if any(word in merchant_key for word in ["salary", "wages", "pay"]):
-            rec_type = RecurringType.salary
-        elif any(
-            word in merchant_key for word in ["council", "water", "electric", "gas"]
-        ):
-            rec_type = RecurringType.direct_debit
-
-        # Create RecurringGroup
-        next_date = _predict_next_date(dates, frequency)
-        group = RecurringGroup(
-            user_id=user_id,
-            name=merchant_name,
-            type=rec_type,
-            frequency=frequency,
-            estimated_amount=avg_amount,
-            status=RecurringStatus.active,
-            merchant_name=merchant_name,
-            next_expected_date=next_date,
+        state_result = await db.execute(
+            select(DetectorState).where(
+                DetectorState.user_id == user_id,
+                DetectorState.merchant_key.in_(list(new_by_key)),
+            )
         )
-        db.add(group)
-        created_groups.append(group)
+        states = {s.merchant_key: s for s in state_result.scalars().all()}
+
+        # Clusters without state are new merchants: summarise their full
+        # history (which includes the new rows) instead of folding
+        unseen = [m for m in new_by_merchant if assigned[m] not in states]
+        seeded: dict[str, DetectorState] = {}
+        if unseen:
+            seeded = _states_from_summaries(
+                user_id,
+                await _merchant_summaries(db, user_id, horizon, merchant_keys=unseen),
+                assigned,
+                horizon,
+            )
+            for state in seeded.values():
+                db.add(state)
+            states.update(seeded)
+
+        for merchant, txns in new_by_merchant.items():
+            key = assigned[merchant]
+            if key in seeded:
+                continue
+            state = states[key]
+            _fold_into_state(state, txns)
+            state.watermark = horizon
+            if merchant not in (state.merchant_keys or []):
+                state.merchant_keys = sorted([*(state.merchant_keys or []), merchant])
+        touched = list(new_by_key)
+        folded = sum(len(txns) for txns in new_by_key.values())
 
-        # Mark transactions as recurring
-        for txn in txns:
-            txn.is_recurring = True
-            txn.recurring_group_id = group.id
+    evaluations = _evaluate_states([states[key] for key in touched])
+    detected = {
+        key: detections for key, detections in zip(touched, evaluations) if detections
+    }
+
+    existing = await _existing_groups_by_merchant(db, user_id) if detected else {}
+
+    created_groups: list[RecurringGroup] = []
+    detected_groups: list[tuple[str, Decimal, Decimal, UUID]] = []
+    for key, detections in detected.items():
+        state = states[key]
+        for detection in detections:
+            if _has_existing_group(existing, key, detection.amount):
+                continue
+            group = _new_group(
+                user_id,
+                key,
+                state.merchant_name,
+                detection.frequency,
+                detection.amount,
+                detection.next_date,
+            )
+            created_groups.append(group)
+            detected_groups.extend(
+                (merchant, detection.amount_low, detection.amount_high, group.id)
+                for merchant in state.merchant_keys
+            )
 
     await db.flush()
-    logger.info(f"Detected {len(created_groups)} subscriptions for user {user_id}")
+    await _insert_groups(db, created_groups)
+    await _mark_recurring(db, user_id, detected_groups)
+    logger.info(
+        f"Folded {folded} transactions; "
+        f"detected {len(created_groups)} subscriptions for user {user_id}"
+    )
     return created_groups
+
+
+def _detect_partition(
+    partition: list[tuple[UUID, list[tuple[str, str, date, Decimal]], dict[str, str]]],
+) -> list[tuple[UUID, str, list[str], str, Detection]]:
+    """Detect recurring series for a slice of users; runs in a worker process.
+
+    Takes (user_id, rows, known) triples, rows being (merchant_key,
+    merchant_name, date, abs_amount) in date order and known the user's
+    existing merchant cluster assignments, and returns (user_id,
+    cluster_key, merchant_keys, merchant_name, detection) for every series
+    found, merchant_keys being the raw keys of the cluster the series came
+    from. Every merchant of every user in the slice is evaluated in one
+    vectorised batch.
+    """
+    owners: list[tuple[UUID, str, list[str], str]] = []
+    series: list[tuple[list[date], list[Decimal]]] = []
+    for user_id, rows, known in partition:
+        clusters = assign_merchant_keys((row[0] for row in rows), known)
+        by_cluster: dict[str, list[tuple[str, str, date, Decimal]]] = defaultdict(list)
+        for row in rows:
+            by_cluster[clusters[row[0]]].append(row)
+        for cluster_key, merchant_rows in by_cluster.items():
+            if len(merchant_rows) < 3:
+                continue
+            keys = list(dict.fromkeys(row[0] for row in merchant_rows))
+            owners.append((user_id, cluster_key, keys, merchant_rows[-1][1]))
+            series.append(
+                ([row[2] for row in merchant_rows], [row[3] for row in merchant_rows])
+            )
+
+    return [
+        (*owner, detection)
+        for owner, detections in zip(owners, _evaluate_series(series))
+        for detection in detections
+    ]
+
+
+async def _merchant_key_assignments_for_users(
+    db: AsyncSession, user_ids: list[UUID]
+) -> dict[UUID, dict[str, str]]:
+    """Each user's raw merchant key -> cluster key assignments from DetectorState."""
+    result = await db.execute(
+        select(
+            DetectorState.user_id,
+            func.unnest(DetectorState.merchant_keys),
+            DetectorState.merchant_key,
+        ).where(DetectorState.user_id.in_(user_ids))
+    )
+    assignments: dict[UUID, dict[str, str]] = defaultdict(dict)
+    for user_id, merchant, key in result.all():
+        assignments[user_id][merchant] = key
+    return assignments
+
+
+async def _stream_user_batches(
+    db: AsyncSession,
+    user_ids: list[UUID],
+    known: dict[UUID, dict[str, str]],
+    rows_per_batch: int,
+):
+    """Stream the users' transactions as _detect_partition batches.
+
+    Rows come from a server-side cursor in (user_id, date) order, read
+    along ix_transactions_user_date_id, and are cut into batches of whole
+    users holding about `rows_per_batch` rows, so only the batches in
+    flight are ever in memory.
+    """
+    result = await db.stream(
+        select(
+            Transaction.user_id,
+            merchant_key_expr(),
+            func.coalesce(Transaction.merchant_name, Transaction.description),
+            cast(Transaction.date, Date),
+            func.abs(Transaction.amount),
+        )
+        .where(Transaction.user_id.in_(user_ids))
+        .order_by(Transaction.user_id, Transaction.date)
+        .execution_options(yield_per=rows_per_batch)
+    )
+    batch: list[tuple[UUID, list[tuple[str, str, date, Decimal]], dict[str, str]]] = []
+    batch_rows = 0
+    current_user, current_rows = None, []
+    async for user_id, *row in result:
+        if user_id != current_user:
+            if current_rows:
+                batch.append((current_user, current_rows, known.get(current_user, {})))
+                batch_rows += len(current_rows)
+                if batch_rows >= rows_per_batch:
+                    yield batch
+                    batch, batch_rows = [], 0
+            current_user, current_rows = user_id, []
+        current_rows.append(tuple(row))
+    if current_rows:
+        batch.append((current_user, current_rows, known.get(current_user, {})))
+    if batch:
+        yield batch
+
+
+async def detect_subscriptions_fleet(
+    db: AsyncSession,
+    executor: Executor,
+    *,
+    partitions: int = 1,
+    users_per_page: int = FLEET_USERS_PER_PAGE,
+    rows_per_batch: int = FLEET_ROWS_PER_BATCH,
+) -> int:
+    """Run full-history subscription detection for every user in one job.
+
+    Users are walked in id order (keyset pagination) a page at a time. Each
+    page's transactions are streamed as plain column tuples in batches of
+    whole users (_stream_user_batches) and evaluated on `executor` (a
+    process pool in production), at most `partitions` batches at a time,
+    so memory is bounded by the batch size rather than the page's history.
+    Merchant clusters reuse the keys the
+    users' DetectorState already assigned, and a series becomes a group
+    only when its cluster has none at that amount. New groups for the whole
+    page are inserted with one INSERT and their charges linked with one
+    UPDATE; each page is committed so a long run keeps its progress.
+    Returns the number of groups created.
+    """
+    loop = asyncio.get_running_loop()
+    created = 0
+    last_user_id = None
+    while True:
+        query = select(User.id).order_by(User.id).limit(users_per_page)
+        if last_user_id is not None:
+            query = query.where(User.id > last_user_id)
+        user_ids = list((await db.execute(query)).scalars().all())
+        if not user_ids:
+            break
+
+        known = await _merchant_key_assignments_for_users(db, user_ids)
+        detections: list[tuple[UUID, str, list[str], str, Detection]] = []
+        in_flight: list[asyncio.Future] = []
+        async for batch in _stream_user_batches(db, user_ids, known, rows_per_batch):
+            if len(in_flight) >= partitions:
+                detections.extend(await in_flight.pop(0))
+            in_flight.append(loop.run_in_executor(executor, _detect_partition, batch))
+        for future in in_flight:
+            detections.extend(await future)
+
+        existing = (
+            await _existing_groups_for_users(
+                db, list({user_id for user_id, *_ in detections})
+            )
+            if detections
+            else {}
+        )
+        page_groups: list[RecurringGroup] = []
+        detected_groups: list[tuple[UUID, str, Decimal, Decimal, UUID]] = []
+        for user_id, cluster_key, keys, merchant_name, detection in detections:
+            user_groups = existing.get(user_id, {})
+            if _has_existing_group(user_groups, cluster_key, detection.amount):
+                continue
+            group = _new_group(
+                user_id,
+                cluster_key,
+                merchant_name,
+                detection.frequency,
+                detection.amount,
+                detection.next_date,
+            )
+            page_groups.append(group)
+            detected_groups.extend(
+                (user_id, key, detection.amount_low, detection.amount_high, group.id)
+                for key in keys
+            )
+
+        await _insert_groups(db, page_groups)
+        await _mark_recurring_for_users(db, detected_groups)
+        if page_groups:
+            mark_user_data_changed(db, *{group.user_id for group in page_groups})
+        await db.commit()
+
+        created += len(page_groups)
+        logger.info(
+            f"Fleet detection: {len(user_ids)} users scanned, "
+            f"{len(page_groups)} subscriptions created"
+        )
+        last_user_id = user_ids[-1]
+        if len(user_ids) < users_per_page:
+            break
+    return created
@@ -0,0 +1,125 @@
+import asyncio
+import logging
+import time
+
+import redis
+import redis.asyncio
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_redis: redis.Redis | None = None
+_async_redis: redis.asyncio.Redis | None = None
+
+# Session.info key collecting users whose data the transaction changed
+_CHANGED_USERS = "changed_user_ids"
+# Session.info key holding post-commit bumps still running in the executor
+_PENDING_BUMPS = "pending_data_version_bumps"
+
+
+def get_redis() -> redis.Redis:
+    """Return the process-wide Redis client (created on first use)."""
+    global _redis
+    if _redis is None:
+        _redis = redis.Redis.from_url(settings.redis_url, decode_responses=True)
+    return _redis
+
+
+def get_async_redis() -> redis.asyncio.Redis:
+    """Return the process-wide asyncio Redis client for request handlers."""
+    global _async_redis
+    if _async_redis is None:
+        _async_redis = redis.asyncio.Redis.from_url(
+            settings.redis_url, decode_responses=True
+        )
+    return _async_redis
+
+
+def _data_version_key(user_id) -> str:
+    return f"data_version:{user_id}"
+
+
+def _initial_data_version() -> int:
+    return time.time_ns() // 1_000_000
+
+
+async def get_data_version(user_id) -> int | None:
+    """Current version of a user's transaction data, or None if Redis is down.
+
+    Cache entries and ETags derived from the data embed the version, so
+    bumping it invalidates all of them at once; callers skip them when the
+    version is unavailable. A missing version (a new user, or Redis lost
+    its data) starts at the current time in milliseconds rather than 0, so
+    versions never repeat across a reset.
+    """
+    key = _data_version_key(user_id)
+    try:
+        async with get_async_redis().pipeline() as pipe:
+            pipe.set(key, _initial_data_version(), nx=True)
+            pipe.get(key)
+            _, version = await pipe.execute()
+    except redis.RedisError as e:
+        logger.warning(f"Data version unavailable for user {user_id}: {e}")
+        return None
+    return int(version)
+
+
+def bump_data_version(user_id) -> int:
+    key = _data_version_key(user_id)
+    pipe = get_redis().pipeline()
+    pipe.set(key, _initial_data_version(), nx=True)
+    pipe.incr(key)
+    return pipe.execute()[1]
+
+
+def _bump_data_versions(user_ids) -> None:
+    for user_id in user_ids:
+        try:
+            bump_data_version(user_id)
+        except redis.RedisError as e:
+            logger.warning(f"Could not bump data version for user {user_id}: {e}")
+
+
+def mark_user_data_changed(db: AsyncSession, *user_ids) -> None:
+    """Bump the users' data versions once the session's transaction commits.
+
+    Bumping after the commit (and not at all on rollback) stops a concurrent
+    reader from caching pre-change results under the new version.
+    """
+    db.sync_session.info.setdefault(_CHANGED_USERS, set()).update(user_ids)
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_changed_users(session: Session) -> None:
+    user_ids = session.info.pop(_CHANGED_USERS, None)
+    if not user_ids:
+        return
+    # The data is committed whatever happens here: bump off the event loop
+    # and only log Redis failures rather than failing the write
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        _bump_data_versions(user_ids)
+    else:
+        future = loop.run_in_executor(None, _bump_data_versions, user_ids)
+        session.info.setdefault(_PENDING_BUMPS, []).append(future)
+
+
+async def wait_for_data_version_bumps(db: AsyncSession) -> None:
+    """Wait until the bumps queued by the session's commits have reached Redis.
+
+    Request handlers call this before responding, so a client's refetch
+    right after a write never revalidates against the old version.
+    """
+    pending = db.sync_session.info.pop(_PENDING_BUMPS, None)
+    if pending:
+        await asyncio.gather(*pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changed_users(session: Session) -> None:
+    session.info.pop(_CHANGED_USERS, None)
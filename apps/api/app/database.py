@@ -1,5 +1,6 @@
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
+from app.cache import wait_for_data_version_bumps
 from app.config import settings
 
 engine = create_async_engine(settings.database_url, echo=settings.app_debug)
@@ -7,10 +8,16 @@ async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit
 
 
 async def get_db():
+    """Request session, committed when the endpoint returns.
+
+    Depend on it with scope="function" so the commit and the data-version
+    bumps it triggers finish before the response is sent.
+    """
     async with async_session() as session:
         try:
             yield session
             await session.commit()
+            await wait_for_data_version_bumps(session)
         except Exception:
             await session.rollback()
             raise
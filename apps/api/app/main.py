@@ -2,6 +2,7 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import settings
+from app.routes.analytics import router as analytics_router
 from app.routes.auth import router as auth_router
 from app.routes.subscriptions import router as subscriptions_router
 from app.routes.transactions import router as transactions_router
@@ -19,6 +20,7 @@ app.add_middleware(
 app.include_router(auth_router)
 app.include_router(transactions_router)
 app.include_router(subscriptions_router)
+app.include_router(analytics_router)
 
 
 @app.get("/health")
@@ -10,7 +10,7 @@ from app.services.auth_service import decode_access_token, hash_password
 
 async def get_current_user(
     request: Request,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_db, scope="function"),
 ) -> User:
     """Get the current authenticated user.
 
@@ -0,0 +1,45 @@
+from datetime import date
+
+from fastapi import Depends, HTTPException, Request, Response, status
+
+from app.cache import get_data_version
+from app.middleware.auth import get_current_user
+from app.models.user import User
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of an ETag against an If-None-Match header value."""
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
+
+
+async def data_version_etag(
+    request: Request,
+    response: Response,
+    user: User = Depends(get_current_user),
+) -> str | None:
+    """Conditional GET keyed on the user's data version.
+
+    Tags the response with an ETag built from the user id, the version and
+    today's date (analytics windows default to the current day), so a tag
+    is never valid for another user, and answers a matching
+    If-None-Match with 304 before the endpoint runs its queries. The version
+    is read before any data, so a write committing mid-request can only make
+    the tag older than the body, never newer. If Redis is unavailable the
+    response is served untagged.
+    """
+    version = await get_data_version(user.id)
+    if version is None:
+        return None
+    etag = f'W/"{user.id}-{version}-{date.today().isoformat()}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match is not None and _etag_matches(if_none_match, etag):
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return etag
@@ -3,12 +3,15 @@ from app.models.user import User
 from app.models.account import Account, AccountType
 from app.models.transaction import Transaction
 from app.models.category import Category
+from app.models.daily_spend import DailySpend
+from app.models.detector_state import DetectorState
 from app.models.recurring_group import (
     RecurringGroup,
     RecurringType,
     Frequency,
     RecurringStatus,
 )
+from app.models.recurring_alert import AlertKind, RecurringAlert
 
 __all__ = [
     "Base",
@@ -18,8 +21,12 @@ __all__ = [
     "AccountType",
     "Transaction",
     "Category",
+    "DailySpend",
+    "DetectorState",
     "RecurringGroup",
     "RecurringType",
     "Frequency",
     "RecurringStatus",
+    "RecurringAlert",
+    "AlertKind",
 ]
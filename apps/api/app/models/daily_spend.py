@@ -0,0 +1,48 @@
+from sqlalchemy import Column, Date, ForeignKey, Index, Integer, Numeric, func
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.models.base import Base
+
+
+class DailySpend(Base):
+    """Per-day rollup of a user's transactions by category and account.
+
+    Rebuilt for the affected days whenever transactions are ingested or
+    recategorised (see analytics_service.refresh_daily_spend), so dashboard
+    queries read a few rows per day instead of scanning transactions.
+    """
+
+    __tablename__ = "daily_spend"
+
+    # Rows are written with INSERT ... SELECT, so the id comes from Postgres
+    id = Column(
+        UUID(as_uuid=True), primary_key=True, server_default=func.gen_random_uuid()
+    )
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    day = Column(Date, nullable=False)
+    category_id = Column(UUID(as_uuid=True), ForeignKey("categories.id"), nullable=True)
+    account_id = Column(UUID(as_uuid=True), ForeignKey("accounts.id"), nullable=False)
+    # Sum of charges (as a positive amount) and of credits
+    outflow = Column(Numeric(14, 2), nullable=False, default=0)
+    inflow = Column(Numeric(14, 2), nullable=False, default=0)
+    txn_count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        # Uncategorised rows (NULL category) must still collide on upsert
+        Index(
+            "ux_daily_spend_key",
+            "user_id",
+            "day",
+            "category_id",
+            "account_id",
+            unique=True,
+            postgresql_nulls_not_distinct=True,
+        ),
+        # Covers timeline sums so they are answered by an index-only scan
+        Index(
+            "ix_daily_spend_user_day",
+            "user_id",
+            "day",
+            postgresql_include=["inflow", "outflow"],
+        ),
+    )
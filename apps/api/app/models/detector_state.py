@@ -0,0 +1,52 @@
+from sqlalchemy import (
+    Column,
+    Date,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    Numeric,
+    String,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+
+from app.models.base import Base, TimestampMixin
+
+
+class DetectorState(Base, TimestampMixin):
+    """Running subscription-detection state for one merchant cluster of one user.
+
+    Each detection run folds only transactions created after the user's
+    watermark into these rows, so a run costs O(new transactions).
+    """
+
+    __tablename__ = "detector_states"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    # Cluster key shared by similar merchant strings (see merchant_clustering)
+    merchant_key = Column(String, nullable=False)
+    # Raw normalised merchant strings folded into this cluster
+    merchant_keys = Column(ARRAY(String), nullable=False, default=[])
+    merchant_name = Column(String, nullable=False)
+    txn_count = Column(Integer, nullable=False, default=0)
+    first_date = Column(Date, nullable=False)
+    last_date = Column(Date, nullable=False)
+    # Running stats over abs(amount)
+    amount_total = Column(Numeric(14, 2), nullable=False, default=0)
+    amount_min = Column(Numeric(12, 2), nullable=False)
+    amount_max = Column(Numeric(12, 2), nullable=False)
+    # Most recent charges (oldest first), bounded by RECENT_WINDOW
+    recent_dates = Column(ARRAY(Date), nullable=False, default=[])
+    recent_amounts = Column(ARRAY(Numeric(12, 2)), nullable=False, default=[])
+    # Ingest horizon of the run that last folded into this row: everything
+    # created before it is folded in
+    watermark = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        Index(
+            "ux_detector_states_user_merchant",
+            "user_id",
+            "merchant_key",
+            unique=True,
+        ),
+    )
@@ -0,0 +1,43 @@
+import enum
+
+from sqlalchemy import Column, Date, Enum, ForeignKey, Index, Numeric
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.models.base import Base, TimestampMixin
+
+
+class AlertKind(str, enum.Enum):
+    price_change = "price_change"
+    missed_payment = "missed_payment"
+
+
+class RecurringAlert(Base, TimestampMixin):
+    """A price change or missed payment on a recurring group.
+
+    At most one alert exists per (group, kind, expected_date), so re-processing
+    the same charge or re-running the sweep never duplicates an alert.
+    """
+
+    __tablename__ = "recurring_alerts"
+
+    user_id = Column(
+        UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True
+    )
+    recurring_group_id = Column(
+        UUID(as_uuid=True), ForeignKey("recurring_groups.id"), nullable=False
+    )
+    kind = Column(Enum(AlertKind), nullable=False)
+    # The charge date (price change) or the date the charge was due (missed)
+    expected_date = Column(Date, nullable=False)
+    previous_amount = Column(Numeric(12, 2), nullable=True)
+    new_amount = Column(Numeric(12, 2), nullable=True)
+
+    __table_args__ = (
+        Index(
+            "ux_recurring_alerts_group_kind_date",
+            "recurring_group_id",
+            "kind",
+            "expected_date",
+            unique=True,
+        ),
+    )
@@ -1,6 +1,6 @@
 import enum
 
-from sqlalchemy import Column, Date, Enum, ForeignKey, Numeric, String, Text
+from sqlalchemy import Column, Date, Enum, ForeignKey, Index, Numeric, String, Text
 from sqlalchemy.dialects.postgresql import UUID
 
 from app.models.base import Base, TimestampMixin
@@ -42,6 +42,16 @@ class RecurringGroup(Base, TimestampMixin):
     )
     category_id = Column(UUID(as_uuid=True), ForeignKey("categories.id"), nullable=True)
     merchant_name = Column(String, nullable=True)
+    # Merchant cluster the group was detected from (see merchant_clustering)
+    merchant_key = Column(String, nullable=True)
     next_expected_date = Column(Date, nullable=True)
+    # Latest matched charge, maintained as new transactions are ingested
+    last_seen_date = Column(Date, nullable=True)
+    last_amount = Column(Numeric(12, 2), nullable=True)
     cancel_url = Column(String, nullable=True)
     cancel_steps = Column(Text, nullable=True)
+
+    __table_args__ = (
+        # New charges are matched to active groups by merchant cluster
+        Index("ix_recurring_groups_user_merchant_key", "user_id", "merchant_key"),
+    )
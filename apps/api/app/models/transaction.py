@@ -1,6 +1,7 @@
 from sqlalchemy import (
     Boolean,
     Column,
+    Computed,
     DateTime,
     Float,
     ForeignKey,
@@ -8,18 +9,25 @@ from sqlalchemy import (
     Numeric,
     String,
     Text,
+    func,
+    text,
 )
-from sqlalchemy.dialects.postgresql import ARRAY, UUID
+from sqlalchemy.dialects.postgresql import ARRAY, TSVECTOR, UUID
+from sqlalchemy.orm import deferred
 
 from app.models.base import Base, TimestampMixin
 
 
 class Transaction(Base, TimestampMixin):
     __tablename__ = "transactions"
+    # Fetch server-side defaults (created_at) with RETURNING on insert
+    __mapper_args__ = {"eager_defaults": True}
 
     account_id = Column(
         UUID(as_uuid=True), ForeignKey("accounts.id"), nullable=False, index=True
     )
+    # Denormalised from accounts.user_id so per-user reads skip the join
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     date = Column(DateTime(timezone=True), nullable=False)
     description = Column(String, nullable=False)
     amount = Column(Numeric(12, 2), nullable=False)
@@ -35,5 +43,47 @@ class Transaction(Base, TimestampMixin):
     tags = Column(ARRAY(String), nullable=False, default=[])
     ai_confidence = Column(Float, nullable=True)
     import_id = Column(UUID(as_uuid=True), nullable=True)
+    # Start of the inserting database transaction (the database clock, not
+    # the app host's), which subscription detection's ingest horizon relies on
+    created_at = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    # Tokens of the merchant name and description for full-text search, plus
+    # the alphanumeric runs inside compound tokens ("apple.com/bill" also
+    # indexes "apple", "com", "bill"); maintained by Postgres, not loaded
+    # with the row
+    search_vector = deferred(
+        Column(
+            TSVECTOR,
+            Computed(
+                "to_tsvector('simple', coalesce(merchant_name, '') || ' ' || "
+                "description) || to_tsvector('simple', regexp_replace("
+                "coalesce(merchant_name, '') || ' ' || description, "
+                "'[^[:alnum:]]+', ' ', 'g'))",
+                persisted=True,
+            ),
+        )
+    )
 
-    __table_args__ = (Index("ix_transactions_account_date", "account_id", "date"),)
+    __table_args__ = (
+        Index("ix_transactions_account_date", "account_id", "date"),
+        Index(
+            "ix_transactions_user_date_id",
+            "user_id",
+            text("date DESC"),
+            text("id DESC"),
+        ),
+        Index("ix_transactions_user_created", "user_id", "created_at"),
+        Index(
+            "ix_transactions_recurring_group_date",
+            "recurring_group_id",
+            text("date DESC"),
+        ),
+        # user_id is a GIN key too (btree_gin), so a search never leaves the user
+        Index(
+            "ix_transactions_user_search",
+            "user_id",
+            "search_vector",
+            postgresql_using="gin",
+        ),
+    )
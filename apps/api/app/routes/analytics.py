@@ -0,0 +1,90 @@
+from datetime import date
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_db
+from app.middleware.auth import get_current_user
+from app.middleware.etag import data_version_etag
+from app.models.user import User
+from app.schemas.analytics import (
+    CategoryBreakdown,
+    DashboardStats,
+    SpendTimeline,
+    TopMerchant,
+)
+from app.services.analytics_service import (
+    MAX_TIMELINE_BUCKETS,
+    TIMELINE_DEFAULT_SPAN,
+    TimelineGranularity,
+    cached_category_breakdown,
+    cached_top_merchants,
+    get_dashboard_stats,
+    get_spend_timeline,
+    timeline_bucket_count,
+)
+
+router = APIRouter(
+    prefix="/api/v1/analytics",
+    tags=["analytics"],
+    dependencies=[Depends(data_version_etag)],
+)
+
+
+@router.get("/dashboard", response_model=DashboardStats)
+async def dashboard(
+    db: AsyncSession = Depends(get_db, scope="function"),
+    user: User = Depends(get_current_user),
+):
+    return DashboardStats(**await get_dashboard_stats(db, user.id))
+
+
+@router.get("/categories", response_model=list[CategoryBreakdown])
+async def categories(
+    date_from: date | None = Query(None),
+    date_to: date | None = Query(None),
+    db: AsyncSession = Depends(get_db, scope="function"),
+    user: User = Depends(get_current_user),
+):
+    if date_from is not None and date_to is not None and date_from > date_to:
+        raise HTTPException(status_code=400, detail="date_from is after date_to")
+    rows = await cached_category_breakdown(
+        db, user.id, date_from=date_from, date_to=date_to
+    )
+    return [CategoryBreakdown(**row) for row in rows]
+
+
+@router.get("/top-merchants", response_model=list[TopMerchant])
+async def top_merchants(
+    limit: int = Query(5, ge=1, le=50),
+    db: AsyncSession = Depends(get_db, scope="function"),
+    user: User = Depends(get_current_user),
+):
+    return [
+        TopMerchant(**row)
+        for row in await cached_top_merchants(db, user.id, limit=limit)
+    ]
+
+
+@router.get("/timeline", response_model=SpendTimeline)
+async def timeline(
+    granularity: TimelineGranularity = Query(TimelineGranularity.month),
+    date_from: date | None = Query(None, alias="from"),
+    date_to: date | None = Query(None, alias="to"),
+    db: AsyncSession = Depends(get_db, scope="function"),
+    user: User = Depends(get_current_user),
+):
+    date_to = date_to or date.today()
+    date_from = date_from or date_to - TIMELINE_DEFAULT_SPAN[granularity]
+    if date_from > date_to:
+        raise HTTPException(status_code=400, detail="from is after to")
+    if timeline_bucket_count(granularity, date_from, date_to) > MAX_TIMELINE_BUCKETS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Timeline spans more than {MAX_TIMELINE_BUCKETS} periods",
+        )
+    return SpendTimeline(
+        **await get_spend_timeline(
+            db, user.id, granularity, date_from=date_from, date_to=date_to
+        )
+    )
@@ -21,7 +21,7 @@ class LoginRequest(BaseModel):
 
 
 @router.post("/register", response_model=UserRead, status_code=status.HTTP_201_CREATED)
-async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db, scope="function")):
     """Register a new user."""
     # Check if email already exists
     query = select(User).where(User.email == user_data.email)
@@ -44,7 +44,7 @@ async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
 
 
 @router.post("/login")
-async def login(body: LoginRequest, db: AsyncSession = Depends(get_db)):
+async def login(body: LoginRequest, db: AsyncSession = Depends(get_db, scope="function")):
     """Authenticate a user and return a JWT access token."""
     user = await authenticate_user(db, body.email, body.password)
     if user is None:
@@ -5,6 +5,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
 from app.middleware.auth import get_current_user
+from app.middleware.etag import data_version_etag
 from app.models.user import User
 from app.schemas.recurring_group import RecurringGroupRead, RecurringGroupUpdate
 from app.services.subscription_service import (
@@ -17,9 +18,9 @@ from app.services.subscription_service import (
 router = APIRouter(prefix="/api/v1/subscriptions", tags=["subscriptions"])
 
 
-@router.get("")
+@router.get("", dependencies=[Depends(data_version_etag)])
 async def list_subscriptions(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_db, scope="function"),
     user: User = Depends(get_current_user),
 ):
     subs = await get_subscriptions(db, user.id)
@@ -34,7 +35,7 @@ async def list_subscriptions(
 async def update_sub(
     subscription_id: UUID,
     update_data: RecurringGroupUpdate,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_db, scope="function"),
     user: User = Depends(get_current_user),
 ):
     sub = await update_subscription(
@@ -51,7 +52,7 @@ async def update_sub(
 @router.post("/{subscription_id}/dismiss", response_model=RecurringGroupRead)
 async def dismiss_sub(
     subscription_id: UUID,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_db, scope="function"),
     user: User = Depends(get_current_user),
 ):
     sub = await dismiss_subscription(db, subscription_id, user.id)
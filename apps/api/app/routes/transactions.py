@@ -3,17 +3,36 @@ from decimal import Decimal
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
-from pydantic import BaseModel
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, model_validator
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
 from app.middleware.auth import get_current_user
+from app.middleware.etag import data_version_etag
 from app.models.user import User
-from app.schemas.transaction import CursorPage, TransactionRead, TransactionUpdate
+from app.schemas.transaction import (
+    CursorPage,
+    TransactionBulkUpdate,
+    TransactionFilter,
+    TransactionRead,
+    TransactionUpdate,
+)
+from app.services.export_service import (
+    ENCODERS,
+    MEDIA_TYPES,
+    ExportFormat,
+    parquet_available,
+    stream_transaction_rows,
+)
 from app.services.transaction_service import (
     bulk_update_category,
+    bulk_update_transactions,
+    decode_cursor,
     get_transaction_by_id,
     get_transactions,
+    narrows_selection,
+    search_transactions,
     update_transaction,
 )
 
@@ -21,14 +40,20 @@ router = APIRouter(prefix="/api/v1/transactions", tags=["transactions"])
 
 
 class BulkCategoryRequest(BaseModel):
-    transaction_ids: list[UUID]
+    """Recategorise explicit ids, or every transaction matching `filters`."""
+
     category_id: UUID
+    transaction_ids: list[UUID] | None = None
+    filters: TransactionFilter | None = None
 
+    @model_validator(mode="after")
+    def _one_selection(self) -> "BulkCategoryRequest":
+        if (self.transaction_ids is None) == (self.filters is None):
+            raise ValueError("Provide exactly one of transaction_ids or filters")
+        return self
 
-@router.get("", response_model=CursorPage)
-async def list_transactions(
-    cursor: UUID | None = Query(None),
-    limit: int = Query(50, ge=1, le=100),
+
+def transaction_filters(
     date_from: datetime | None = Query(None),
     date_to: datetime | None = Query(None),
     category_id: UUID | None = Query(None),
@@ -36,14 +61,9 @@ async def list_transactions(
     amount_min: Decimal | None = Query(None),
     amount_max: Decimal | None = Query(None),
     search: str | None = Query(None),
-    db: AsyncSession = Depends(get_db),
-    user: User = Depends(get_current_user),
-):
-    items, next_cursor, has_more = await get_transactions(
-        db,
-        user.id,
-        cursor=cursor,
-        limit=limit,
+) -> TransactionFilter:
+    """Filter query params shared by listing and bulk updates."""
+    return TransactionFilter(
         date_from=date_from,
         date_to=date_to,
         category_id=category_id,
@@ -52,6 +72,28 @@ async def list_transactions(
         amount_max=amount_max,
         search=search,
     )
+
+
+@router.get("", response_model=CursorPage, dependencies=[Depends(data_version_etag)])
+async def list_transactions(
+    cursor: str | None = Query(None),
+    limit: int = Query(50, ge=1, le=100),
+    filters: TransactionFilter = Depends(transaction_filters),
+    db: AsyncSession = Depends(get_db, scope="function"),
+    user: User = Depends(get_current_user),
+):
+    after = None
+    if cursor is not None:
+        after = decode_cursor(cursor)
+        if after is None:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    items, next_cursor, has_more = await get_transactions(
+        db,
+        user.id,
+        cursor=after,
+        limit=limit,
+        **filters.model_dump(),
+    )
     return CursorPage(
         items=[TransactionRead.model_validate(t) for t in items],
         next_cursor=next_cursor,
@@ -59,10 +101,69 @@ async def list_transactions(
     )
 
 
-@router.get("/{transaction_id}", response_model=TransactionRead)
+@router.patch("", status_code=status.HTTP_200_OK)
+async def bulk_update(
+    changes: TransactionBulkUpdate,
+    filters: TransactionFilter = Depends(transaction_filters),
+    db: AsyncSession = Depends(get_db, scope="function"),
+    user: User = Depends(get_current_user),
+):
+    """Apply `changes` to every transaction matching the filter query params."""
+    if not narrows_selection(filters.model_dump()):
+        raise HTTPException(status_code=400, detail="At least one filter is required")
+    count = await bulk_update_transactions(
+        db,
+        user.id,
+        changes.model_dump(exclude_unset=True),
+        filters=filters.model_dump(),
+    )
+    if count is None:
+        raise HTTPException(status_code=404, detail="Category not found")
+    return {"updated": count}
+
+
+@router.get("/export")
+async def export_transactions(
+    format: ExportFormat = Query(ExportFormat.csv),
+    filters: TransactionFilter = Depends(transaction_filters),
+    user: User = Depends(get_current_user),
+):
+    """Stream every transaction matching the filters as CSV, NDJSON or Parquet."""
+    if format == ExportFormat.parquet and not parquet_available():
+        raise HTTPException(status_code=400, detail="Parquet export requires pyarrow")
+    rows = stream_transaction_rows(user.id, filters.model_dump())
+    return StreamingResponse(
+        ENCODERS[format](rows),
+        media_type=MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="transactions.{format.value}"'
+        },
+    )
+
+
+@router.get(
+    "/search",
+    response_model=list[TransactionRead],
+    dependencies=[Depends(data_version_etag)],
+)
+async def search(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db, scope="function"),
+    user: User = Depends(get_current_user),
+):
+    items = await search_transactions(db, user.id, q, limit=limit)
+    return [TransactionRead.model_validate(t) for t in items]
+
+
+@router.get(
+    "/{transaction_id}",
+    response_model=TransactionRead,
+    dependencies=[Depends(data_version_etag)],
+)
 async def get_transaction(
     transaction_id: UUID,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_db, scope="function"),
     user: User = Depends(get_current_user),
 ):
     txn = await get_transaction_by_id(db, transaction_id, user.id)
@@ -75,7 +176,7 @@ async def get_transaction(
 async def patch_transaction(
     transaction_id: UUID,
     update_data: TransactionUpdate,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_db, scope="function"),
     user: User = Depends(get_current_user),
 ):
     txn = await update_transaction(
@@ -92,10 +193,18 @@ async def patch_transaction(
 @router.post("/bulk", status_code=status.HTTP_200_OK)
 async def bulk_assign_category(
     body: BulkCategoryRequest,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_db, scope="function"),
     user: User = Depends(get_current_user),
 ):
+    if body.filters is not None and not narrows_selection(body.filters.model_dump()):
+        raise HTTPException(status_code=400, detail="At least one filter is required")
     count = await bulk_update_category(
-        db, body.transaction_ids, body.category_id, user.id
+        db,
+        body.transaction_ids,
+        body.category_id,
+        user.id,
+        filters=body.filters.model_dump() if body.filters else None,
     )
+    if count is None:
+        raise HTTPException(status_code=404, detail="Category not found")
     return {"updated": count}
@@ -1,7 +1,14 @@
+from app.schemas.analytics import (
+    CategoryBreakdown,
+    DashboardStats,
+    SpendTimeline,
+    TopMerchant,
+)
 from app.schemas.common import CursorPageResponse, ErrorResponse, PaginationParams
 from app.schemas.user import UserCreate, UserRead, UserUpdate
 from app.schemas.transaction import (
     CursorPage,
+    TransactionBulkUpdate,
     TransactionCreate,
     TransactionFilter,
     TransactionRead,
@@ -11,6 +18,10 @@ from app.schemas.category import CategoryCreate, CategoryRead, CategoryUpdate
 from app.schemas.recurring_group import RecurringGroupRead, RecurringGroupUpdate
 
 __all__ = [
+    "CategoryBreakdown",
+    "DashboardStats",
+    "SpendTimeline",
+    "TopMerchant",
     "CursorPageResponse",
     "ErrorResponse",
     "PaginationParams",
@@ -18,6 +29,7 @@ __all__ = [
     "UserRead",
     "UserUpdate",
     "CursorPage",
+    "TransactionBulkUpdate",
     "TransactionCreate",
     "TransactionFilter",
     "TransactionRead",
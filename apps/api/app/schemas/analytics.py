@@ -0,0 +1,41 @@
+from datetime import date
+from uuid import UUID
+
+from pydantic import BaseModel
+
+from app.services.analytics_service import TimelineGranularity
+
+
+class DashboardStats(BaseModel):
+    total_balance: float
+    monthly_income: float
+    monthly_spending: float
+    subscription_total: float
+    transaction_count: int
+
+
+class CategoryBreakdown(BaseModel):
+    category_id: UUID | None = None
+    category_name: str
+    icon: str | None = None
+    colour: str | None = None
+    total: float
+    percentage: float
+    transaction_count: int
+
+
+class TopMerchant(BaseModel):
+    merchant_name: str
+    total: float
+    transaction_count: int
+    category_name: str | None = None
+
+
+class SpendTimeline(BaseModel):
+    """Timeline buckets as parallel arrays: index i of each list is one period."""
+
+    granularity: TimelineGranularity
+    dates: list[date]
+    income: list[float]
+    spending: list[float]
+    net: list[float]
@@ -20,6 +20,8 @@ class RecurringGroupRead(BaseModel):
     category_id: UUID | None = None
     merchant_name: str | None = None
     next_expected_date: date | None = None
+    last_seen_date: date | None = None
+    last_amount: float | None = None
     cancel_url: str | None = None
     cancel_steps: str | None = None
     created_at: datetime
@@ -2,7 +2,7 @@ from datetime import datetime
 from decimal import Decimal
 from uuid import UUID
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, model_validator
 
 
 class TransactionCreate(BaseModel):
@@ -51,6 +51,33 @@ class TransactionUpdate(BaseModel):
     is_recurring: bool | None = None
 
 
+class TransactionBulkUpdate(BaseModel):
+    """Changes applied to every transaction a bulk request selects.
+
+    Only fields that are sent are changed; sending notes or category_id as
+    null clears them. Empty add_tags/remove_tags lists change nothing.
+    """
+
+    category_id: UUID | None = None
+    notes: str | None = None
+    is_recurring: bool | None = None
+    add_tags: list[str] = []
+    remove_tags: list[str] = []
+
+    @model_validator(mode="after")
+    def _has_changes(self) -> "TransactionBulkUpdate":
+        changed = {
+            field
+            for field in self.model_fields_set
+            if field not in ("add_tags", "remove_tags") or getattr(self, field)
+        }
+        if not changed:
+            raise ValueError("No changes given")
+        if "is_recurring" in self.model_fields_set and self.is_recurring is None:
+            raise ValueError("is_recurring cannot be null")
+        return self
+
+
 class TransactionFilter(BaseModel):
     date_from: datetime | None = None
     date_to: datetime | None = None
@@ -63,5 +90,5 @@ class TransactionFilter(BaseModel):
 
 class CursorPage(BaseModel):
     items: list[TransactionRead]
-    next_cursor: UUID | None = None
+    next_cursor: str | None = None
     has_more: bool = False
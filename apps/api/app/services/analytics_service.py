@@ -0,0 +1,405 @@
+"""Dashboard analytics served from the daily_spend rollup.
+
+daily_spend holds one row per (user, day, category, account) with the day's
+outflow, inflow and transaction count. refresh_daily_spend recomputes the
+rows for a set of days from transactions; it runs whenever transactions are
+ingested (the categorisation chunk task) or recategorised, so the dashboard
+reads a bounded number of rollup rows however long a user's history is.
+"""
+
+import enum
+import json
+from collections.abc import Iterable
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+from uuid import UUID
+
+import redis
+from sqlalchemy import (
+    Date,
+    DateTime,
+    any_,
+    bindparam,
+    case,
+    cast,
+    delete,
+    func,
+    literal_column,
+    select,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, aggregate_order_by
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.cache import get_async_redis, get_data_version
+from app.models.account import Account
+from app.models.category import Category
+from app.models.daily_spend import DailySpend
+from app.models.transaction import Transaction
+from app.services.subscription_service import get_monthly_total
+
+# Days of history ranked by get_top_merchants (merchant isn't a rollup key)
+TOP_MERCHANTS_WINDOW_DAYS = 30
+# Cached breakdowns are keyed by data version, so the TTL only bounds how
+# long superseded entries linger
+ANALYTICS_CACHE_TTL_SECONDS = 86400
+
+
+class TimelineGranularity(str, enum.Enum):
+    day = "day"
+    week = "week"
+    month = "month"
+
+
+# Default span of a timeline ending today, per granularity
+TIMELINE_DEFAULT_SPAN = {
+    TimelineGranularity.day: timedelta(days=30),
+    TimelineGranularity.week: timedelta(weeks=12),
+    TimelineGranularity.month: timedelta(days=365),
+}
+# Most buckets one timeline request may span
+MAX_TIMELINE_BUCKETS = 731
+
+
+def _month_start(today: date) -> date:
+    return today.replace(day=1)
+
+
+async def refresh_daily_spend(
+    db: AsyncSession, user_id: UUID, days: Iterable[date]
+) -> None:
+    """Recompute the user's daily_spend rows for `days` from transactions.
+
+    The days' rows are deleted and re-aggregated with one INSERT ... SELECT,
+    so the refresh is idempotent and also picks up rows that moved between
+    categories. The upsert keeps concurrent refreshes of the same day safe.
+    """
+    days = sorted(set(days))
+    if not days:
+        return
+    day_list = bindparam("days", days, ARRAY(Date))
+    day = cast(Transaction.date, Date)
+
+    await db.execute(
+        delete(DailySpend)
+        .where(DailySpend.user_id == user_id, DailySpend.day == any_(day_list))
+        .execution_options(synchronize_session=False)
+    )
+
+    aggregate = (
+        select(
+            Transaction.user_id,
+            day,
+            Transaction.category_id,
+            Transaction.account_id,
+            func.sum(case((Transaction.amount < 0, -Transaction.amount), else_=0)),
+            func.sum(case((Transaction.amount > 0, Transaction.amount), else_=0)),
+            func.count(),
+        )
+        .where(
+            Transaction.user_id == user_id,
+            # Bound the index range scan before matching individual days
+            Transaction.date
+            >= datetime.combine(days[0], time.min, tzinfo=timezone.utc),
+            Transaction.date
+            < datetime.combine(days[-1] + timedelta(days=1), time.min, timezone.utc),
+            day == any_(day_list),
+        )
+        .group_by(
+            Transaction.user_id, day, Transaction.category_id, Transaction.account_id
+        )
+    )
+    insert = pg_insert(DailySpend).from_select(
+        [
+            "user_id",
+            "day",
+            "category_id",
+            "account_id",
+            "outflow",
+            "inflow",
+            "txn_count",
+        ],
+        aggregate,
+    )
+    await db.execute(
+        insert.on_conflict_do_update(
+            index_elements=["user_id", "day", "category_id", "account_id"],
+            set_={
+                "outflow": insert.excluded.outflow,
+                "inflow": insert.excluded.inflow,
+                "txn_count": insert.excluded.txn_count,
+            },
+        )
+    )
+
+
+async def get_dashboard_stats(
+    db: AsyncSession, user_id: UUID, *, today: date | None = None
+) -> dict:
+    """KPI totals: balances, this month's income/spending and subscriptions."""
+    today = today or date.today()
+    total_balance = await db.scalar(
+        select(func.coalesce(func.sum(Account.current_balance), 0)).where(
+            Account.user_id == user_id, Account.is_active.is_(True)
+        )
+    )
+    month = (
+        await db.execute(
+            select(
+                func.coalesce(func.sum(DailySpend.inflow), 0),
+                func.coalesce(func.sum(DailySpend.outflow), 0),
+                func.coalesce(func.sum(DailySpend.txn_count), 0),
+            ).where(
+                DailySpend.user_id == user_id,
+                DailySpend.day >= _month_start(today),
+                DailySpend.day <= today,
+            )
+        )
+    ).one()
+    return {
+        "total_balance": total_balance or Decimal("0"),
+        "monthly_income": month[0],
+        "monthly_spending": month[1],
+        "subscription_total": await get_monthly_total(db, user_id),
+        "transaction_count": month[2],
+    }
+
+
+async def get_category_breakdown(
+    db: AsyncSession,
+    user_id: UUID,
+    *,
+    date_from: date | None = None,
+    date_to: date | None = None,
+) -> list[dict]:
+    """Spending per category between two days (default: this month to date).
+
+    Uncategorised spending is reported with a None category_id. Percentages
+    are of the period's total spending; categories are largest first.
+    """
+    date_to = date_to or date.today()
+    date_from = date_from or _month_start(date_to)
+    total = func.sum(DailySpend.outflow)
+    query = (
+        select(
+            DailySpend.category_id,
+            Category.name,
+            Category.icon,
+            Category.colour,
+            total,
+            func.sum(case((DailySpend.outflow > 0, DailySpend.txn_count), else_=0)),
+        )
+        .outerjoin(Category, DailySpend.category_id == Category.id)
+        .where(
+            DailySpend.user_id == user_id,
+            DailySpend.day >= date_from,
+            DailySpend.day <= date_to,
+        )
+        .group_by(DailySpend.category_id, Category.name, Category.icon, Category.colour)
+        .having(total > 0)
+        .order_by(total.desc())
+    )
+    rows = (await db.execute(query)).all()
+    grand_total = sum((row[4] for row in rows), Decimal("0"))
+    return [
+        {
+            "category_id": category_id,
+            "category_name": name or "Uncategorised",
+            "icon": icon,
+            "colour": colour,
+            "total": spent,
+            "percentage": float(spent / grand_total * 100),
+            "transaction_count": count,
+        }
+        for category_id, name, icon, colour, spent, count in rows
+    ]
+
+
+async def get_top_merchants(
+    db: AsyncSession, user_id: UUID, *, limit: int = 5, today: date | None = None
+) -> list[dict]:
+    """The user's biggest merchants by spending over the recent window.
+
+    Merchants aren't part of the rollup key, so this reads transactions, but
+    only the last TOP_MERCHANTS_WINDOW_DAYS via ix_transactions_user_date_id.
+    """
+    today = today or date.today()
+    since = datetime.combine(
+        today - timedelta(days=TOP_MERCHANTS_WINDOW_DAYS), time.min, timezone.utc
+    )
+    merchant = func.coalesce(Transaction.merchant_name, Transaction.description)
+    total = func.sum(-Transaction.amount)
+    query = (
+        select(
+            merchant,
+            total,
+            func.count(),
+            func.mode().within_group(Category.name),
+        )
+        .outerjoin(Category, Transaction.category_id == Category.id)
+        .where(
+            Transaction.user_id == user_id,
+            Transaction.date >= since,
+            Transaction.amount < 0,
+        )
+        .group_by(merchant)
+        .order_by(total.desc())
+        .limit(limit)
+    )
+    rows = (await db.execute(query)).all()
+    return [
+        {
+            "merchant_name": name,
+            "total": spent,
+            "transaction_count": count,
+            "category_name": category_name,
+        }
+        for name, spent, count, category_name in rows
+    ]
+
+
+async def _cache_key(user_id: UUID, name: str, *window) -> str | None:
+    version = await get_data_version(user_id)
+    if version is None:
+        return None
+    parts = ":".join(str(part) for part in window)
+    return f"analytics:{user_id}:v{version}:{name}:{parts}"
+
+
+def _json_default(value):
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+
+async def _cached(key: str | None, compute) -> list[dict]:
+    """Return the JSON-cached result for key, computing and storing a miss.
+
+    Cached rows come back with JSON types (Decimals and UUIDs as strings).
+    Without a key (no data version) or a reachable Redis, the result is
+    computed uncached.
+    """
+    if key is None:
+        return await compute()
+    client = get_async_redis()
+    try:
+        cached = await client.get(key)
+    except redis.RedisError:
+        return await compute()
+    if cached is not None:
+        return json.loads(cached)
+    rows = await compute()
+    try:
+        await client.set(
+            key,
+            json.dumps(rows, default=_json_default),
+            ex=ANALYTICS_CACHE_TTL_SECONDS,
+        )
+    except redis.RedisError:
+        pass
+    return rows
+
+
+async def cached_category_breakdown(
+    db: AsyncSession,
+    user_id: UUID,
+    *,
+    date_from: date | None = None,
+    date_to: date | None = None,
+) -> list[dict]:
+    """get_category_breakdown cached per (user, window, data version)."""
+    date_to = date_to or date.today()
+    date_from = date_from or _month_start(date_to)
+    return await _cached(
+        await _cache_key(user_id, "categories", date_from, date_to),
+        lambda: get_category_breakdown(
+            db, user_id, date_from=date_from, date_to=date_to
+        ),
+    )
+
+
+async def cached_top_merchants(
+    db: AsyncSession, user_id: UUID, *, limit: int = 5
+) -> list[dict]:
+    """get_top_merchants cached per (user, day, limit, data version)."""
+    today = date.today()
+    return await _cached(
+        await _cache_key(user_id, "top_merchants", today, limit),
+        lambda: get_top_merchants(db, user_id, limit=limit, today=today),
+    )
+
+
+def timeline_bucket_count(
+    granularity: TimelineGranularity, date_from: date, date_to: date
+) -> int:
+    """Number of date_trunc buckets between two days, both included."""
+    if granularity == TimelineGranularity.month:
+        return (
+            (date_to.year - date_from.year) * 12 + date_to.month - date_from.month + 1
+        )
+    if granularity == TimelineGranularity.week:
+        first = date_from - timedelta(days=date_from.weekday())
+        last = date_to - timedelta(days=date_to.weekday())
+        return (last - first).days // 7 + 1
+    return (date_to - date_from).days + 1
+
+
+async def get_spend_timeline(
+    db: AsyncSession,
+    user_id: UUID,
+    granularity: TimelineGranularity,
+    *,
+    date_from: date | None = None,
+    date_to: date | None = None,
+) -> dict:
+    """Income and spending per day, week or month as parallel arrays.
+
+    Buckets are date_trunc periods (weeks start on Monday) from date_from to
+    date_to (default: TIMELINE_DEFAULT_SPAN ending today). Rollup rows are
+    summed per bucket and outer-joined to a generate_series of every bucket
+    so empty periods come back as zeros; array_agg returns the whole series
+    as one row. The (user_id, day) covering index keeps the rollup read
+    index-only.
+    """
+    date_to = date_to or date.today()
+    date_from = date_from or date_to - TIMELINE_DEFAULT_SPAN[granularity]
+    unit = granularity.value
+
+    bucket = func.date_trunc(unit, cast(DailySpend.day, DateTime)).label("bucket")
+    spend = (
+        select(
+            bucket,
+            func.sum(DailySpend.inflow).label("income"),
+            func.sum(DailySpend.outflow).label("spending"),
+        )
+        .where(
+            DailySpend.user_id == user_id,
+            DailySpend.day >= date_from,
+            DailySpend.day <= date_to,
+        )
+        .group_by(bucket)
+        .subquery("spend")
+    )
+    buckets = (
+        func.generate_series(
+            func.date_trunc(unit, datetime.combine(date_from, time.min)),
+            func.date_trunc(unit, datetime.combine(date_to, time.min)),
+            # unit comes from the enum, never from user input
+            literal_column(f"interval '1 {unit}'"),
+        )
+        .table_valued("start")
+        .render_derived(name="buckets")
+    )
+    ordered = buckets.c.start
+    query = select(
+        func.array_agg(aggregate_order_by(cast(buckets.c.start, Date), ordered)),
+        func.array_agg(aggregate_order_by(func.coalesce(spend.c.income, 0), ordered)),
+        func.array_agg(aggregate_order_by(func.coalesce(spend.c.spending, 0), ordered)),
+    ).select_from(buckets.outerjoin(spend, spend.c.bucket == buckets.c.start))
+    dates, income, spending = (await db.execute(query)).one()
+    dates, income, spending = dates or [], income or [], spending or []
+    return {
+        "granularity": granularity,
+        "dates": dates,
+        "income": income,
+        "spending": spending,
+        "net": [i - s for i, s in zip(income, spending)],
+    }
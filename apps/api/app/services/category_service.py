@@ -3,6 +3,7 @@ from uuid import UUID
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.cache import mark_user_data_changed
 from app.models.category import Category
 
 
@@ -17,6 +18,19 @@ async def get_categories(
     return list(result.scalars().all())
 
 
+async def category_visible_to(
+    db: AsyncSession, category_id: UUID, user_id: UUID
+) -> bool:
+    """Whether a category is a system default or belongs to the user."""
+    visible = await db.scalar(
+        select(Category.id).where(
+            Category.id == category_id,
+            (Category.user_id.is_(None)) | (Category.user_id == user_id),
+        )
+    )
+    return visible is not None
+
+
 async def get_category_by_id(db: AsyncSession, category_id: UUID) -> Category | None:
     """Get a single category by ID."""
     return await db.get(Category, category_id)
@@ -43,6 +57,7 @@ async def create_category(
     )
     db.add(category)
     await db.flush()
+    mark_user_data_changed(db, user_id)
     return category
 
 
@@ -63,6 +78,7 @@ async def update_category(
         if value is not None:
             setattr(category, key, value)
     await db.flush()
+    mark_user_data_changed(db, user_id)
     return category
 
 
@@ -77,4 +93,5 @@ async def delete_category(db: AsyncSession, category_id: UUID, user_id: UUID) ->
         return False
     await db.delete(category)
     await db.flush()
+    mark_user_data_changed(db, user_id)
     return True
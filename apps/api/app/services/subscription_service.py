@@ -1,10 +1,19 @@
 from decimal import Decimal
 from uuid import UUID
 
-from sqlalchemy import select
+from sqlalchemy import Date, cast, column, func, select, true, update, values
+from sqlalchemy.dialects.postgresql import ARRAY, aggregate_order_by
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.ai.date_prediction import predict_next_dates
+from app.ai.subscription_detector import RECENT_WINDOW
+from app.cache import mark_user_data_changed
 from app.models.recurring_group import Frequency, RecurringGroup, RecurringStatus
+from app.models.transaction import Transaction
+
+# Active groups re-predicted per batch in refresh_next_expected_dates
+REFRESH_BATCH_SIZE = 5000
 
 
 async def get_subscriptions(db: AsyncSession, user_id: UUID) -> list[RecurringGroup]:
@@ -41,6 +50,7 @@ async def update_subscription(
         if value is not None:
             setattr(sub, key, value)
     await db.flush()
+    mark_user_data_changed(db, user_id)
     return sub
 
 
@@ -53,6 +63,7 @@ async def dismiss_subscription(
         return None
     sub.status = RecurringStatus.cancelled
     await db.flush()
+    mark_user_data_changed(db, user_id)
     return sub
 
 
@@ -85,3 +96,77 @@ async def get_monthly_total(db: AsyncSession, user_id: UUID) -> Decimal:
             total += amount / 12
 
     return total.quantize(Decimal("0.01"))
+
+
+async def refresh_next_expected_dates(
+    db: AsyncSession, batch_size: int = REFRESH_BATCH_SIZE
+) -> int:
+    """Re-predict next_expected_date for every active group, across all users.
+
+    Walks active groups in id order (keyset pagination), loading each group's
+    most recent linked charge dates. Each batch is predicted in one vectorised
+    pass and written back with a single UPDATE that skips unchanged rows; the
+    owners of changed groups have their data version bumped. Returns the
+    number of groups whose date changed.
+    """
+    # Each group's newest linked charges, read off ix_transactions_recurring_group_date
+    recent = (
+        select(cast(Transaction.date, Date).label("day"))
+        .where(Transaction.recurring_group_id == RecurringGroup.id)
+        .order_by(Transaction.date.desc())
+        .limit(RECENT_WINDOW)
+        .lateral("recent")
+    )
+    updated = 0
+    last_id = None
+    while True:
+        query = (
+            select(
+                RecurringGroup.id,
+                RecurringGroup.frequency,
+                func.array_agg(
+                    aggregate_order_by(recent.c.day, recent.c.day.desc()),
+                    type_=ARRAY(Date),
+                ).label("recent_dates"),
+            )
+            .join(recent, true())
+            .where(RecurringGroup.status == RecurringStatus.active)
+            .group_by(RecurringGroup.id)
+            .order_by(RecurringGroup.id)
+            .limit(batch_size)
+        )
+        if last_id is not None:
+            query = query.where(RecurringGroup.id > last_id)
+        rows = (await db.execute(query)).all()
+        if not rows:
+            break
+
+        next_dates = predict_next_dates(
+            [row.recent_dates for row in rows], [row.frequency for row in rows]
+        )
+        predicted = values(
+            column("id", PG_UUID(as_uuid=True)),
+            column("next_date", Date),
+            name="predicted",
+        ).data([(row.id, next_date) for row, next_date in zip(rows, next_dates)])
+        result = await db.execute(
+            update(RecurringGroup)
+            .where(
+                RecurringGroup.id == predicted.c.id,
+                RecurringGroup.next_expected_date.is_distinct_from(
+                    predicted.c.next_date
+                ),
+            )
+            .values(next_expected_date=predicted.c.next_date)
+            .returning(RecurringGroup.user_id)
+            .execution_options(synchronize_session=False)
+        )
+        changed = result.scalars().all()
+        if changed:
+            mark_user_data_changed(db, *changed)
+        updated += len(changed)
+
+        last_id = rows[-1].id
+        if len(rows) < batch_size:
+            break
+    return updated
@@ -1,17 +1,108 @@
+import base64
+import binascii
+import hashlib
+import hmac
+import re
+from datetime import datetime
 from uuid import UUID
 
-from sqlalchemy import or_, select
+from sqlalchemy import (
+    ColumnElement,
+    Date,
+    Float,
+    String,
+    any_,
+    bindparam,
+    cast,
+    column,
+    false,
+    func,
+    select,
+    tuple_,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, TSQUERY
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.cache import mark_user_data_changed
+from app.config import settings
 from app.models.transaction import Transaction
+from app.services.analytics_service import refresh_daily_spend
+from app.services.category_service import category_visible_to
 
+# Bytes of the HMAC-SHA256 digest kept in a cursor token
+CURSOR_SIGNATURE_BYTES = 16
+# Text search configuration of transactions.search_vector; "simple" keeps
+# merchant names unstemmed
+SEARCH_CONFIG = "simple"
 
-async def get_transactions(
-    db: AsyncSession,
+# Ranked search scores at most this many of the newest matches, keeping
+# common terms as cheap as rare ones
+SEARCH_RANK_CANDIDATES = 500
+
+_SEARCH_WORD = re.compile(r"\w+")
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _cursor_signature(payload: bytes) -> bytes:
+    return hmac.new(settings.jwt_secret.encode(), payload, hashlib.sha256).digest()[
+        :CURSOR_SIGNATURE_BYTES
+    ]
+
+
+def encode_cursor(date: datetime, transaction_id: UUID) -> str:
+    """Encode the (date, id) position of a page's last row as a signed token."""
+    payload = f"{date.isoformat()}|{transaction_id}".encode()
+    return f"{_b64encode(payload)}.{_b64encode(_cursor_signature(payload))}"
+
+
+def decode_cursor(token: str) -> tuple[datetime, UUID] | None:
+    """Decode a cursor token to (date, id), or None if invalid or tampered with."""
+    try:
+        encoded_payload, encoded_signature = token.split(".")
+        payload = _b64decode(encoded_payload)
+        signature = _b64decode(encoded_signature)
+        if not hmac.compare_digest(signature, _cursor_signature(payload)):
+            return None
+        date, transaction_id = payload.decode().split("|")
+        return datetime.fromisoformat(date), UUID(transaction_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+
+
+def search_query(term: str) -> ColumnElement | None:
+    """tsquery matching every token of `term` as a prefix ("netf" finds Netflix).
+
+    The term is tokenised by Postgres with the parser that builds
+    search_vector, so "netflix.com" stays one host token as it was indexed,
+    and each lexeme is quoted into a prefix term, so user input can't inject
+    tsquery operators. Returns None when the term has no word characters.
+    """
+    if not _SEARCH_WORD.search(term):
+        return None
+    lexeme = func.unnest(
+        func.tsvector_to_array(func.to_tsvector(SEARCH_CONFIG, term))
+    ).column_valued("lexeme")
+    prefixes = select(func.string_agg(func.quote_literal(lexeme).concat(":*"), " & "))
+    return cast(prefixes.scalar_subquery(), TSQUERY)
+
+
+def _matches(query: ColumnElement) -> ColumnElement[bool]:
+    return Transaction.search_vector.bool_op("@@")(query)
+
+
+def filter_criteria(
     user_id: UUID,
     *,
-    cursor: UUID | None = None,
-    limit: int = 50,
     date_from=None,
     date_to=None,
     category_id: UUID | None = None,
@@ -19,54 +110,67 @@ async def get_transactions(
     amount_min=None,
     amount_max=None,
     search: str | None = None,
-) -> tuple[list[Transaction], UUID | None, bool]:
-    """Get transactions with cursor-based pagination and filters.
+) -> list[ColumnElement[bool]]:
+    """WHERE criteria selecting a user's transactions that match the filters.
 
-    Returns (items, next_cursor, has_more).
+    A search with no word characters ("!!!") matches nothing rather than
+    being dropped, so it can never widen a selection to every row.
     """
-    from app.models.account import Account
+    criteria = [Transaction.user_id == user_id]
+    if date_from is not None:
+        criteria.append(Transaction.date >= date_from)
+    if date_to is not None:
+        criteria.append(Transaction.date <= date_to)
+    if category_id is not None:
+        criteria.append(Transaction.category_id == category_id)
+    if account_id is not None:
+        criteria.append(Transaction.account_id == account_id)
+    if amount_min is not None:
+        criteria.append(Transaction.amount >= amount_min)
+    if amount_max is not None:
+        criteria.append(Transaction.amount <= amount_max)
+    if search:
+        tsquery = search_query(search)
+        criteria.append(false() if tsquery is None else _matches(tsquery))
+    return criteria
+
+
+def narrows_selection(filters: dict) -> bool:
+    """Whether `filters` add any criterion beyond the user's own rows.
+
+    Filter-based bulk writes require this, so an empty or all-null filter
+    set can't rewrite a user's whole history.
+    """
+    return len(filter_criteria(None, **filters)) > 1
+
 
-    # Base query: join accounts to filter by user
+async def get_transactions(
+    db: AsyncSession,
+    user_id: UUID,
+    *,
+    cursor: tuple[datetime, UUID] | None = None,
+    limit: int = 50,
+    **filters,
+) -> tuple[list[Transaction], str | None, bool]:
+    """Get transactions with keyset pagination and filters.
+
+    `filters` are the keyword filters of filter_criteria (date range,
+    category, account, amount range, search). `cursor` is the decoded
+    (date, id) of the previous page's last row; rows strictly after it in
+    (date DESC, id DESC) order are returned, so no lookup of the cursor row
+    is needed. Returns (items, next_cursor, has_more), next_cursor being an
+    encode_cursor token.
+    """
+    # Served by ix_transactions_user_date_id without joining accounts
     query = (
         select(Transaction)
-        .join(Account, Transaction.account_id == Account.id)
-        .where(Account.user_id == user_id)
+        .where(*filter_criteria(user_id, **filters))
         .order_by(Transaction.date.desc(), Transaction.id.desc())
     )
 
     # Cursor pagination
     if cursor is not None:
-        cursor_txn = await db.get(Transaction, cursor)
-        if cursor_txn:
-            query = query.where(
-                (Transaction.date < cursor_txn.date)
-                | (
-                    (Transaction.date == cursor_txn.date)
-                    & (Transaction.id < cursor_txn.id)
-                )
-            )
-
-    # Filters
-    if date_from is not None:
-        query = query.where(Transaction.date >= date_from)
-    if date_to is not None:
-        query = query.where(Transaction.date <= date_to)
-    if category_id is not None:
-        query = query.where(Transaction.category_id == category_id)
-    if account_id is not None:
-        query = query.where(Transaction.account_id == account_id)
-    if amount_min is not None:
-        query = query.where(Transaction.amount >= amount_min)
-    if amount_max is not None:
-        query = query.where(Transaction.amount <= amount_max)
-    if search:
-        search_term = f"%{search}%"
-        query = query.where(
-            or_(
-                Transaction.description.ilike(search_term),
-                Transaction.merchant_name.ilike(search_term),
-            )
-        )
+        query = query.where(tuple_(Transaction.date, Transaction.id) < tuple_(*cursor))
 
     # Fetch limit + 1 to determine has_more
     query = query.limit(limit + 1)
@@ -77,21 +181,48 @@ async def get_transactions(
     if has_more:
         items = items[:limit]
 
-    next_cursor = items[-1].id if has_more and items else None
+    next_cursor = (
+        encode_cursor(items[-1].date, items[-1].id) if has_more and items else None
+    )
 
     return items, next_cursor, has_more
 
 
+async def search_transactions(
+    db: AsyncSession, user_id: UUID, term: str, *, limit: int = 20
+) -> list[Transaction]:
+    """Best matches for a search term, ranked by relevance then recency.
+
+    Words are prefix-matched against the merchant name and description via
+    ix_transactions_user_search; the newest SEARCH_RANK_CANDIDATES matches
+    are ranked with ts_rank.
+    """
+    tsquery = search_query(term)
+    if tsquery is None:
+        return []
+    candidates = (
+        select(Transaction.id)
+        .where(Transaction.user_id == user_id, _matches(tsquery))
+        .order_by(Transaction.date.desc(), Transaction.id.desc())
+        .limit(SEARCH_RANK_CANDIDATES)
+        .subquery()
+    )
+    rank = func.ts_rank(Transaction.search_vector, tsquery)
+    result = await db.execute(
+        select(Transaction)
+        .join(candidates, Transaction.id == candidates.c.id)
+        .order_by(rank.desc(), Transaction.date.desc(), Transaction.id.desc())
+        .limit(limit)
+    )
+    return list(result.scalars().all())
+
+
 async def get_transaction_by_id(
     db: AsyncSession, transaction_id: UUID, user_id: UUID
 ) -> Transaction | None:
     """Get a single transaction by ID, scoped to user."""
-    from app.models.account import Account
-
-    query = (
-        select(Transaction)
-        .join(Account, Transaction.account_id == Account.id)
-        .where(Transaction.id == transaction_id, Account.user_id == user_id)
+    query = select(Transaction).where(
+        Transaction.id == transaction_id, Transaction.user_id == user_id
     )
     result = await db.execute(query)
     return result.scalar_one_or_none()
@@ -104,22 +235,152 @@ async def update_transaction(
     txn = await get_transaction_by_id(db, transaction_id, user_id)
     if txn is None:
         return None
+    recategorised = kwargs.get("category_id") not in (None, txn.category_id)
+    changed = False
     for key, value in kwargs.items():
         if value is not None:
             setattr(txn, key, value)
+            changed = True
     await db.flush()
+    if recategorised:
+        await refresh_daily_spend(db, user_id, [txn.date.date()])
+    if changed:
+        mark_user_data_changed(db, user_id)
     return txn
 
 
+async def bulk_update_transactions(
+    db: AsyncSession,
+    user_id: UUID,
+    changes: dict,
+    *,
+    transaction_ids: list[UUID] | None = None,
+    filters: dict | None = None,
+) -> int | None:
+    """Apply the same changes to many of a user's transactions in one UPDATE.
+
+    Rows are selected by explicit `transaction_ids` or, when that is None,
+    by `filters` (the keyword filters of get_transactions, e.g. every row
+    matching search="deliveroo" in a date range). `changes` may set
+    category_id, notes and is_recurring (clearing is_recurring also unlinks
+    the recurring group) and add or remove tags via add_tags/remove_tags.
+    A category change refreshes the daily_spend rows of the affected days.
+    Returns the number of rows updated, or None if a category_id being set
+    isn't visible to the user.
+    """
+    category_id = changes.get("category_id")
+    if category_id is not None and not await category_visible_to(
+        db, category_id, user_id
+    ):
+        return None
+
+    criteria = filter_criteria(user_id, **(filters or {}))
+    if transaction_ids is not None:
+        if not transaction_ids:
+            return 0
+        criteria.append(
+            Transaction.id
+            == any_(bindparam("ids", transaction_ids, ARRAY(PG_UUID(as_uuid=True))))
+        )
+
+    assignments = {
+        key: changes[key]
+        for key in ("category_id", "notes", "is_recurring")
+        if key in changes
+    }
+    if changes.get("is_recurring") is False:
+        assignments["recurring_group_id"] = None
+    add_tags = list(dict.fromkeys(changes.get("add_tags") or []))
+    remove_tags = changes.get("remove_tags") or []
+    if add_tags or remove_tags:
+        # Dropping tags about to be added first keeps the array duplicate-free
+        tags = Transaction.tags
+        for tag in [*remove_tags, *add_tags]:
+            tags = func.array_remove(tags, tag, type_=Transaction.tags.type)
+        if add_tags:
+            tags = func.array_cat(
+                tags, cast(add_tags, Transaction.tags.type), type_=Transaction.tags.type
+            )
+        assignments["tags"] = tags
+    if not assignments:
+        return 0
+
+    result = await db.execute(
+        update(Transaction)
+        .where(*criteria)
+        .values(**assignments)
+        .returning(Transaction.id, cast(Transaction.date, Date))
+        .execution_options(synchronize_session=False)
+    )
+    rows = result.all()
+    if "category_id" in assignments:
+        await refresh_daily_spend(db, user_id, [day for _, day in rows])
+    if rows:
+        mark_user_data_changed(db, user_id)
+    return len(rows)
+
+
 async def bulk_update_category(
-    db: AsyncSession, transaction_ids: list[UUID], category_id: UUID, user_id: UUID
-) -> int:
-    """Bulk update category for multiple transactions. Returns count updated."""
-    count = 0
-    for txn_id in transaction_ids:
-        txn = await get_transaction_by_id(db, txn_id, user_id)
-        if txn is not None:
-            txn.category_id = category_id
-            count += 1
-    await db.flush()
-    return count
+    db: AsyncSession,
+    transaction_ids: list[UUID] | None,
+    category_id: UUID,
+    user_id: UUID,
+    *,
+    filters: dict | None = None,
+) -> int | None:
+    """Set the category of many of a user's transactions in one UPDATE.
+
+    See bulk_update_transactions for row selection. Returns the number of
+    rows updated, or None if the category isn't visible to the user.
+    """
+    return await bulk_update_transactions(
+        db,
+        user_id,
+        {"category_id": category_id},
+        transaction_ids=transaction_ids,
+        filters=filters,
+    )
+
+
+async def bulk_apply_categorisation(db: AsyncSession, updates: list[dict]) -> int:
+    """Write AI categorisation results back in one UPDATE ... FROM (VALUES ...).
+
+    Each update is a dict of {id, category_id, ai_confidence, merchant_name};
+    None values leave the existing column untouched. Returns rows updated.
+    """
+    if not updates:
+        return 0
+
+    results = values(
+        column("id", PG_UUID(as_uuid=True)),
+        column("category_id", PG_UUID(as_uuid=True)),
+        column("ai_confidence", Float),
+        column("merchant_name", String),
+        name="results",
+    ).data(
+        [
+            (u["id"], u["category_id"], u["ai_confidence"], u["merchant_name"])
+            for u in updates
+        ]
+    )
+
+    # Casts keep all-NULL VALUES columns from being typed as text
+    stmt = (
+        update(Transaction)
+        .where(Transaction.id == results.c.id)
+        .values(
+            category_id=func.coalesce(
+                cast(results.c.category_id, PG_UUID(as_uuid=True)),
+                Transaction.category_id,
+            ),
+            ai_confidence=func.coalesce(
+                cast(results.c.ai_confidence, Float), Transaction.ai_confidence
+            ),
+            merchant_name=func.coalesce(
+                cast(results.c.merchant_name, String), Transaction.merchant_name
+            ),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    result = await db.execute(stmt)
+    return result.rowcount
@@ -1,68 +1,181 @@
-import asyncio
 import logging
+import time
+from uuid import UUID
+
+from celery import chord, group
 
 from app.tasks.celery_app import celery_app
+from app.tasks.runtime import get_session_factory, run_async
 
 logger = logging.getLogger(__name__)
 
+# Transactions per chunk task; each chunk is categorised and committed on its own
+CHUNK_SIZE = 500
+# Imports up to this size go to the interactive queue, larger ones to bulk
+INTERACTIVE_MAX_TRANSACTIONS = 200
+
+# Per-user category name -> id lookup: {user_id: (loaded_at, {name: id})}
+CATEGORY_CACHE_TTL = 300  # seconds
+_category_cache: dict[UUID, tuple[float, dict[str, UUID]]] = {}
 
-@celery_app.task(bind=True, max_retries=3, default_retry_delay=60)
-def categorise_transactions_task(self, user_id: str, transaction_ids: list[str]):
-    """Celery task to categorise transactions via AI."""
-    asyncio.run(_run_categorisation(user_id, transaction_ids))
 
+def _chunked(transaction_ids: list[str], size: int) -> list[list[str]]:
+    """Split ids into consecutive slices of at most `size`, dropping duplicates."""
+    unique_ids = list(dict.fromkeys(transaction_ids))
+    return [unique_ids[i : i + size] for i in range(0, len(unique_ids), size)]
 
-async def _run_categorisation(user_id: str, transaction_ids: list[str]):
-    from uuid import UUID
 
-    from sqlalchemy import select
-    from sqlalchemy.ext.asyncio import (
-        AsyncSession,
-        async_sessionmaker,
-        create_async_engine,
+@celery_app.task(bind=True)
+def categorise_transactions_task(self, user_id: str, transaction_ids: list[str]):
+    """Celery task to categorise transactions via AI.
+
+    Fans the ids out as a chord of CHUNK_SIZE chunk tasks that run in parallel,
+    with categorisation_complete_task as the aggregate callback. Small imports
+    go to the interactive queue so they don't wait behind bulk backfills.
+    """
+    chunks = _chunked(transaction_ids, CHUNK_SIZE)
+    if not chunks:
+        return None
+
+    queue = (
+        "interactive"
+        if len(transaction_ids) <= INTERACTIVE_MAX_TRANSACTIONS
+        else "bulk"
+    )
+    header = group(
+        categorise_chunk_task.s(user_id, chunk).set(queue=queue) for chunk in chunks
     )
+    result = chord(header)(categorisation_complete_task.s(user_id).set(queue=queue))
+    logger.info(
+        f"Dispatched {len(chunks)} categorisation chunks "
+        f"({len(transaction_ids)} transactions) to {queue} for user {user_id}"
+    )
+    return result.id
+
+
+@celery_app.task(
+    bind=True,
+    autoretry_for=(Exception,),
+    max_retries=3,
+    default_retry_delay=60,
+    retry_backoff=True,
+)
+def categorise_chunk_task(self, user_id: str, transaction_ids: list[str]) -> int:
+    """Categorise one slice of transactions.
+
+    The slice's days are rolled into daily_spend and committed before the AI
+    call. Results are written back with a single UPDATE keyed by id and
+    committed once, so a retry simply redoes this slice.
+    """
+    return run_async(_run_categorisation(user_id, transaction_ids))
+
+
+@celery_app.task(bind=True)
+def categorisation_complete_task(self, chunk_counts: list[int], user_id: str) -> int:
+    """Chord callback: runs once every chunk for an import has finished.
+
+    Schedules a (debounced) subscription detection run for the user.
+    """
+    from app.tasks.detect_subscriptions_task import schedule_subscription_detection
+
+    total = sum(chunk_counts)
+    logger.info(
+        f"Categorisation complete for user {user_id}: {total} transactions "
+        f"updated across {len(chunk_counts)} chunks"
+    )
+    schedule_subscription_detection(user_id)
+    return total
+
+
+async def _get_category_lookup(db, user_id: UUID) -> dict[str, UUID]:
+    """Return lowercase category name -> id for the categories visible to a user.
+
+    System defaults are loaded first so a user's own category wins on a name
+    clash. Cached per user for CATEGORY_CACHE_TTL seconds.
+    """
+    from app.services.category_service import get_categories
+
+    cached = _category_cache.get(user_id)
+    if cached is not None and time.monotonic() - cached[0] < CATEGORY_CACHE_TTL:
+        return cached[1]
+
+    categories = await get_categories(db, user_id)
+    lookup = {
+        cat.name.lower(): cat.id
+        for cat in sorted(categories, key=lambda c: c.user_id is not None)
+    }
+    _category_cache[user_id] = (time.monotonic(), lookup)
+    return lookup
+
+
+def _build_updates(
+    categorised: list[dict],
+    transaction_ids: set[UUID],
+    categories: dict[str, UUID],
+) -> list[dict]:
+    """Map categoriser output onto update rows for bulk_apply_categorisation."""
+    updates = []
+    for item in categorised:
+        if item["transaction_id"] not in transaction_ids:
+            continue
+        cat_id = categories.get(item["category_name"].lower())
+        merchant_name = item.get("merchant_name") or None
+        if cat_id is None and merchant_name is None:
+            continue
+        updates.append(
+            {
+                "id": item["transaction_id"],
+                "category_id": cat_id,
+                "ai_confidence": item["confidence"] if cat_id else None,
+                "merchant_name": merchant_name,
+            }
+        )
+    return updates
+
 
+def clear_category_cache():
+    """Clear the per-user category cache (for testing)."""
+    _category_cache.clear()
+
+
+async def _run_categorisation(user_id: str, transaction_ids: list[str]) -> int:
+    from app.ai.base import load_transaction_records
     from app.ai.categoriser import categorise_transactions
-    from app.config import settings
-    from app.models.category import Category
+    from app.ai.recurring_monitor import process_new_transactions
+    from app.cache import mark_user_data_changed
     from app.models.transaction import Transaction
+    from app.services.analytics_service import refresh_daily_spend
+    from app.services.transaction_service import bulk_apply_categorisation
 
-    engine = create_async_engine(settings.database_url)
-    session_factory = async_sessionmaker(
-        engine, class_=AsyncSession, expire_on_commit=False
-    )
-
-    async with session_factory() as db:
+    async with get_session_factory()() as db:
         uid = UUID(user_id)
         txn_uuids = [UUID(tid) for tid in transaction_ids]
 
-        result = await db.execute(
-            select(Transaction).where(Transaction.id.in_(txn_uuids))
-        )
-        transactions = list(result.scalars().all())
+        transactions = await load_transaction_records(db, Transaction.id.in_(txn_uuids))
+        days = {t.date.date() for t in transactions}
+
+        # Roll the new rows into daily_spend before the AI call, so a failed
+        # or retried categorisation never leaves them off the dashboard
+        await refresh_daily_spend(db, uid, days)
+        mark_user_data_changed(db, uid)
+        await db.commit()
 
         categorised = await categorise_transactions(db, transactions, uid)
 
         # Apply results
-        categories = {}
-        cat_result = await db.execute(select(Category))
-        for cat in cat_result.scalars().all():
-            categories[cat.name.lower()] = cat.id
-
-        for item in categorised:
-            txn = next(
-                (t for t in transactions if t.id == item["transaction_id"]), None
-            )
-            if txn is None:
-                continue
-            cat_id = categories.get(item["category_name"].lower())
-            if cat_id:
-                txn.category_id = cat_id
-                txn.ai_confidence = item["confidence"]
-            if item.get("merchant_name"):
-                txn.merchant_name = item["merchant_name"]
+        categories = await _get_category_lookup(db, uid)
+        updates = _build_updates(categorised, {t.id for t in transactions}, categories)
+        updated = await bulk_apply_categorisation(db, updates)
+
+        # Match the new charges to existing subscriptions (price changes etc.)
+        await process_new_transactions(db, uid, [t.id for t in transactions])
+
+        # Re-roll the slice's days under their new categories
+        if updated:
+            await refresh_daily_spend(db, uid, days)
+        mark_user_data_changed(db, uid)
 
         await db.commit()
 
-    await engine.dispose()
     logger.info(f"Categorised {len(categorised)} transactions for user {user_id}")
+    return updated
@@ -1,11 +1,34 @@
 from celery import Celery
+from celery.schedules import crontab
+from kombu import Queue
 
 from app.config import settings
 
+# Worker settings per queue. Run one worker per queue with WORKER_QUEUE set
+# (and -Q <queue>) so each pool is sized for its own workload.
+QUEUE_PROFILES: dict[str, dict[str, int | str]] = {
+    # Small uploads: latency-sensitive, short tasks
+    "interactive": {"pool": "prefork", "concurrency": 4, "prefetch_multiplier": 1},
+    # Large imports and backfills: long tasks, never hoard messages
+    "bulk": {"pool": "prefork", "concurrency": 2, "prefetch_multiplier": 1},
+    # Subscription detection: short DB-bound tasks
+    "detection": {"pool": "prefork", "concurrency": 2, "prefetch_multiplier": 4},
+    # Nightly/periodic jobs. Solo pool: the fleet detection job starts its own
+    # process pool, which daemonic prefork children are not allowed to do
+    "maintenance": {"pool": "solo", "concurrency": 1, "prefetch_multiplier": 1},
+}
+
 celery_app = Celery(
     "vault",
     broker=settings.redis_url,
     backend=settings.redis_url,
+    include=[
+        "app.tasks.categorise_task",
+        "app.tasks.detect_subscriptions_task",
+        "app.tasks.refresh_predictions_task",
+        "app.tasks.fleet_detection_task",
+        "app.tasks.recurring_alerts_task",
+    ],
 )
 
 celery_app.conf.update(
@@ -15,11 +38,46 @@ celery_app.conf.update(
     timezone="UTC",
     task_track_started=True,
     task_acks_late=True,
+    worker_concurrency=2,
     worker_prefetch_multiplier=1,
     task_default_retry_delay=60,
     task_max_retries=3,
+    task_queues=[Queue(name) for name in QUEUE_PROFILES],
+    task_default_queue="interactive",
+    task_routes={
+        # Categorisation chunks are routed per dispatch (interactive vs bulk)
+        "app.tasks.categorise_task.*": {"queue": "interactive"},
+        "app.tasks.detect_subscriptions_task.*": {"queue": "detection"},
+        "app.tasks.refresh_predictions_task.*": {"queue": "maintenance"},
+        "app.tasks.fleet_detection_task.*": {"queue": "maintenance"},
+        "app.tasks.recurring_alerts_task.*": {"queue": "maintenance"},
+        "app.tasks.celery_app.health_check_task": {"queue": "maintenance"},
+    },
+    # Run with `celery -A app.tasks.celery_app beat`
+    beat_schedule={
+        "detect-subscriptions-fleet": {
+            "task": "app.tasks.fleet_detection_task.detect_subscriptions_fleet_task",
+            "schedule": crontab(hour=1, minute=0),
+        },
+        "refresh-next-expected-dates": {
+            "task": "app.tasks.refresh_predictions_task.refresh_next_expected_dates_task",
+            "schedule": crontab(hour=2, minute=30),
+        },
+        "sweep-missed-payments": {
+            "task": "app.tasks.recurring_alerts_task.sweep_missed_payments_task",
+            "schedule": crontab(hour=3, minute=0),
+        },
+    },
 )
 
+if settings.worker_queue in QUEUE_PROFILES:
+    _profile = QUEUE_PROFILES[settings.worker_queue]
+    celery_app.conf.update(
+        worker_pool=_profile["pool"],
+        worker_concurrency=_profile["concurrency"],
+        worker_prefetch_multiplier=_profile["prefetch_multiplier"],
+    )
+
 
 @celery_app.task(bind=True)
 def health_check_task(self):
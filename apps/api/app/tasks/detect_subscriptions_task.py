@@ -1,53 +1,100 @@
-import asyncio
 import logging
+from uuid import uuid4
 
+from celery.exceptions import MaxRetriesExceededError
+
+from app.cache import get_redis, mark_user_data_changed
 from app.tasks.celery_app import celery_app
+from app.tasks.runtime import get_session_factory, run_async
 
 logger = logging.getLogger(__name__)
 
+# Triggers within this window collapse into a single delayed run
+DETECTION_DEBOUNCE_SECONDS = 300
+# Upper bound on a single run; the per-user lock expires after this
+DETECTION_LOCK_TTL_SECONDS = 900
+# Retries while another run holds the lock; together they wait out its TTL
+DETECTION_LOCK_RETRIES = DETECTION_LOCK_TTL_SECONDS // DETECTION_DEBOUNCE_SECONDS + 1
 
-@celery_app.task(bind=True, max_retries=3, default_retry_delay=60)
-def detect_subscriptions_task(self, user_id: str):
-    """Celery task to detect recurring subscriptions from transaction history."""
-    asyncio.run(_run_detection(user_id))
+# Delete the lock only if we still own it
+_RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
 
 
-async def _run_detection(user_id: str):
-    from uuid import UUID
+def _pending_key(user_id: str) -> str:
+    return f"detect_subscriptions:pending:{user_id}"
 
-    from sqlalchemy import select
-    from sqlalchemy.ext.asyncio import (
-        AsyncSession,
-        async_sessionmaker,
-        create_async_engine,
-    )
 
-    from app.ai.subscription_detector import detect_subscriptions
-    from app.config import settings
-    from app.models.account import Account
-    from app.models.transaction import Transaction
+def _lock_key(user_id: str) -> str:
+    return f"detect_subscriptions:running:{user_id}"
+
+
+def schedule_subscription_detection(user_id: str) -> bool:
+    """Request a detection run for a user, coalescing bursts of triggers.
+
+    The first trigger enqueues a run delayed by the debounce window; further
+    triggers before that run starts are no-ops. Returns True if a run was
+    enqueued.
+    """
+    pending = get_redis().set(
+        _pending_key(user_id),
+        "1",
+        nx=True,
+        ex=DETECTION_DEBOUNCE_SECONDS + DETECTION_LOCK_TTL_SECONDS,
+    )
+    if not pending:
+        return False
 
-    engine = create_async_engine(settings.database_url)
-    session_factory = async_sessionmaker(
-        engine, class_=AsyncSession, expire_on_commit=False
+    detect_subscriptions_task.apply_async(
+        args=[user_id], countdown=DETECTION_DEBOUNCE_SECONDS
     )
+    return True
 
-    async with session_factory() as db:
-        uid = UUID(user_id)
 
-        # Get all transactions for the user
-        result = await db.execute(
-            select(Transaction)
-            .join(Account, Transaction.account_id == Account.id)
-            .where(Account.user_id == uid)
-            .order_by(Transaction.date.desc())
-        )
-        transactions = list(result.scalars().all())
+@celery_app.task(bind=True, max_retries=DETECTION_LOCK_RETRIES)
+def detect_subscriptions_task(self, user_id: str):
+    """Celery task to detect recurring subscriptions from new transactions.
+
+    Holds a per-user lock for the duration of the run; if another run is in
+    progress this one is retried after the debounce window instead, for
+    longer than the lock can be held. If it still can't run it gives up and
+    clears the pending trigger, so the next trigger schedules a fresh run.
+    """
+    redis = get_redis()
+    token = self.request.id or uuid4().hex
+    if not redis.set(_lock_key(user_id), token, nx=True, ex=DETECTION_LOCK_TTL_SECONDS):
+        try:
+            raise self.retry(countdown=DETECTION_DEBOUNCE_SECONDS)
+        except MaxRetriesExceededError:
+            redis.delete(_pending_key(user_id))
+            logger.warning(
+                f"Subscription detection for user {user_id} gave up waiting "
+                "for the running detection"
+            )
+            return
+
+    try:
+        # Triggers from here on need a fresh run: this one may miss their rows
+        redis.delete(_pending_key(user_id))
+        run_async(_run_detection(user_id))
+    finally:
+        redis.eval(_RELEASE_LOCK_SCRIPT, 1, _lock_key(user_id), token)
+
+
+async def _run_detection(user_id: str):
+    from uuid import UUID
+
+    from app.ai.subscription_detector import detect_subscriptions_incremental
 
-        groups = await detect_subscriptions(db, uid, transactions)
+    async with get_session_factory()() as db:
+        groups = await detect_subscriptions_incremental(db, UUID(user_id))
+        mark_user_data_changed(db, UUID(user_id))
         await db.commit()
 
-    await engine.dispose()
     logger.info(
         f"Subscription detection complete: {len(groups)} groups found for user {user_id}"
     )
@@ -0,0 +1,47 @@
+import logging
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+from app.config import settings
+from app.tasks.celery_app import celery_app
+from app.tasks.runtime import get_session_factory, run_async
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(bind=True)
+def detect_subscriptions_fleet_task(self) -> int:
+    """Nightly job: run subscription detection for every user in one pass.
+
+    Replaces enqueueing one detect_subscriptions_task per user. Pages of users
+    are evaluated across a pool of `fleet_detection_processes` processes
+    while this task keeps the single database session. Runs on the
+    maintenance queue, whose worker uses the solo pool
+    (scripts/start_worker.sh runs one by default).
+    """
+    return run_async(_run_fleet_detection())
+
+
+async def _run_fleet_detection() -> int:
+    from app.ai.subscription_detector import detect_subscriptions_fleet
+
+    processes = settings.fleet_detection_processes
+    pool: Executor
+    if multiprocessing.current_process().daemon:
+        # A prefork child may not start processes: evaluate in this one
+        logger.warning(
+            "Fleet detection is running in a prefork worker; route the "
+            "maintenance queue to a solo-pool worker to use a process pool"
+        )
+        pool, processes = ThreadPoolExecutor(max_workers=1), 1
+    else:
+        # Spawn rather than fork: children must not inherit the loop or DB sockets
+        pool = ProcessPoolExecutor(
+            max_workers=processes, mp_context=multiprocessing.get_context("spawn")
+        )
+    with pool:
+        async with get_session_factory()() as db:
+            created = await detect_subscriptions_fleet(db, pool, partitions=processes)
+
+    logger.info(f"Fleet subscription detection complete: {created} groups created")
+    return created
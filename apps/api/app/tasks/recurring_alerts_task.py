@@ -0,0 +1,27 @@
+import logging
+from datetime import datetime, timezone
+
+from app.tasks.celery_app import celery_app
+from app.tasks.runtime import get_session_factory, run_async
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(bind=True)
+def sweep_missed_payments_task(self) -> int:
+    """Nightly job: raise missed-payment alerts for overdue subscriptions.
+
+    Scheduled after the next-date refresh so it sees up-to-date predictions.
+    """
+    return run_async(_run_sweep())
+
+
+async def _run_sweep() -> int:
+    from app.ai.recurring_monitor import sweep_missed_payments
+
+    async with get_session_factory()() as db:
+        raised = await sweep_missed_payments(db, datetime.now(timezone.utc).date())
+        await db.commit()
+
+    logger.info(f"Missed-payment sweep raised {raised} alerts")
+    return raised
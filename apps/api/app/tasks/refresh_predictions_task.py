@@ -0,0 +1,26 @@
+import logging
+
+from app.tasks.celery_app import celery_app
+from app.tasks.runtime import get_session_factory, run_async
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(bind=True)
+def refresh_next_expected_dates_task(self) -> int:
+    """Nightly job: re-predict next_expected_date for every active subscription.
+
+    Runs on the maintenance queue from the beat schedule in celery_app.
+    """
+    return run_async(_run_refresh())
+
+
+async def _run_refresh() -> int:
+    from app.services.subscription_service import refresh_next_expected_dates
+
+    async with get_session_factory()() as db:
+        updated = await refresh_next_expected_dates(db)
+        await db.commit()
+
+    logger.info(f"Refreshed next expected date for {updated} subscriptions")
+    return updated
@@ -0,0 +1,90 @@
+"""Per-worker-process event loop and database engine for Celery tasks.
+
+Each prefork child builds one event loop and one async engine when it starts
+(``worker_process_init``) and reuses them for every task it runs, so tasks
+don't pay for a new loop, pool and Postgres handshake each time. Both are
+also created lazily on first use for solo/threaded pools and eager mode,
+where the process-init signal never fires.
+"""
+
+import asyncio
+import logging
+from collections.abc import Coroutine
+from typing import Any, TypeVar
+
+from celery.signals import worker_process_init, worker_process_shutdown
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_loop: asyncio.AbstractEventLoop | None = None
+_engine: AsyncEngine | None = None
+_session_factory: async_sessionmaker[AsyncSession] | None = None
+
+
+def init_worker_runtime() -> None:
+    """Create the worker's event loop and engine if they don't exist yet."""
+    global _loop, _engine, _session_factory
+
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_loop)
+
+    if _engine is None:
+        _engine = create_async_engine(
+            settings.database_url,
+            pool_size=settings.worker_db_pool_size,
+            pool_pre_ping=True,
+        )
+        _session_factory = async_sessionmaker(
+            _engine, class_=AsyncSession, expire_on_commit=False
+        )
+
+
+def shutdown_worker_runtime() -> None:
+    """Dispose of the engine and close the loop."""
+    global _loop, _engine, _session_factory
+
+    if _engine is not None and _loop is not None and not _loop.is_closed():
+        _loop.run_until_complete(_engine.dispose())
+    if _loop is not None and not _loop.is_closed():
+        _loop.close()
+    asyncio.set_event_loop(None)
+
+    _loop = None
+    _engine = None
+    _session_factory = None
+
+
+def run_async(coro: Coroutine[Any, Any, T]) -> T:
+    """Run a coroutine to completion on the worker's long-lived event loop."""
+    init_worker_runtime()
+    assert _loop is not None
+    return _loop.run_until_complete(coro)
+
+
+def get_session_factory() -> async_sessionmaker[AsyncSession]:
+    """Return the session factory bound to the worker's shared engine."""
+    init_worker_runtime()
+    assert _session_factory is not None
+    return _session_factory
+
+
+@worker_process_init.connect
+def _on_worker_process_init(**kwargs) -> None:
+    init_worker_runtime()
+    logger.info("Worker runtime initialised")
+
+
+@worker_process_shutdown.connect
+def _on_worker_process_shutdown(**kwargs) -> None:
+    shutdown_worker_runtime()
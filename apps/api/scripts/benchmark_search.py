@@ -0,0 +1,158 @@
+"""Benchmark transaction search against a large single-user history.
+
+Creates a throwaway user with `rows` transactions (generated server-side
+from a pool of merchant names plus reference numbers), then times the
+previous ILIKE filter, the indexed get_transactions search filter and the
+ranked search_transactions for a few terms, reporting the median latency
+over several runs. The user and their rows are deleted afterwards.
+
+Needs a migrated database (alembic upgrade head) at DATABASE_URL.
+
+Run: cd apps/api && python -m scripts.benchmark_search [rows]
+"""
+
+import asyncio
+import statistics
+import sys
+import time
+import uuid
+
+from sqlalchemy import delete, or_, select, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.config import settings
+from app.models.account import Account, AccountType
+from app.models.transaction import Transaction
+from app.models.user import User
+from app.services.transaction_service import get_transactions, search_transactions
+
+MERCHANTS = [
+    "TESCO STORES",
+    "SAINSBURYS",
+    "NETFLIX.COM",
+    "SPOTIFY",
+    "AMAZON.CO.UK",
+    "DELIVEROO",
+    "PRET A MANGER",
+    "UBER *TRIP",
+    "SHELL PETROL",
+    "TFL.GOV.UK/CP",
+    "COSTA COFFEE",
+    "JOHN LEWIS",
+]
+TERMS = ["netf", "netflix.com", "amazon.co.uk", "cp", "tesco stores", "uber", "nomatch"]
+RUNS = 20
+
+
+async def _timed(run) -> float:
+    """Median wall time of `run` in milliseconds."""
+    samples = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        await run()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+async def main(rows: int) -> None:
+    engine = create_async_engine(settings.database_url)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    user_id, account_id = uuid.uuid4(), uuid.uuid4()
+
+    async with session_factory() as db:
+        db.add(
+            User(
+                id=user_id,
+                email=f"search-bench-{user_id}@example.com",
+                name="Search benchmark",
+                password_hash="-",
+            )
+        )
+        await db.flush()
+        db.add(
+            Account(
+                id=account_id,
+                user_id=user_id,
+                name="Benchmark",
+                type=AccountType.current,
+                provider="benchmark",
+            )
+        )
+        await db.flush()
+
+        start = time.perf_counter()
+        await db.execute(
+            text(
+                """
+                INSERT INTO transactions (
+                    id, account_id, user_id, date, description, amount,
+                    merchant_name, is_recurring, tags, created_at
+                )
+                SELECT gen_random_uuid(), :account_id, :user_id,
+                       now() - i * interval '5 minutes',
+                       m.name || ' ' || (random() * 99999)::int,
+                       -(random() * 100)::numeric(12, 2),
+                       CASE WHEN i % 3 = 0 THEN NULL ELSE m.name END,
+                       false, '{}', now()
+                FROM generate_series(1, :rows) AS i
+                CROSS JOIN LATERAL (
+                    SELECT CAST(:merchants AS text[])[1 + (i * 7919) % :merchant_count]
+                        AS name
+                ) AS m
+                """
+            ),
+            {
+                "account_id": account_id,
+                "user_id": user_id,
+                "rows": rows,
+                "merchants": MERCHANTS,
+                "merchant_count": len(MERCHANTS),
+            },
+        )
+        await db.commit()
+        await db.execute(text("ANALYZE transactions"))
+        print(f"Inserted {rows} rows in {time.perf_counter() - start:.1f}s")
+
+        try:
+            for term in TERMS:
+                pattern = f"%{term}%"
+                ilike = (
+                    select(Transaction)
+                    .where(
+                        Transaction.user_id == user_id,
+                        or_(
+                            Transaction.description.ilike(pattern),
+                            Transaction.merchant_name.ilike(pattern),
+                        ),
+                    )
+                    .order_by(Transaction.date.desc(), Transaction.id.desc())
+                    .limit(51)
+                )
+
+                async def run_ilike(query=ilike):
+                    (await db.execute(query)).scalars().all()
+
+                async def run_filter(term=term):
+                    await get_transactions(db, user_id, search=term)
+
+                async def run_ranked(term=term):
+                    await search_transactions(db, user_id, term)
+
+                print(f"\n{term!r}")
+                for name, run in (
+                    ("ILIKE (before)", run_ilike),
+                    ("list filter", run_filter),
+                    ("ranked search", run_ranked),
+                ):
+                    print(f"{name:>16}: {await _timed(run):8.2f} ms")
+        finally:
+            await db.execute(delete(Transaction).where(Transaction.user_id == user_id))
+            await db.execute(delete(Account).where(Account.id == account_id))
+            await db.execute(delete(User).where(User.id == user_id))
+            await db.commit()
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000))
@@ -25,6 +25,7 @@ from app.models.recurring_group import (
 )
 from app.models.transaction import Transaction
 from app.models.user import User
+from app.services.analytics_service import refresh_daily_spend
 from app.services.auth_service import hash_password
 
 # ---------------------------------------------------------------------------
@@ -220,6 +221,7 @@ async def seed_demo_data() -> None:
                     Transaction(
                         id=uuid.uuid4(),
                         account_id=monzo.id,
+                        user_id=user.id,
                         date=current_date.replace(hour=7, minute=0, second=0),
                         description="ACME CORP SALARY",
                         amount=salary_amount,
@@ -245,6 +247,7 @@ async def seed_demo_data() -> None:
                     Transaction(
                         id=uuid.uuid4(),
                         account_id=account.id,
+                        user_id=user.id,
                         date=current_date
                         + timedelta(
                             hours=random.randint(8, 22),
@@ -272,6 +275,7 @@ async def seed_demo_data() -> None:
                         Transaction(
                             id=uuid.uuid4(),
                             account_id=monzo.id,
+                            user_id=user.id,
                             date=sub_date + timedelta(hours=random.randint(0, 12)),
                             description=sub["merchant"],
                             amount=-sub["amount"],
@@ -290,6 +294,7 @@ async def seed_demo_data() -> None:
                     Transaction(
                         id=uuid.uuid4(),
                         account_id=monzo.id,
+                        user_id=user.id,
                         date=annual_date,
                         description=sub["merchant"],
                         amount=-sub["amount"],
@@ -311,6 +316,7 @@ async def seed_demo_data() -> None:
                     Transaction(
                         id=uuid.uuid4(),
                         account_id=monzo.id,
+                        user_id=user.id,
                         date=bill_date,
                         description=name,
                         amount=-_random_amount(min_amt, max_amt),
@@ -325,6 +331,7 @@ async def seed_demo_data() -> None:
         # Bulk-insert all transactions
         db.add_all(transactions)
         await db.flush()
+        await refresh_daily_spend(db, user.id, {t.date.date() for t in transactions})
 
         # ------------------------------------------------------------------
         # 7. RecurringGroup records for subscriptions
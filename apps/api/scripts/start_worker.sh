@@ -0,0 +1,22 @@
+#!/usr/bin/env bash
+# scripts/start_worker.sh
+# Start the Celery workers for one container or terminal.
+#
+# With WORKER_QUEUE set, runs a single worker for that queue with its
+# QUEUE_PROFILES settings. Without it, runs a prefork worker for the
+# interactive, bulk and detection queues next to a solo-pool maintenance
+# worker: the fleet detection job starts its own process pool, which
+# daemonic prefork children are not allowed to do. Exits when either
+# worker does, so the container is restarted.
+
+set -euo pipefail
+
+CELERY=(celery -A app.tasks.celery_app worker --loglevel=info)
+
+if [ -n "${WORKER_QUEUE:-}" ]; then
+  exec "${CELERY[@]}" -Q "$WORKER_QUEUE"
+fi
+
+"${CELERY[@]}" -Q interactive,bulk,detection -n default@%h &
+WORKER_QUEUE=maintenance "${CELERY[@]}" -Q maintenance -n maintenance@%h &
+wait -n
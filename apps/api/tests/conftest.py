@@ -1,6 +1,114 @@
+import time
+
 import pytest
 
 
 @pytest.fixture(scope="session")
 def anyio_backend():
     return "asyncio"
+
+
+class FakeRedis:
+    """Minimal in-memory stand-in for the redis-py client used by the app."""
+
+    def __init__(self):
+        self.store: dict[str, str] = {}
+        self.expiry: dict[str, float] = {}
+
+    def _alive(self, key):
+        expires = self.expiry.get(key)
+        if expires is not None and expires <= time.monotonic():
+            self.store.pop(key, None)
+            self.expiry.pop(key, None)
+        return key in self.store
+
+    def get(self, key):
+        return self.store.get(key) if self._alive(key) else None
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and self._alive(key):
+            return None
+        self.store[key] = str(value)
+        if ex is not None:
+            self.expiry[key] = time.monotonic() + ex
+        return True
+
+    def incr(self, key):
+        value = int(self.get(key) or 0) + 1
+        self.store[key] = str(value)
+        return value
+
+    def delete(self, *keys):
+        removed = 0
+        for key in keys:
+            if self._alive(key):
+                removed += 1
+            self.store.pop(key, None)
+            self.expiry.pop(key, None)
+        return removed
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def eval(self, script, numkeys, key, token):
+        # Only the compare-and-delete lock release script is used
+        if self.get(key) == token:
+            return self.delete(key)
+        return 0
+
+
+class FakePipeline:
+    """Queues FakeRedis commands and runs them on execute()."""
+
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.commands.append((getattr(self.client, name), args, kwargs))
+            return self
+
+        return queue
+
+    def execute(self):
+        commands, self.commands = self.commands, []
+        return [command(*args, **kwargs) for command, args, kwargs in commands]
+
+
+class FakeAsyncRedis:
+    """redis.asyncio-style view of a FakeRedis, sharing its data."""
+
+    def __init__(self, client):
+        self.client = client
+
+    def __getattr__(self, name):
+        command = getattr(self.client, name)
+
+        async def run(*args, **kwargs):
+            return command(*args, **kwargs)
+
+        return run
+
+    def pipeline(self, transaction=True):
+        return FakeAsyncPipeline(self.client)
+
+
+class FakeAsyncPipeline(FakePipeline):
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.commands = []
+
+    async def execute(self):
+        return super().execute()
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """Patch the app's Redis clients (sync and asyncio) with a fresh FakeRedis."""
+    client = FakeRedis()
+    monkeypatch.setattr("app.cache._redis", client)
+    monkeypatch.setattr("app.cache._async_redis", FakeAsyncRedis(client))
+    return client
@@ -60,8 +60,11 @@ async def db_session(db_engine):
 
 
 @pytest.fixture
-def app_with_db(db_session):
-    """Return the real FastAPI app with the DB dependency overridden."""
+def app_with_db(db_session, fake_redis):
+    """Return the real FastAPI app with the DB dependency overridden.
+
+    Redis (data versions behind read ETags) is the in-memory fake.
+    """
 
     async def _override_get_db():
         try:
@@ -10,13 +10,14 @@ PostgreSQL ARRAY column on the Transaction model).
 """
 
 import uuid
-from datetime import datetime
+from datetime import datetime, timezone
 from decimal import Decimal
 from unittest.mock import MagicMock, patch
 
 import pytest
 
 from app.services.auth_service import decode_access_token
+from app.services.transaction_service import encode_cursor
 
 
 # ---------------------------------------------------------------------------
@@ -59,6 +60,8 @@ def _fake_subscription(user_id, **overrides):
     sub.category_id = overrides.get("category_id", None)
     sub.merchant_name = overrides.get("merchant_name", "Spotify")
     sub.next_expected_date = overrides.get("next_expected_date", None)
+    sub.last_seen_date = overrides.get("last_seen_date", None)
+    sub.last_amount = overrides.get("last_amount", None)
     sub.cancel_url = overrides.get("cancel_url", None)
     sub.cancel_steps = overrides.get("cancel_steps", None)
     sub.created_at = overrides.get("created_at", datetime(2025, 1, 1, 0, 0, 0))
@@ -198,7 +201,8 @@ class TestFullUserFlow:
         """Cursor pagination returns the next_cursor and has_more flag,
         and a subsequent request uses the cursor."""
         user_id = uuid.UUID(registered_user["id"])
-        next_cursor_id = uuid.uuid4()
+        cursor_position = (datetime(2026, 1, 15, tzinfo=timezone.utc), uuid.uuid4())
+        next_cursor = encode_cursor(*cursor_position)
 
         page1_txns = [
             _fake_transaction(user_id, description=f"Txn {i}") for i in range(3)
@@ -207,14 +211,14 @@ class TestFullUserFlow:
         # First page: has_more=True with a cursor
         with patch(
             "app.routes.transactions.get_transactions",
-            return_value=(page1_txns, next_cursor_id, True),
+            return_value=(page1_txns, next_cursor, True),
         ):
             resp1 = await client.get("/api/v1/transactions", params={"limit": 3})
 
         assert resp1.status_code == 200
         body1 = resp1.json()
         assert body1["has_more"] is True
-        assert body1["next_cursor"] == str(next_cursor_id)
+        assert body1["next_cursor"] == next_cursor
         assert len(body1["items"]) == 3
 
         # Second page: no more results
@@ -225,7 +229,7 @@ class TestFullUserFlow:
         ) as mock_get:
             resp2 = await client.get(
                 "/api/v1/transactions",
-                params={"cursor": str(next_cursor_id), "limit": 3},
+                params={"cursor": next_cursor, "limit": 3},
             )
 
         assert resp2.status_code == 200
@@ -234,10 +238,10 @@ class TestFullUserFlow:
         assert body2["next_cursor"] is None
         assert len(body2["items"]) == 1
 
-        # Verify the cursor was forwarded to the service
+        # Verify the decoded cursor position was forwarded to the service
         mock_get.assert_called_once()
         call_kwargs = mock_get.call_args
-        assert call_kwargs.kwargs["cursor"] == next_cursor_id
+        assert call_kwargs.kwargs["cursor"] == cursor_position
 
     @pytest.mark.asyncio
     async def test_bulk_category_assignment(self, client, registered_user):
@@ -0,0 +1,464 @@
+import json
+import uuid
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+import redis
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.dialects.postgresql import asyncpg
+from sqlalchemy.orm import Session
+
+from app.cache import bump_data_version, get_data_version, mark_user_data_changed
+from app.database import get_db
+from app.routes.analytics import router
+from app.services.analytics_service import (
+    TimelineGranularity,
+    cached_category_breakdown,
+    get_category_breakdown,
+    get_dashboard_stats,
+    get_spend_timeline,
+    refresh_daily_spend,
+    timeline_bucket_count,
+)
+from app.services.transaction_service import (
+    bulk_update_transactions,
+    update_transaction,
+)
+
+
+def _compile(statement):
+    return statement.compile(dialect=asyncpg.dialect())
+
+
+def _make_test_app(user) -> tuple[FastAPI, AsyncMock]:
+    """App with the analytics router and a get_db returning `user` for auth."""
+    test_app = FastAPI()
+    test_app.include_router(router)
+    db = AsyncMock()
+    result = MagicMock()
+    result.scalar_one_or_none.return_value = user
+    db.execute.return_value = result
+
+    async def override_get_db():
+        yield db
+
+    test_app.dependency_overrides[get_db] = override_get_db
+    return test_app, db
+
+
+# ---------------------------------------------------------------------------
+# refresh_daily_spend
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.asyncio
+async def test_refresh_deletes_then_reaggregates_the_days():
+    db = AsyncMock()
+    days = [date(2026, 3, 2), date(2026, 3, 1), date(2026, 3, 2)]
+
+    await refresh_daily_spend(db, uuid.uuid4(), days)
+
+    delete_sql, insert_sql = (_compile(c.args[0]) for c in db.execute.call_args_list)
+    assert str(delete_sql).startswith("DELETE FROM daily_spend")
+    assert delete_sql.params["days"] == [date(2026, 3, 1), date(2026, 3, 2)]
+
+    sql = str(insert_sql)
+    assert sql.startswith("INSERT INTO daily_spend")
+    assert "GROUP BY transactions.user_id, CAST(transactions.date AS DATE)" in sql
+    assert "ON CONFLICT (user_id, day, category_id, account_id) DO UPDATE" in sql
+    bounds = [
+        value for value in insert_sql.params.values() if isinstance(value, datetime)
+    ]
+    assert bounds == [
+        datetime(2026, 3, 1, tzinfo=timezone.utc),
+        datetime(2026, 3, 3, tzinfo=timezone.utc),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_refresh_without_days_is_a_no_op():
+    db = AsyncMock()
+    await refresh_daily_spend(db, uuid.uuid4(), [])
+    db.execute.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_bulk_recategorise_refreshes_affected_days():
+    db = AsyncMock()
+    db.sync_session.info = {}
+    db.scalar.return_value = True
+    result = MagicMock()
+    result.all.return_value = [(uuid.uuid4(), date(2026, 3, 1))] * 2
+    db.execute.return_value = result
+
+    with patch("app.services.transaction_service.refresh_daily_spend") as mock_refresh:
+        updated = await bulk_update_transactions(
+            db, uuid.uuid4(), {"category_id": uuid.uuid4()}, transaction_ids=[1]
+        )
+        assert updated == 2
+        assert mock_refresh.call_args.args[2] == [date(2026, 3, 1)] * 2
+
+        mock_refresh.reset_mock()
+        await bulk_update_transactions(
+            db, uuid.uuid4(), {"notes": "x"}, transaction_ids=[1]
+        )
+        mock_refresh.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_update_transaction_refreshes_only_on_category_change():
+    txn = MagicMock()
+    txn.category_id = uuid.uuid4()
+    txn.date = datetime(2026, 3, 1, 9, tzinfo=timezone.utc)
+    db = AsyncMock()
+    db.sync_session.info = {}
+
+    with (
+        patch(
+            "app.services.transaction_service.get_transaction_by_id",
+            return_value=txn,
+        ),
+        patch("app.services.transaction_service.refresh_daily_spend") as mock_refresh,
+    ):
+        await update_transaction(
+            db, uuid.uuid4(), uuid.uuid4(), category_id=txn.category_id
+        )
+        mock_refresh.assert_not_called()
+
+        await update_transaction(
+            db, uuid.uuid4(), uuid.uuid4(), category_id=uuid.uuid4()
+        )
+        assert mock_refresh.call_args.args[2] == [date(2026, 3, 1)]
+
+
+# ---------------------------------------------------------------------------
+# Queries
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.asyncio
+async def test_dashboard_stats_read_the_current_month_from_the_rollup():
+    db = AsyncMock()
+    db.scalar.return_value = Decimal("1500.00")
+    month = MagicMock()
+    month.one.return_value = (Decimal("3500.00"), Decimal("1200.50"), 42)
+    db.execute.return_value = month
+
+    with patch(
+        "app.services.analytics_service.get_monthly_total",
+        return_value=Decimal("45.97"),
+    ):
+        stats = await get_dashboard_stats(db, uuid.uuid4(), today=date(2026, 3, 18))
+
+    assert stats == {
+        "total_balance": Decimal("1500.00"),
+        "monthly_income": Decimal("3500.00"),
+        "monthly_spending": Decimal("1200.50"),
+        "subscription_total": Decimal("45.97"),
+        "transaction_count": 42,
+    }
+    compiled = _compile(db.execute.call_args.args[0])
+    assert "FROM daily_spend" in str(compiled)
+    assert "transactions" not in str(compiled)
+    assert date(2026, 3, 1) in compiled.params.values()
+
+
+@pytest.mark.asyncio
+async def test_category_breakdown_percentages_and_uncategorised():
+    food = uuid.uuid4()
+    db = AsyncMock()
+    result = MagicMock()
+    result.all.return_value = [
+        (food, "Food & Drink", "utensils", "#ff0000", Decimal("75.00"), 6),
+        (None, None, None, None, Decimal("25.00"), 2),
+    ]
+    db.execute.return_value = result
+
+    rows = await get_category_breakdown(
+        db, uuid.uuid4(), date_from=date(2026, 3, 1), date_to=date(2026, 3, 31)
+    )
+
+    assert [r["percentage"] for r in rows] == [75.0, 25.0]
+    assert rows[0]["category_id"] == food
+    assert rows[1]["category_name"] == "Uncategorised"
+    sql = str(_compile(db.execute.call_args.args[0]))
+    assert "LEFT OUTER JOIN categories" in sql
+    assert "HAVING sum(daily_spend.outflow) > $" in sql
+
+
+@pytest.mark.asyncio
+async def test_spend_timeline_is_gap_filled_columnar_arrays():
+    db = AsyncMock()
+    result = MagicMock()
+    result.one.return_value = (
+        [date(2026, 1, 1), date(2026, 2, 1), date(2026, 3, 1)],
+        [Decimal("3500.00"), 0, Decimal("3500.00")],
+        [Decimal("1200.50"), 0, Decimal("4000.00")],
+    )
+    db.execute.return_value = result
+
+    timeline = await get_spend_timeline(
+        db,
+        uuid.uuid4(),
+        TimelineGranularity.month,
+        date_from=date(2026, 1, 15),
+        date_to=date(2026, 3, 18),
+    )
+
+    assert timeline["dates"] == [date(2026, 1, 1), date(2026, 2, 1), date(2026, 3, 1)]
+    assert timeline["net"] == [Decimal("2299.50"), 0, Decimal("-500.00")]
+    compiled = _compile(db.execute.call_args.args[0])
+    sql = str(compiled)
+    assert "FROM generate_series(date_trunc(" in sql
+    assert "interval '1 month') AS buckets(start)" in sql
+    assert "LEFT OUTER JOIN (SELECT date_trunc(" in sql
+    assert "array_agg(CAST(buckets.start AS DATE) ORDER BY buckets.start)" in sql
+    assert "FROM daily_spend" in sql and "transactions" not in sql
+    assert datetime(2026, 1, 15) in compiled.params.values()
+
+
+@pytest.mark.asyncio
+async def test_spend_timeline_with_no_buckets_returns_empty_arrays():
+    db = AsyncMock()
+    result = MagicMock()
+    result.one.return_value = (None, None, None)
+    db.execute.return_value = result
+
+    timeline = await get_spend_timeline(
+        db, uuid.uuid4(), TimelineGranularity.day, date_to=date(2026, 3, 18)
+    )
+
+    assert timeline["dates"] == timeline["net"] == []
+
+
+def test_timeline_bucket_count():
+    start, end = date(2025, 12, 31), date(2026, 3, 2)
+    assert timeline_bucket_count(TimelineGranularity.day, start, end) == 62
+    # Wed 31 Dec falls in the week of Mon 29 Dec; Mon 2 Mar starts a week
+    assert timeline_bucket_count(TimelineGranularity.week, start, end) == 10
+    assert timeline_bucket_count(TimelineGranularity.month, start, end) == 4
+
+
+# ---------------------------------------------------------------------------
+# Caching
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.asyncio
+async def test_category_breakdown_is_cached_until_the_data_version_bumps(fake_redis):
+    user_id = uuid.uuid4()
+    rows = [{"category_id": uuid.uuid4(), "total": Decimal("12.50")}]
+    window = {"date_from": date(2026, 3, 1), "date_to": date(2026, 3, 31)}
+
+    with patch(
+        "app.services.analytics_service.get_category_breakdown", return_value=rows
+    ) as compute:
+        assert await cached_category_breakdown(None, user_id, **window) == rows
+        cached = await cached_category_breakdown(None, user_id, **window)
+        assert compute.call_count == 1
+        assert cached == json.loads(json.dumps(rows, default=str))
+        version = await get_data_version(user_id)
+        assert (
+            f"analytics:{user_id}:v{version}:categories:2026-03-01:2026-03-31"
+            in fake_redis.store
+        )
+
+        await cached_category_breakdown(
+            None, user_id, date_from=date(2026, 2, 1), date_to=date(2026, 2, 28)
+        )
+        assert compute.call_count == 2
+
+        fake_redis.incr(f"data_version:{user_id}")
+        await cached_category_breakdown(None, user_id, **window)
+        assert compute.call_count == 3
+
+
+def test_data_version_bumps_only_when_the_session_commits(fake_redis):
+    user_id = uuid.uuid4()
+    version = bump_data_version(user_id)
+    engine = create_engine("sqlite://")
+    with Session(engine) as session:
+        db = MagicMock(sync_session=session)
+
+        session.execute(text("SELECT 1"))
+        mark_user_data_changed(db, user_id)
+        session.rollback()
+        assert fake_redis.get(f"data_version:{user_id}") == str(version)
+
+        session.execute(text("SELECT 1"))
+        mark_user_data_changed(db, user_id)
+        mark_user_data_changed(db, user_id)
+        assert fake_redis.get(f"data_version:{user_id}") == str(version)
+        session.commit()
+        assert fake_redis.get(f"data_version:{user_id}") == str(version + 1)
+
+
+def test_commit_survives_a_failing_version_bump(fake_redis, monkeypatch):
+    def unavailable(*args, **kwargs):
+        raise redis.ConnectionError("down")
+
+    monkeypatch.setattr(fake_redis, "incr", unavailable)
+    engine = create_engine("sqlite://")
+    with Session(engine) as session:
+        session.execute(text("SELECT 1"))
+        mark_user_data_changed(MagicMock(sync_session=session), uuid.uuid4())
+        session.commit()
+        assert "changed_user_ids" not in session.info
+
+
+@pytest.mark.asyncio
+async def test_data_version_survives_a_redis_reset(fake_redis, monkeypatch):
+    """A flushed version restarts above the versions handed out before it."""
+    user_id = uuid.uuid4()
+    monkeypatch.setattr("app.cache.time.time_ns", lambda: 1_000_000_000_000)
+    bump_data_version(user_id)
+    bump_data_version(user_id)
+    before = await get_data_version(user_id)
+    assert before == 1_000_002
+
+    fake_redis.store.clear()
+    monkeypatch.setattr("app.cache.time.time_ns", lambda: 1_001_000_000_000)
+
+    assert await get_data_version(user_id) == 1_001_000 > before
+
+
+@pytest.mark.asyncio
+async def test_analytics_are_computed_uncached_without_redis(fake_redis, monkeypatch):
+    def unavailable(*args, **kwargs):
+        raise redis.ConnectionError("down")
+
+    monkeypatch.setattr(fake_redis, "get", unavailable)
+    rows = [{"category_id": None, "total": Decimal("1.00")}]
+    with patch(
+        "app.services.analytics_service.get_category_breakdown", return_value=rows
+    ) as compute:
+        assert await cached_category_breakdown(None, uuid.uuid4()) == rows
+        assert await cached_category_breakdown(None, uuid.uuid4()) == rows
+    assert compute.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_updates_mark_the_user_data_changed():
+    user_id = uuid.uuid4()
+    db = AsyncMock()
+    db.scalar.return_value = True
+    result = MagicMock()
+    result.all.return_value = [(uuid.uuid4(), date(2026, 3, 1))]
+    db.execute.return_value = result
+
+    with (
+        patch("app.services.transaction_service.refresh_daily_spend"),
+        patch("app.services.transaction_service.mark_user_data_changed") as mark,
+    ):
+        await bulk_update_transactions(
+            db, user_id, {"category_id": uuid.uuid4()}, transaction_ids=[1]
+        )
+        mark.assert_called_once_with(db, user_id)
+
+        mark.reset_mock()
+        result.all.return_value = []
+        await bulk_update_transactions(db, user_id, {"notes": "x"}, filters={})
+        mark.assert_not_called()
+
+
+# ---------------------------------------------------------------------------
+# Routes
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.asyncio
+async def test_analytics_routes_return_the_web_contract(fake_redis):
+    user = MagicMock()
+    user.id = uuid.uuid4()
+    app, _ = _make_test_app(user)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        with patch(
+            "app.routes.analytics.get_dashboard_stats",
+            return_value={
+                "total_balance": Decimal("10.50"),
+                "monthly_income": Decimal("0"),
+                "monthly_spending": Decimal("3.25"),
+                "subscription_total": Decimal("0"),
+                "transaction_count": 1,
+            },
+        ):
+            dashboard = await client.get("/api/v1/analytics/dashboard")
+        assert dashboard.status_code == 200
+        assert dashboard.json()["monthly_spending"] == 3.25
+
+        with patch(
+            "app.routes.analytics.cached_top_merchants",
+            return_value=[
+                {
+                    "merchant_name": "TESCO",
+                    "total": Decimal("80.00"),
+                    "transaction_count": 4,
+                    "category_name": None,
+                }
+            ],
+        ) as mock_top:
+            merchants = await client.get(
+                "/api/v1/analytics/top-merchants", params={"limit": 3}
+            )
+        assert merchants.json() == [
+            {
+                "merchant_name": "TESCO",
+                "total": 80.0,
+                "transaction_count": 4,
+                "category_name": None,
+            }
+        ]
+        assert mock_top.call_args.kwargs["limit"] == 3
+
+        inverted = await client.get(
+            "/api/v1/analytics/categories",
+            params={"date_from": "2026-03-31", "date_to": "2026-03-01"},
+        )
+        assert inverted.status_code == 400
+
+        too_long = await client.get(
+            "/api/v1/analytics/timeline",
+            params={"granularity": "day", "from": "2020-01-01", "to": "2026-01-01"},
+        )
+        assert too_long.status_code == 400
+
+        unknown = await client.get(
+            "/api/v1/analytics/timeline", params={"granularity": "daily"}
+        )
+        assert unknown.status_code == 422
+
+        with patch(
+            "app.routes.analytics.get_spend_timeline",
+            return_value={
+                "granularity": "week",
+                "dates": [date(2026, 3, 2), date(2026, 3, 9)],
+                "income": [Decimal("0"), Decimal("10")],
+                "spending": [Decimal("5.5"), Decimal("0")],
+                "net": [Decimal("-5.5"), Decimal("10")],
+            },
+        ) as mock_timeline:
+            weekly = await client.get(
+                "/api/v1/analytics/timeline",
+                params={
+                    "granularity": "week",
+                    "from": "2026-03-02",
+                    "to": "2026-03-15",
+                },
+            )
+        assert weekly.json() == {
+            "granularity": "week",
+            "dates": ["2026-03-02", "2026-03-09"],
+            "income": [0.0, 10.0],
+            "spending": [5.5, 0.0],
+            "net": [-5.5, 10.0],
+        }
+        assert mock_timeline.call_args.kwargs == {
+            "date_from": date(2026, 3, 2),
+            "date_to": date(2026, 3, 15),
+        }
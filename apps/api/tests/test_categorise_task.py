@@ -0,0 +1,205 @@
+from datetime import date, datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.dialects.postgresql import asyncpg
+
+from app.services.transaction_service import bulk_apply_categorisation
+from app.tasks.categorise_task import (
+    _build_updates,
+    _get_category_lookup,
+    clear_category_cache,
+)
+
+
+def _make_category(name, user_id=None):
+    """Create a mock Category object."""
+    cat = MagicMock()
+    cat.id = uuid4()
+    cat.name = name
+    cat.user_id = user_id
+    return cat
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    clear_category_cache()
+    yield
+    clear_category_cache()
+
+
+def test_build_updates_maps_results_by_id():
+    """Results are matched to loaded transactions and categories by name."""
+    txn_a, txn_b = uuid4(), uuid4()
+    shopping = uuid4()
+    categorised = [
+        {
+            "transaction_id": txn_a,
+            "category_name": "Shopping",
+            "confidence": 0.95,
+            "merchant_name": "Amazon",
+        },
+        {
+            "transaction_id": txn_b,
+            "category_name": "Unknown",
+            "confidence": 0.5,
+            "merchant_name": "Corner Shop",
+        },
+    ]
+
+    updates = _build_updates(categorised, {txn_a, txn_b}, {"shopping": shopping})
+
+    assert updates == [
+        {
+            "id": txn_a,
+            "category_id": shopping,
+            "ai_confidence": 0.95,
+            "merchant_name": "Amazon",
+        },
+        {
+            "id": txn_b,
+            "category_id": None,
+            "ai_confidence": None,
+            "merchant_name": "Corner Shop",
+        },
+    ]
+
+
+def test_build_updates_skips_unknown_transactions():
+    """Results for ids that were not loaded are ignored."""
+    categorised = [
+        {
+            "transaction_id": uuid4(),
+            "category_name": "Shopping",
+            "confidence": 0.95,
+            "merchant_name": "Amazon",
+        }
+    ]
+
+    assert _build_updates(categorised, {uuid4()}, {"shopping": uuid4()}) == []
+
+
+@pytest.mark.asyncio
+async def test_category_lookup_prefers_user_category_and_is_cached():
+    """User categories override system ones and are only loaded once."""
+    user_id = uuid4()
+    user_food = _make_category("Food", user_id=user_id)
+    system_food = _make_category("Food")
+
+    with patch(
+        "app.services.category_service.get_categories",
+        AsyncMock(return_value=[user_food, system_food]),
+    ) as mock_get:
+        first = await _get_category_lookup(AsyncMock(), user_id)
+        second = await _get_category_lookup(AsyncMock(), user_id)
+
+    assert first == {"food": user_food.id}
+    assert second is first
+    mock_get.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_bulk_apply_issues_single_update_from_values():
+    """All results are written back with one UPDATE ... FROM (VALUES ...)."""
+    db = AsyncMock()
+    db.execute.return_value = MagicMock(rowcount=2)
+    updates = [
+        {
+            "id": uuid4(),
+            "category_id": uuid4(),
+            "ai_confidence": 0.9,
+            "merchant_name": "Amazon",
+        },
+        {
+            "id": uuid4(),
+            "category_id": None,
+            "ai_confidence": None,
+            "merchant_name": "Tesco",
+        },
+    ]
+
+    count = await bulk_apply_categorisation(db, updates)
+
+    assert count == 2
+    db.execute.assert_awaited_once()
+    sql = str(db.execute.call_args.args[0].compile(dialect=asyncpg.dialect()))
+    assert sql.startswith("UPDATE transactions SET")
+    assert "FROM (VALUES" in sql
+
+
+@pytest.mark.asyncio
+async def test_bulk_apply_noop_for_empty_updates():
+    db = AsyncMock()
+    assert await bulk_apply_categorisation(db, []) == 0
+    db.execute.assert_not_called()
+
+
+def test_dispatch_fans_out_fixed_size_chunks():
+    """A large import is split into CHUNK_SIZE chunk tasks under one chord."""
+    from app.tasks import categorise_task
+
+    user_id = str(uuid4())
+    ids = [str(uuid4()) for _ in range(5)]
+
+    with (
+        patch.object(categorise_task, "CHUNK_SIZE", 2),
+        patch.object(categorise_task, "chord") as mock_chord,
+    ):
+        categorise_task.categorise_transactions_task(user_id, ids)
+
+    header = mock_chord.call_args.args[0]
+    chunks = [sig.args[1] for sig in header.tasks]
+    assert chunks == [ids[0:2], ids[2:4], ids[4:5]]
+    callback = mock_chord.return_value.call_args.args[0]
+    assert callback.task == "app.tasks.categorise_task.categorisation_complete_task"
+    assert callback.args == (user_id,)
+
+
+def test_dispatch_skips_empty_and_duplicate_ids():
+    from app.tasks.categorise_task import _chunked, categorise_transactions_task
+
+    assert categorise_transactions_task(str(uuid4()), []) is None
+    assert _chunked(["a", "b", "a", "c"], 2) == [["a", "b"], ["c"]]
+
+
+def test_completion_callback_sums_chunk_counts():
+    from app.tasks.categorise_task import categorisation_complete_task
+
+    user_id = str(uuid4())
+    with patch(
+        "app.tasks.detect_subscriptions_task.schedule_subscription_detection"
+    ) as mock_schedule:
+        assert categorisation_complete_task([3, 0, 2], user_id) == 5
+
+    mock_schedule.assert_called_once_with(user_id)
+
+
+@pytest.mark.asyncio
+async def test_chunk_rolls_daily_spend_even_when_ai_fails():
+    from app.tasks.categorise_task import _run_categorisation
+
+    user_id = uuid4()
+    txn = MagicMock()
+    txn.id = uuid4()
+    txn.date = datetime(2026, 10, 19, 9, 30)
+    db = AsyncMock()
+    db.sync_session.info = {}
+    factory = MagicMock()
+    factory.return_value.__aenter__.return_value = db
+
+    with (
+        patch("app.tasks.categorise_task.get_session_factory", return_value=factory),
+        patch("app.ai.base.load_transaction_records", AsyncMock(return_value=[txn])),
+        patch(
+            "app.ai.categoriser.categorise_transactions",
+            AsyncMock(side_effect=RuntimeError("AI unavailable")),
+        ),
+        patch("app.services.analytics_service.refresh_daily_spend") as mock_refresh,
+    ):
+        with pytest.raises(RuntimeError):
+            await _run_categorisation(str(user_id), [str(txn.id)])
+
+    mock_refresh.assert_awaited_once_with(db, user_id, {date(2026, 10, 19)})
+    db.commit.assert_awaited_once()
+    assert db.sync_session.info["changed_user_ids"] == {user_id}
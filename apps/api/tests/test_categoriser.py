@@ -5,8 +5,9 @@ from uuid import uuid4
 
 import pytest
 
-from app.ai.base import AIResponse, TokenUsage
+from app.ai.base import AIResponse, TokenUsage, load_transaction_records
 from app.ai.categoriser import categorise_transactions, clear_cache
+from app.models.transaction import Transaction
 
 
 def _make_transaction(
@@ -234,3 +235,23 @@ async def test_merchant_normalisation_in_results():
     assert results[0]["merchant_name"] == "Deliveroo"
     assert results[0]["category_name"] == "Food & Drink"
     assert results[0]["confidence"] == 0.98
+
+
+@pytest.mark.asyncio
+async def test_load_transaction_records_selects_only_needed_columns():
+    txn_id = uuid4()
+    result = MagicMock()
+    result.all.return_value = [
+        (txn_id, None, Decimal("9.99"), "Netflix", "NETFLIX.COM", None, None, None)
+    ]
+    db = AsyncMock()
+    db.execute.return_value = result
+
+    (record,) = await load_transaction_records(db, Transaction.id.in_([txn_id]))
+
+    assert record.id == txn_id
+    assert record.merchant_name == "Netflix"
+    assert not hasattr(record, "__dict__")
+    sql = str(db.execute.call_args.args[0])
+    assert "transactions.notes" not in sql
+    assert "transactions.tags" not in sql
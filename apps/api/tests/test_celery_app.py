@@ -0,0 +1,113 @@
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+import pytest
+
+from app.tasks import categorise_task
+from app.tasks.celery_app import QUEUE_PROFILES, celery_app
+
+
+def _queue_for(task_name: str) -> str:
+    route = celery_app.amqp.router.route({}, task_name)
+    return route["queue"].name
+
+
+def test_queues_are_declared():
+    declared = {q.name for q in celery_app.conf.task_queues}
+    assert declared == {"interactive", "bulk", "detection", "maintenance"}
+    assert declared == set(QUEUE_PROFILES)
+
+
+def test_tasks_are_routed_to_their_queues():
+    assert (
+        _queue_for("app.tasks.detect_subscriptions_task.detect_subscriptions_task")
+        == "detection"
+    )
+    assert _queue_for("app.tasks.celery_app.health_check_task") == "maintenance"
+    assert (
+        _queue_for("app.tasks.categorise_task.categorise_transactions_task")
+        == "interactive"
+    )
+    assert (
+        _queue_for(
+            "app.tasks.refresh_predictions_task.refresh_next_expected_dates_task"
+        )
+        == "maintenance"
+    )
+
+
+def test_maintenance_worker_uses_solo_pool():
+    """The fleet detection job starts a process pool of its own."""
+    assert QUEUE_PROFILES["maintenance"]["pool"] == "solo"
+    assert (
+        _queue_for("app.tasks.fleet_detection_task.detect_subscriptions_fleet_task")
+        == "maintenance"
+    )
+
+
+@pytest.mark.asyncio
+async def test_fleet_job_evaluates_in_process_inside_a_prefork_child():
+    from app.tasks import fleet_detection_task
+
+    with (
+        patch("multiprocessing.current_process", return_value=MagicMock(daemon=True)),
+        patch.object(fleet_detection_task, "get_session_factory", MagicMock()),
+        patch(
+            "app.ai.subscription_detector.detect_subscriptions_fleet",
+            AsyncMock(return_value=0),
+        ) as fleet,
+    ):
+        await fleet_detection_task._run_fleet_detection()
+
+    _, pool = fleet.call_args.args
+    assert isinstance(pool, ThreadPoolExecutor)
+    assert fleet.call_args.kwargs == {"partitions": 1}
+
+
+def test_fleet_detection_is_scheduled():
+    from app.tasks import fleet_detection_task
+
+    entry = celery_app.conf.beat_schedule["detect-subscriptions-fleet"]
+    assert entry["task"] == fleet_detection_task.detect_subscriptions_fleet_task.name
+
+
+def test_missed_payment_sweep_runs_after_refresh():
+    schedule = celery_app.conf.beat_schedule
+    sweep = schedule["sweep-missed-payments"]["schedule"]
+    refresh = schedule["refresh-next-expected-dates"]["schedule"]
+    assert (min(sweep.hour), min(sweep.minute)) > (
+        min(refresh.hour),
+        min(refresh.minute),
+    )
+    assert (
+        _queue_for("app.tasks.recurring_alerts_task.sweep_missed_payments_task")
+        == "maintenance"
+    )
+
+
+def test_nightly_refresh_is_scheduled():
+    from app.tasks import refresh_predictions_task
+
+    entry = celery_app.conf.beat_schedule["refresh-next-expected-dates"]
+    assert (
+        entry["task"] == refresh_predictions_task.refresh_next_expected_dates_task.name
+    )
+
+
+def _dispatch_queues(count: int) -> set[str]:
+    ids = [str(uuid4()) for _ in range(count)]
+    with patch.object(categorise_task, "chord") as mock_chord:
+        categorise_task.categorise_transactions_task(str(uuid4()), ids)
+    header = mock_chord.call_args.args[0]
+    callback = mock_chord.return_value.call_args.args[0]
+    return {sig.options["queue"] for sig in header.tasks} | {callback.options["queue"]}
+
+
+def test_small_upload_goes_to_interactive_queue():
+    assert _dispatch_queues(20) == {"interactive"}
+
+
+def test_large_import_goes_to_bulk_queue():
+    limit = categorise_task.INTERACTIVE_MAX_TRANSACTIONS
+    assert _dispatch_queues(limit + 1) == {"bulk"}
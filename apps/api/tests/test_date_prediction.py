@@ -0,0 +1,48 @@
+from datetime import date
+
+from app.ai.date_prediction import predict_next_dates
+from app.models.recurring_group import Frequency
+
+
+def test_monthly_keeps_day_of_month():
+    """A bill on the 1st stays on the 1st instead of drifting by 30 days."""
+    dates = [date(2026, 1, 1), date(2026, 2, 1), date(2026, 3, 1)]
+    assert predict_next_dates([dates], [Frequency.monthly]) == [date(2026, 4, 1)]
+
+
+def test_month_end_anchor_is_clamped():
+    dates = [date(2025, 11, 30), date(2025, 12, 31), date(2026, 1, 31)]
+    assert predict_next_dates([dates], [Frequency.monthly]) == [date(2026, 2, 28)]
+
+
+def test_late_charge_does_not_skip_a_month():
+    """A charge that slipped into the next month still predicts the anchor."""
+    dates = [date(2026, 1, 28), date(2026, 3, 2), date(2026, 3, 28)]
+    late = [date(2026, 1, 28), date(2026, 2, 28), date(2026, 4, 1)]
+
+    assert predict_next_dates([dates, late], [Frequency.monthly] * 2) == [
+        date(2026, 4, 28),
+        date(2026, 4, 28),
+    ]
+
+
+def test_weekly_uses_most_common_weekday():
+    # Mondays, with one charge shifted to a Tuesday
+    dates = [date(2026, 1, 5), date(2026, 1, 13), date(2026, 1, 19)]
+    assert predict_next_dates([dates], [Frequency.weekly]) == [date(2026, 1, 26)]
+
+
+def test_mixed_frequencies_in_one_batch():
+    series = [
+        [date(2026, 1, 15), date(2026, 4, 15)],
+        [date(2024, 2, 29), date(2025, 2, 28)],
+        [date(2026, 1, 1), date(2026, 1, 8)],
+    ]
+    frequencies = [Frequency.quarterly, Frequency.annual, Frequency.weekly]
+
+    assert predict_next_dates(series, frequencies) == [
+        date(2026, 7, 15),
+        date(2026, 2, 28),
+        date(2026, 1, 15),
+    ]
+    assert predict_next_dates([], []) == []
@@ -0,0 +1,114 @@
+from unittest.mock import patch
+from uuid import uuid4
+
+import pytest
+from celery.exceptions import MaxRetriesExceededError, Retry
+
+from app.tasks import detect_subscriptions_task as task_module
+from app.tasks.detect_subscriptions_task import (
+    DETECTION_DEBOUNCE_SECONDS,
+    DETECTION_LOCK_RETRIES,
+    DETECTION_LOCK_TTL_SECONDS,
+    detect_subscriptions_task,
+    schedule_subscription_detection,
+)
+
+
+def test_triggers_within_window_collapse_into_one_run(fake_redis):
+    """Only the first trigger in a debounce window enqueues a run."""
+    user_id = str(uuid4())
+
+    with patch.object(detect_subscriptions_task, "apply_async") as mock_apply:
+        assert schedule_subscription_detection(user_id) is True
+        assert schedule_subscription_detection(user_id) is False
+        assert schedule_subscription_detection(user_id) is False
+
+    mock_apply.assert_called_once_with(
+        args=[user_id], countdown=DETECTION_DEBOUNCE_SECONDS
+    )
+
+
+def test_triggers_are_per_user(fake_redis):
+    with patch.object(detect_subscriptions_task, "apply_async") as mock_apply:
+        assert schedule_subscription_detection(str(uuid4())) is True
+        assert schedule_subscription_detection(str(uuid4())) is True
+
+    assert mock_apply.call_count == 2
+
+
+def _close(coro):
+    """run_async stand-in that discards the coroutine without awaiting it."""
+    coro.close()
+
+
+def test_run_clears_pending_and_releases_lock(fake_redis):
+    """A run reopens the debounce window and releases its lock when done."""
+    user_id = str(uuid4())
+
+    with (
+        patch.object(detect_subscriptions_task, "apply_async"),
+        patch.object(task_module, "_run_detection") as mock_run,
+        patch.object(task_module, "run_async", side_effect=_close) as mock_run_async,
+    ):
+        schedule_subscription_detection(user_id)
+        detect_subscriptions_task(user_id)
+
+        mock_run.assert_called_once_with(user_id)
+        mock_run_async.assert_called_once()
+        assert fake_redis.get(task_module._lock_key(user_id)) is None
+        # A trigger after the run started schedules a new run
+        assert schedule_subscription_detection(user_id) is True
+
+
+def test_run_is_retried_while_another_is_in_progress(fake_redis):
+    user_id = str(uuid4())
+    fake_redis.set(task_module._lock_key(user_id), "other-run")
+
+    with (
+        patch.object(task_module, "run_async") as mock_run_async,
+        patch.object(detect_subscriptions_task, "retry", side_effect=Retry()),
+    ):
+        with pytest.raises(Retry):
+            detect_subscriptions_task(user_id)
+
+    mock_run_async.assert_not_called()
+    assert fake_redis.get(task_module._lock_key(user_id)) == "other-run"
+
+
+def test_waiting_run_outlasts_the_lock_then_reopens_the_window(fake_redis):
+    """A run that gives up waiting clears its pending trigger for the next one."""
+    assert DETECTION_LOCK_RETRIES * DETECTION_DEBOUNCE_SECONDS > (
+        DETECTION_LOCK_TTL_SECONDS
+    )
+    user_id = str(uuid4())
+    fake_redis.set(task_module._lock_key(user_id), "other-run")
+
+    with (
+        patch.object(detect_subscriptions_task, "apply_async") as mock_apply,
+        patch.object(
+            detect_subscriptions_task, "retry", side_effect=MaxRetriesExceededError()
+        ),
+    ):
+        schedule_subscription_detection(user_id)
+        assert detect_subscriptions_task(user_id) is None
+
+        assert fake_redis.get(task_module._pending_key(user_id)) is None
+        assert schedule_subscription_detection(user_id) is True
+    assert mock_apply.call_count == 2
+
+
+def test_lock_is_released_when_run_fails(fake_redis):
+    user_id = str(uuid4())
+
+    def fail(coro):
+        coro.close()
+        raise RuntimeError("boom")
+
+    with (
+        patch.object(task_module, "_run_detection"),
+        patch.object(task_module, "run_async", side_effect=fail),
+    ):
+        with pytest.raises(RuntimeError):
+            detect_subscriptions_task(user_id)
+
+    assert fake_redis.get(task_module._lock_key(user_id)) is None
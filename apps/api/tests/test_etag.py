@@ -0,0 +1,176 @@
+import time
+import uuid
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+import redis
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app import cache
+from app.cache import mark_user_data_changed
+from app.database import get_db
+from app.middleware.auth import get_current_user
+from app.middleware.etag import _etag_matches
+from app.routes.subscriptions import router as subscriptions_router
+from app.routes.transactions import router as transactions_router
+
+
+def _make_test_app(user) -> FastAPI:
+    test_app = FastAPI()
+    test_app.include_router(transactions_router)
+    test_app.include_router(subscriptions_router)
+    db = AsyncMock()
+    result = MagicMock()
+    result.scalar_one_or_none.return_value = user
+    db.execute.return_value = result
+
+    async def override_get_db():
+        yield db
+
+    test_app.dependency_overrides[get_db] = override_get_db
+    return test_app
+
+
+def test_etag_matching_is_weak_and_accepts_lists():
+    etag = 'W/"3-2026-10-19"'
+    assert _etag_matches(etag, etag)
+    assert _etag_matches('"3-2026-10-19"', etag)
+    assert _etag_matches('W/"2-2026-10-19", W/"3-2026-10-19"', etag)
+    assert _etag_matches("*", etag)
+    assert not _etag_matches('W/"2-2026-10-19"', etag)
+
+
+@pytest.mark.asyncio
+async def test_list_transactions_answers_a_matching_etag_with_304(fake_redis):
+    user = MagicMock()
+    user.id = uuid.uuid4()
+    app = _make_test_app(user)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        with patch(
+            "app.routes.transactions.get_transactions", return_value=([], None, False)
+        ) as mock_get:
+            first = await client.get("/api/v1/transactions")
+            etag = first.headers["ETag"]
+            assert first.status_code == 200
+            assert etag.startswith(f'W/"{user.id}-')
+            assert first.headers["Cache-Control"] == "private, no-cache"
+
+            cached = await client.get(
+                "/api/v1/transactions", headers={"If-None-Match": etag}
+            )
+            assert cached.status_code == 304
+            assert cached.headers["ETag"] == etag
+            assert cached.content == b""
+            assert mock_get.call_count == 1
+
+            fake_redis.incr(f"data_version:{user.id}")
+            changed = await client.get(
+                "/api/v1/transactions", headers={"If-None-Match": etag}
+            )
+            assert changed.status_code == 200
+            assert changed.headers["ETag"] != etag
+            assert mock_get.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_subscriptions_etag_follows_only_the_users_version(fake_redis):
+    user = MagicMock()
+    user.id = uuid.uuid4()
+    app = _make_test_app(user)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        with (
+            patch("app.routes.subscriptions.get_subscriptions", return_value=[]),
+            patch("app.routes.subscriptions.get_monthly_total", return_value=0),
+        ):
+            etag = (await client.get("/api/v1/subscriptions")).headers["ETag"]
+
+            other_user = str(uuid.uuid4())
+            fake_redis.incr(f"data_version:{other_user}")
+            unchanged = await client.get(
+                "/api/v1/subscriptions", headers={"If-None-Match": etag}
+            )
+            assert unchanged.status_code == 304
+
+            fake_redis.incr(f"data_version:{user.id}")
+            changed = await client.get(
+                "/api/v1/subscriptions", headers={"If-None-Match": etag}
+            )
+            assert changed.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_responses_are_untagged_while_redis_is_down(fake_redis, monkeypatch):
+    def unavailable(*args, **kwargs):
+        raise redis.ConnectionError("down")
+
+    monkeypatch.setattr(fake_redis, "get", unavailable)
+    user = MagicMock()
+    user.id = uuid.uuid4()
+    app = _make_test_app(user)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        with patch(
+            "app.routes.transactions.get_transactions", return_value=([], None, False)
+        ):
+            response = await client.get(
+                "/api/v1/transactions", headers={"If-None-Match": "*"}
+            )
+    assert response.status_code == 200
+    assert "ETag" not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_write_changes_the_etag_before_its_response(fake_redis, monkeypatch):
+    """A refetch right after a write never revalidates against the old tag."""
+    user = MagicMock()
+    user.id = uuid.uuid4()
+    # An unbound session: commit fires the after_commit hooks without Postgres
+    monkeypatch.setattr(
+        "app.database.async_session", async_sessionmaker(class_=AsyncSession)
+    )
+    app = FastAPI()
+    app.include_router(transactions_router)
+    app.include_router(subscriptions_router)
+    app.dependency_overrides[get_current_user] = lambda: user
+    bump = cache._bump_data_versions
+
+    def slow_bump(user_ids):
+        time.sleep(0.2)
+        bump(user_ids)
+
+    monkeypatch.setattr(cache, "_bump_data_versions", slow_bump)
+
+    async def bulk_update(db, transaction_ids, category_id, user_id, **kwargs):
+        mark_user_data_changed(db, user_id)
+        return len(transaction_ids)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        with (
+            patch("app.routes.subscriptions.get_subscriptions", return_value=[]),
+            patch("app.routes.subscriptions.get_monthly_total", return_value=0),
+            patch("app.routes.transactions.bulk_update_category", bulk_update),
+        ):
+            etag = (await client.get("/api/v1/subscriptions")).headers["ETag"]
+
+            written = await client.post(
+                "/api/v1/transactions/bulk",
+                json={
+                    "transaction_ids": [str(uuid.uuid4())],
+                    "category_id": str(uuid.uuid4()),
+                },
+            )
+            assert written.json() == {"updated": 1}
+
+            refetch = await client.get(
+                "/api/v1/subscriptions", headers={"If-None-Match": etag}
+            )
+    assert refetch.status_code == 200
+    assert refetch.headers["ETag"] != etag
@@ -0,0 +1,162 @@
+import csv
+import io
+import json
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from app.database import get_db
+from app.routes.transactions import router
+from app.services.export_service import (
+    EXPORT_BATCH_SIZE,
+    encode_csv,
+    encode_ndjson,
+    encode_parquet,
+    stream_transaction_rows,
+)
+
+
+def _row(description="TESCO STORES", tags=("food",)):
+    return (
+        uuid.uuid4(),
+        datetime(2026, 3, 1, 9, 30, tzinfo=timezone.utc),
+        uuid.uuid4(),
+        description,
+        "Tesco",
+        Decimal("-42.10"),
+        "Food & Drink",
+        None,
+        False,
+        None,
+        list(tags),
+    )
+
+
+async def _batches(*batches):
+    for batch in batches:
+        yield batch
+
+
+async def _collect(chunks):
+    return [chunk async for chunk in chunks]
+
+
+@pytest.mark.asyncio
+async def test_csv_writes_header_then_one_chunk_per_batch():
+    chunks = await _collect(
+        encode_csv(_batches([_row(), _row(tags=("a", "b"))], [_row("ALDI", ())]))
+    )
+
+    rows = list(csv.reader(io.StringIO("".join(chunks))))
+    assert rows[0][:4] == ["id", "date", "account_id", "description"]
+    assert [r[3] for r in rows[1:]] == ["TESCO STORES", "TESCO STORES", "ALDI"]
+    assert rows[2][-1] == "a;b"
+    assert len([c for c in chunks if c]) == 2
+
+
+@pytest.mark.asyncio
+async def test_csv_of_no_rows_is_just_the_header():
+    chunks = await _collect(encode_csv(_batches()))
+
+    assert "".join(chunks).strip() == ",".join(
+        next(csv.reader(io.StringIO("".join(chunks))))
+    )
+
+
+@pytest.mark.asyncio
+async def test_ndjson_emits_one_object_per_line():
+    chunks = await _collect(encode_ndjson(_batches([_row(), _row("ALDI")])))
+
+    lines = "".join(chunks).splitlines()
+    first = json.loads(lines[0])
+    assert len(lines) == 2
+    assert first["amount"] == "-42.10"
+    assert first["date"] == "2026-03-01T09:30:00+00:00"
+    assert first["tags"] == ["food"]
+
+
+@pytest.mark.asyncio
+async def test_parquet_round_trips():
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    chunks = await _collect(encode_parquet(_batches([_row()], [_row("ALDI")])))
+
+    table = pq.read_table(io.BytesIO(b"".join(chunks)))
+    assert table.column("description").to_pylist() == ["TESCO STORES", "ALDI"]
+
+
+@pytest.mark.asyncio
+async def test_rows_stream_through_a_server_side_cursor():
+    stream = MagicMock()
+
+    async def partitions():
+        yield [_row()]
+
+    stream.partitions = partitions
+    session = AsyncMock()
+    session.stream.return_value = stream
+    factory = MagicMock()
+    factory.return_value.__aenter__.return_value = session
+
+    with patch("app.services.export_service.async_session", factory):
+        batches = await _collect(
+            stream_transaction_rows(uuid.uuid4(), {"search": "tesco"})
+        )
+
+    assert len(batches) == 1
+    query = session.stream.call_args.args[0]
+    assert query.get_execution_options()["yield_per"] == EXPORT_BATCH_SIZE
+    assert "search_vector @@" in str(query)
+
+
+def _make_test_app() -> FastAPI:
+    """Transactions router with a mock session that resolves a user."""
+    test_app = FastAPI()
+    test_app.include_router(router)
+    user = MagicMock()
+    user.id = uuid.uuid4()
+    db = AsyncMock()
+    db.execute.return_value.scalar_one_or_none = MagicMock(return_value=user)
+
+    async def override_get_db():
+        yield db
+
+    test_app.dependency_overrides[get_db] = override_get_db
+    return test_app
+
+
+@pytest.mark.asyncio
+async def test_export_route_streams_filtered_rows():
+    async def rows(user_id, filters):
+        assert filters["search"] == "tesco"
+        yield [_row()]
+
+    with patch("app.routes.transactions.stream_transaction_rows", rows):
+        transport = ASGITransport(app=_make_test_app())
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get(
+                "/api/v1/transactions/export",
+                params={"format": "ndjson", "search": "tesco"},
+            )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert 'filename="transactions.ndjson"' in response.headers["content-disposition"]
+    assert json.loads(response.text)["description"] == "TESCO STORES"
+
+
+@pytest.mark.asyncio
+async def test_parquet_export_needs_pyarrow():
+    with patch("app.routes.transactions.parquet_available", return_value=False):
+        transport = ASGITransport(app=_make_test_app())
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get(
+                "/api/v1/transactions/export", params={"format": "parquet"}
+            )
+
+    assert response.status_code == 400
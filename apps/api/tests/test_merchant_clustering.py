@@ -0,0 +1,51 @@
+from app.ai.merchant_clustering import (
+    assign_merchant_keys,
+    cluster_merchant_keys,
+    normalise_merchant,
+)
+
+
+def test_normalise_drops_reference_numbers_and_punctuation():
+    assert normalise_merchant("NETFLIX.COM 1234") == "netflix com"
+    assert normalise_merchant("1234") == "1234"
+
+
+def test_reference_variants_share_a_cluster():
+    clusters = cluster_merchant_keys(
+        ["netflix.com 1234", "netflix.com 5678", "NETFLIX.COM*9012"]
+    )
+
+    assert set(clusters.values()) == {"netflix com"}
+
+
+def test_distinct_merchants_stay_apart():
+    clusters = cluster_merchant_keys(["netflix", "spotify", "tesco stores", "tesco"])
+
+    assert clusters["netflix"] != clusters["spotify"]
+    assert clusters["tesco"] != clusters["netflix"]
+    assert len(set(clusters.values())) >= 3
+
+
+def test_clusters_many_keys():
+    keys = [
+        f"merchant {chr(97 + i % 26)}{chr(97 + i // 26 % 26)}{i}" for i in range(2000)
+    ]
+    keys += [f"amazon prime {i:04d}" for i in range(50)]
+
+    clusters = cluster_merchant_keys(keys)
+
+    assert {clusters[f"amazon prime {i:04d}"] for i in range(50)} == {"amazon prime"}
+
+
+def test_known_keys_keep_their_cluster_key():
+    known = {"netflix.com 1234": "netflix"}
+
+    assigned = assign_merchant_keys(["netflix.com 1234", "netflix.com 5678"], known)
+
+    assert assigned == {"netflix.com 1234": "netflix", "netflix.com 5678": "netflix"}
+
+
+def test_unseen_keys_without_a_known_match_start_a_cluster():
+    assigned = assign_merchant_keys(["spotify 99"], {"netflix.com 1234": "netflix"})
+
+    assert assigned == {"spotify 99": "spotify"}
@@ -0,0 +1,119 @@
+import random
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from app.ai.periodicity import (
+    FREQUENCIES,
+    MIN_CONFIDENCE,
+    detect_periodicity,
+    pack_ordinals,
+    prefilter_periodicity,
+    score_periodicity,
+)
+from app.models.recurring_group import Frequency
+
+
+def _monthly(months, day=1, year=2025):
+    return [date(year + (m - 1) // 12, (m - 1) % 12 + 1, day) for m in months]
+
+
+def test_pack_ordinals_sorts_and_pads():
+    packed = pack_ordinals([[date(2026, 2, 1), date(2026, 1, 1)], [date(2026, 1, 1)]])
+
+    assert packed.shape == (2, 2)
+    assert packed[0, 0] < packed[0, 1]
+    assert np.isnan(packed[1, 1])
+
+
+def test_detects_every_frequency_in_one_batch():
+    start = date(2024, 1, 1)
+    series = [
+        [start + timedelta(weeks=i) for i in range(6)],
+        _monthly(range(1, 7)),
+        _monthly((1, 4, 7, 10)),
+        [date(2022 + i, 3, 14) for i in range(4)],
+    ]
+
+    results = detect_periodicity(series)
+
+    assert [r.frequency for r in results] == list(FREQUENCIES)
+    assert all(r.confidence >= MIN_CONFIDENCE for r in results)
+
+
+def test_skipped_month_is_still_monthly():
+    """One missed charge used to push the mean gap out of the monthly band."""
+    dates = _monthly((1, 2, 3, 5, 6, 7))
+
+    (result,) = detect_periodicity([dates])
+
+    assert result.frequency == Frequency.monthly
+    assert 28 <= result.period_days <= 31
+
+
+def test_quarterly_is_not_reported_as_monthly_with_skips():
+    (result,) = detect_periodicity([_monthly((1, 4, 7, 10, 13))])
+
+    assert result.frequency == Frequency.quarterly
+
+
+def test_confidence_drops_with_jitter_and_skips():
+    clean = _monthly(range(1, 13))
+    skipped = _monthly((1, 2, 4, 5, 7, 8, 10, 11))
+    jittered = [d + timedelta(days=(-3, 3)[i % 2]) for i, d in enumerate(clean)]
+
+    confidence, _ = score_periodicity(pack_ordinals([clean, skipped, jittered]))
+    monthly = confidence[:, FREQUENCIES.index(Frequency.monthly)]
+
+    assert monthly[0] > monthly[1]
+    assert monthly[0] > monthly[2]
+
+
+def test_irregular_and_short_series_have_no_frequency():
+    irregular = [date(2026, 1, 1), date(2026, 1, 5), date(2026, 3, 20)]
+
+    results = detect_periodicity([irregular, [date(2026, 1, 1)], []])
+
+    assert [r.frequency for r in results] == [None, None, None]
+    assert detect_periodicity([]) == []
+
+
+def test_prefilter_settles_clear_cases_like_the_matrix_pass():
+    rng = random.Random(7)
+    start = date(2024, 1, 1)
+    series = [
+        [start + timedelta(weeks=i) for i in range(8)],
+        _monthly(range(1, 13)),
+        _monthly((1, 2, 3, 5, 6, 7)),
+        [date(2026, 1, 1), date(2026, 1, 2)],
+    ]
+    for _ in range(300):
+        period = rng.choice((7, 30, 91, 365))
+        series.append(
+            [
+                start + timedelta(days=i * period + rng.randint(-6, 6))
+                for i in range(rng.randint(1, 12))
+                if rng.random() > 0.15
+            ]
+        )
+    packed = pack_ordinals(series)
+
+    settled, _, _, _ = prefilter_periodicity(packed)
+    confidence, period_days = score_periodicity(packed)
+    best = confidence.argmax(axis=1)
+    rows = np.arange(len(series))
+
+    assert settled[:2].all() and settled[3] and not settled[2]
+    for result, index, score, period in zip(
+        detect_periodicity(series),
+        best,
+        confidence[rows, best],
+        period_days[rows, best],
+    ):
+        assert result.confidence == pytest.approx(score)
+        if score >= MIN_CONFIDENCE:
+            assert result.frequency == FREQUENCIES[index]
+            assert result.period_days == pytest.approx(period)
+        else:
+            assert result.frequency is None
@@ -0,0 +1,171 @@
+from datetime import date
+from decimal import Decimal
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.dialects.postgresql import asyncpg
+
+from app.ai.recurring_monitor import process_new_transactions, sweep_missed_payments
+from app.models.recurring_alert import AlertKind
+from app.models.recurring_group import Frequency, RecurringType
+
+
+def _group(amount, last_seen=None, kind=RecurringType.subscription, key="netflix"):
+    group = MagicMock()
+    group.id = uuid4()
+    group.merchant_key = key
+    group.estimated_amount = Decimal(amount)
+    group.last_seen_date = last_seen
+    group.frequency = Frequency.monthly
+    group.type = kind
+    return group
+
+
+def _db(charges, groups=(), assignments=()):
+    """A session returning new charges, cluster assignments, then groups."""
+    charge_rows = MagicMock()
+    charge_rows.all.return_value = charges
+    assignment_rows = MagicMock()
+    assignment_rows.all.return_value = list(assignments)
+    group_rows = MagicMock()
+    group_rows.scalars.return_value.all.return_value = list(groups)
+    db = AsyncMock()
+    db.execute.side_effect = [
+        charge_rows,
+        assignment_rows,
+        group_rows,
+        MagicMock(),
+        MagicMock(),
+        MagicMock(),
+    ]
+    return db
+
+
+def _sql(db, index):
+    statement = db.execute.call_args_list[index].args[0]
+    return statement.compile(dialect=asyncpg.dialect())
+
+
+@pytest.mark.asyncio
+async def test_price_rise_raises_alert_and_updates_group():
+    group = _group("9.99", last_seen=date(2026, 2, 1))
+    txn_id = uuid4()
+    db = _db([(txn_id, date(2026, 3, 1), Decimal("12.99"), "netflix")], [group])
+
+    alerts = await process_new_transactions(db, uuid4(), [txn_id])
+
+    assert [a["kind"] for a in alerts] == [AlertKind.price_change]
+    assert alerts[0]["previous_amount"] == Decimal("9.99")
+    assert alerts[0]["new_amount"] == Decimal("12.99")
+    group_update = _sql(db, 3)
+    assert str(group_update).startswith("UPDATE recurring_groups SET")
+    assert date(2026, 4, 1) in group_update.params.values()
+    assert str(_sql(db, 4)).startswith("UPDATE transactions SET")
+    assert "ON CONFLICT" in str(_sql(db, 5))
+
+
+@pytest.mark.asyncio
+async def test_rise_within_tolerance_keeps_estimate_without_alert():
+    group = _group("9.99", last_seen=date(2026, 2, 1))
+    txn_id = uuid4()
+    db = _db([(txn_id, date(2026, 3, 1), Decimal("10.49"), "netflix")], [group])
+
+    assert await process_new_transactions(db, uuid4(), [txn_id]) == []
+
+    group_update = _sql(db, 3).params.values()
+    assert Decimal("10.49") in group_update
+    assert Decimal("9.99") in group_update
+
+
+@pytest.mark.asyncio
+async def test_charge_outside_the_groups_amounts_is_not_linked():
+    """A one-off purchase from a subscription's merchant is left alone."""
+    group = _group("8.99", last_seen=date(2026, 2, 1))
+    db = _db(
+        [
+            (uuid4(), date(2026, 3, 1), Decimal("200.00"), "netflix"),
+            (uuid4(), date(2026, 3, 2), Decimal("1.50"), "netflix"),
+        ],
+        [group],
+    )
+
+    assert await process_new_transactions(db, uuid4(), [uuid4()]) == []
+    assert db.execute.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_merchant_variant_matches_its_clusters_group():
+    """A new reference-number variant is matched through the user's clusters."""
+    group = _group("15.99", last_seen=date(2026, 2, 1), key="netflix com")
+    txn_id = uuid4()
+    db = _db(
+        [(txn_id, date(2026, 3, 1), Decimal("15.99"), "netflix.com 5678")],
+        [group],
+        assignments=[("netflix.com 1234", "netflix com")],
+    )
+
+    assert await process_new_transactions(db, uuid4(), [txn_id]) == []
+
+    group_query = _sql(db, 2)
+    assert "recurring_groups.merchant_key IN" in str(group_query)
+    assert "netflix com" in group_query.params["merchant_key_1"]
+    assert group.id in _sql(db, 3).params.values()
+
+
+@pytest.mark.asyncio
+async def test_charge_goes_to_closest_group_of_merchant():
+    icloud, app = _group("2.99"), _group("9.99")
+    txn_id = uuid4()
+    db = _db([(txn_id, date(2026, 3, 3), Decimal("2.99"), "netflix")], [icloud, app])
+
+    assert await process_new_transactions(db, uuid4(), [txn_id]) == []
+
+    group_update = _sql(db, 3).params.values()
+    assert icloud.id in group_update and app.id not in group_update
+
+
+@pytest.mark.asyncio
+async def test_older_charge_is_linked_only():
+    group = _group("9.99", last_seen=date(2026, 3, 1))
+    txn_id = uuid4()
+    db = _db([(txn_id, date(2026, 1, 1), Decimal("12.00"), "netflix")], [group])
+
+    assert await process_new_transactions(db, uuid4(), [txn_id]) == []
+
+    # selects, then straight to linking: no group update and no alert
+    assert db.execute.await_count == 4
+    assert str(_sql(db, 3)).startswith("UPDATE transactions SET")
+
+
+@pytest.mark.asyncio
+async def test_salary_rise_is_not_a_price_change():
+    group = _group("3000.00", kind=RecurringType.salary)
+    txn_id = uuid4()
+    db = _db([(txn_id, date(2026, 3, 28), Decimal("3100.00"), "netflix")], [group])
+
+    assert await process_new_transactions(db, uuid4(), [txn_id]) == []
+
+
+@pytest.mark.asyncio
+async def test_unmatched_or_empty_input_writes_nothing():
+    db = _db([])
+    assert await process_new_transactions(db, uuid4(), [uuid4()]) == []
+    db.execute.assert_awaited_once()
+
+    db = AsyncMock()
+    assert await process_new_transactions(db, uuid4(), []) == []
+    db.execute.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_sweep_is_a_single_insert_select():
+    db = AsyncMock()
+    db.execute.return_value = MagicMock(rowcount=3)
+
+    assert await sweep_missed_payments(db, date(2026, 10, 19)) == 3
+
+    sql = str(_sql(db, 0))
+    assert sql.startswith("INSERT INTO recurring_alerts")
+    assert "FROM recurring_groups" in sql
+    assert "ON CONFLICT (recurring_group_id, kind, expected_date) DO NOTHING" in sql
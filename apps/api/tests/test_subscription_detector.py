@@ -1,323 +1,582 @@
 import pytest
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import astuple
+from datetime import date, datetime, timedelta
 from decimal import Decimal
+from types import SimpleNamespace
 from unittest.mock import AsyncMock, MagicMock
 from uuid import uuid4
 
+from sqlalchemy.dialects.postgresql import asyncpg
+
+from app.ai.base import TransactionRecord
 from app.ai.subscription_detector import (
-    _detect_frequency,
-    _predict_next_date,
-    detect_subscriptions,
+    RECENT_WINDOW,
+    _amount_clusters,
+    _detect_partition,
+    _evaluate_states,
+    _fold_into_state,
+    _recurring_type,
+    _states_from_summaries,
+    _stream_user_batches,
+    detect_subscriptions_fleet,
+    detect_subscriptions_incremental,
 )
-from app.models.recurring_group import Frequency
-
-
-class TestDetectFrequency:
-    def test_weekly(self):
-        dates = [
-            datetime(2026, 1, 1).date(),
-            datetime(2026, 1, 8).date(),
-            datetime(2026, 1, 15).date(),
-        ]
-        assert _detect_frequency(dates) == Frequency.weekly
-
-    def test_monthly(self):
-        dates = [
-            datetime(2026, 1, 1).date(),
-            datetime(2026, 2, 1).date(),
-            datetime(2026, 3, 1).date(),
-        ]
-        assert _detect_frequency(dates) == Frequency.monthly
+from app.models.detector_state import DetectorState
+from app.models.recurring_group import Frequency, RecurringType
+from app.models.transaction import Transaction
 
-    def test_quarterly(self):
-        dates = [
-            datetime(2026, 1, 1).date(),
-            datetime(2026, 4, 1).date(),
-            datetime(2026, 7, 1).date(),
-        ]
-        assert _detect_frequency(dates) == Frequency.quarterly
 
-    def test_annual(self):
-        dates = [
-            datetime(2024, 1, 1).date(),
-            datetime(2025, 1, 1).date(),
-            datetime(2026, 1, 1).date(),
-        ]
-        assert _detect_frequency(dates) == Frequency.annual
+class TestAmountClusters:
+    def test_splits_distinct_price_points(self):
+        amounts = [Decimal(a) for a in ("2.99", "9.99", "2.99", "9.99", "3.09")]
+        assert _amount_clusters(amounts) == [[0, 2, 4], [1, 3]]
 
-    def test_insufficient_dates(self):
-        assert _detect_frequency([datetime(2026, 1, 1).date()]) is None
-
-    def test_irregular_returns_none(self):
-        dates = [
-            datetime(2026, 1, 1).date(),
-            datetime(2026, 1, 5).date(),
-            datetime(2026, 3, 20).date(),
-        ]
-        assert _detect_frequency(dates) is None
+    def test_keeps_small_price_rise_together(self):
+        amounts = [Decimal(a) for a in ("9.99", "9.99", "10.99", "10.99")]
+        assert _amount_clusters(amounts) == [[0, 1, 2, 3]]
 
+    def test_empty(self):
+        assert _amount_clusters([]) == []
 
-class TestPredictNextDate:
-    def test_monthly_prediction(self):
-        dates = [datetime(2026, 1, 15).date(), datetime(2026, 2, 15).date()]
-        result = _predict_next_date(dates, Frequency.monthly)
-        assert result == datetime(2026, 2, 15).date() + timedelta(days=30)
 
-    def test_weekly_prediction(self):
-        dates = [datetime(2026, 1, 1).date(), datetime(2026, 1, 8).date()]
-        result = _predict_next_date(dates, Frequency.weekly)
-        assert result == datetime(2026, 1, 8).date() + timedelta(days=7)
+def test_recurring_type_from_merchant_key():
+    assert _recurring_type("council tax") == RecurringType.direct_debit
+    assert _recurring_type("acme salary") == RecurringType.salary
+    assert _recurring_type("netflix") == RecurringType.subscription
 
-    def test_quarterly_prediction(self):
-        dates = [datetime(2026, 1, 1).date(), datetime(2026, 4, 1).date()]
-        result = _predict_next_date(dates, Frequency.quarterly)
-        assert result == datetime(2026, 4, 1).date() + timedelta(days=91)
 
-    def test_annual_prediction(self):
-        dates = [datetime(2025, 1, 1).date(), datetime(2026, 1, 1).date()]
-        result = _predict_next_date(dates, Frequency.annual)
-        assert result == datetime(2026, 1, 1).date() + timedelta(days=365)
+# Ingest horizon returned by the mocked pg_stat_activity query
+HORIZON = datetime(2026, 10, 19)
 
 
-class TestDetectSubscriptions:
-    """Test the full detect_subscriptions function with mock DB."""
+class TestIncrementalState:
+    """Folding new transactions into DetectorState and evaluating it."""
 
     def _make_transaction(
-        self,
-        merchant_name: str,
-        amount: Decimal,
-        txn_date: datetime,
-        description: str = "Payment",
+        self, amount: Decimal, txn_date: datetime, merchant="Netflix"
     ):
-        """Create a mock Transaction object."""
-        txn = MagicMock()
-        txn.merchant_name = merchant_name
-        txn.description = description
-        txn.amount = amount
-        txn.date = txn_date
-        txn.is_recurring = False
-        txn.recurring_group_id = None
-        return txn
+        return TransactionRecord(
+            id=uuid4(),
+            date=txn_date,
+            amount=amount,
+            merchant_name=merchant,
+            description="Payment",
+            category_id=None,
+            ai_confidence=None,
+            created_at=txn_date + timedelta(days=1),
+        )
+
+    def _new_state(self):
+        return DetectorState(
+            user_id=uuid4(), merchant_key="netflix", txn_count=0, watermark=None
+        )
+
+    def test_fold_matches_full_history_stats(self):
+        """Folding in two runs gives the same stats as one pass over everything."""
+        txns = [
+            self._make_transaction(Decimal("-15.99"), datetime(2026, m, 1))
+            for m in (1, 2, 3, 4)
+        ]
+        state = self._new_state()
+
+        _fold_into_state(state, txns[:2])
+        _fold_into_state(state, txns[2:])
+
+        assert state.txn_count == 4
+        assert state.first_date == datetime(2026, 1, 1).date()
+        assert state.last_date == datetime(2026, 4, 1).date()
+        assert state.amount_total == Decimal("63.96")
+        assert state.recent_dates == [t.date.date() for t in txns]
+
+    def test_fold_handles_out_of_order_history(self):
+        """An import of older rows extends first_date without moving last_date."""
+        state = self._new_state()
+        _fold_into_state(
+            state, [self._make_transaction(Decimal("-9.99"), datetime(2026, 3, 1))]
+        )
+        older = self._make_transaction(Decimal("-9.99"), datetime(2026, 1, 1))
+        older.merchant_name = "Old Name"
+
+        _fold_into_state(state, [older])
+
+        assert state.first_date == datetime(2026, 1, 1).date()
+        assert state.last_date == datetime(2026, 3, 1).date()
+        assert state.merchant_name == "Netflix"
+        assert state.recent_dates[0] == datetime(2026, 1, 1).date()
+
+    def test_recent_window_is_bounded(self):
+        state = self._new_state()
+        start = datetime(2024, 1, 1)
+        _fold_into_state(
+            state,
+            [
+                self._make_transaction(Decimal("-5.00"), start + timedelta(weeks=i))
+                for i in range(RECENT_WINDOW + 10)
+            ],
+        )
+
+        assert len(state.recent_dates) == RECENT_WINDOW
+        assert len(state.recent_amounts) == RECENT_WINDOW
+        assert state.txn_count == RECENT_WINDOW + 10
+
+    def test_evaluate_detects_monthly(self):
+        state = self._new_state()
+        _fold_into_state(
+            state,
+            [
+                self._make_transaction(Decimal("-15.99"), datetime(2026, m, 1))
+                for m in (1, 2, 3)
+            ],
+        )
+
+        (detection,) = _evaluate_states([state])[0]
+
+        assert detection.frequency == Frequency.monthly
+        assert detection.next_date == datetime(2026, 4, 1).date()
+        assert detection.amount == Decimal("15.99")
+
+    def test_evaluate_needs_three_consistent_charges(self):
+        state = self._new_state()
+        _fold_into_state(
+            state,
+            [
+                self._make_transaction(Decimal("-15.99"), datetime(2026, 1, 1)),
+                self._make_transaction(Decimal("-15.99"), datetime(2026, 2, 1)),
+            ],
+        )
+        assert _evaluate_states([state])[0] == []
+
+        _fold_into_state(
+            state, [self._make_transaction(Decimal("-99.00"), datetime(2026, 3, 1))]
+        )
+        assert _evaluate_states([state])[0] == []
+
+    def _summary(self, txns, merchant_key="netflix"):
+        """A _merchant_summaries row (newest-first recent arrays) for txns."""
+        amounts = [abs(t.amount) for t in txns]
+        days = [t.date.date() for t in txns]
+        return SimpleNamespace(
+            merchant_key=merchant_key,
+            merchant_name=txns[-1].merchant_name,
+            txn_count=len(txns),
+            first_date=min(days),
+            last_date=max(days),
+            amount_total=sum(amounts),
+            amount_min=min(amounts),
+            amount_max=max(amounts),
+            recent_dates=sorted(days, reverse=True),
+            recent_amounts=amounts[::-1],
+        )
+
+    def test_evaluate_splits_recent_charges_by_amount(self):
+        state = self._new_state()
+        _fold_into_state(
+            state,
+            [
+                self._make_transaction(Decimal(amount), datetime(2026, m, day))
+                for m in (1, 2, 3)
+                for amount, day in (("-2.99", 3), ("-9.99", 12))
+            ],
+        )
+
+        detections = _evaluate_states([state])[0]
+
+        assert [(d.amount_low, d.amount_high) for d in detections] == [
+            (Decimal("2.99"), Decimal("2.99")),
+            (Decimal("9.99"), Decimal("9.99")),
+        ]
+        assert detections[1].next_date == datetime(2026, 4, 12).date()
 
     @pytest.mark.asyncio
-    async def test_detects_monthly_subscription(self):
-        """Should detect a monthly subscription from 3 similar transactions."""
+    async def test_first_run_seeds_state_from_summaries(self):
+        """Without a watermark, state comes from SQL summaries, not ORM rows."""
         user_id = uuid4()
-        transactions = [
-            self._make_transaction("Netflix", Decimal("-15.99"), datetime(2026, 1, 1)),
-            self._make_transaction("Netflix", Decimal("-15.99"), datetime(2026, 2, 1)),
-            self._make_transaction("Netflix", Decimal("-15.99"), datetime(2026, 3, 1)),
+        txns = [
+            self._make_transaction(Decimal("-15.99"), datetime(2026, m, 1))
+            for m in (1, 2, 3)
         ]
+        summaries = MagicMock()
+        summaries.all.return_value = [self._summary(txns)]
+        no_groups = MagicMock()
+        no_groups.scalars.return_value.all.return_value = []
 
         db = AsyncMock()
-        # Mock the existing group check to return None (no existing group)
-        result_mock = MagicMock()
-        result_mock.scalar_one_or_none.return_value = None
-        db.execute.return_value = result_mock
+        db.add = MagicMock()
+        db.scalar.side_effect = [None, HORIZON]
+        db.execute.side_effect = [summaries, no_groups, MagicMock(), MagicMock()]
 
-        groups = await detect_subscriptions(db, user_id, transactions)
+        groups = await detect_subscriptions_incremental(db, user_id)
 
-        assert len(groups) == 1
-        assert groups[0].name == "Netflix"
+        assert [g.name for g in groups] == ["Netflix"]
+        assert groups[0].merchant_key == "netflix"
         assert groups[0].frequency == Frequency.monthly
-        assert groups[0].estimated_amount == Decimal("15.99")
+        (state,) = [c.args[0] for c in db.add.call_args_list]
+        assert isinstance(state, DetectorState) and state.txn_count == 3
+        assert state.recent_dates == [t.date.date() for t in txns]
+        summary_sql = str(
+            db.execute.call_args_list[0].args[0].compile(dialect=asyncpg.dialect())
+        )
+        assert "GROUP BY" in summary_sql and "HAVING" not in summary_sql
+        assert "transactions.created_at <" in summary_sql
+        assert state.watermark == HORIZON
+        assert db.execute.call_args_list[-2].args[0].is_insert
+        assert db.execute.call_args_list[-1].args[0].is_update
 
     @pytest.mark.asyncio
-    async def test_skips_when_too_few_transactions(self):
-        """Should not detect a subscription from fewer than 3 transactions."""
+    async def test_incremental_run_seeds_unknown_merchant_from_history(self):
+        """A merchant without state is summarised once, not folded twice."""
         user_id = uuid4()
-        transactions = [
-            self._make_transaction("Netflix", Decimal("-15.99"), datetime(2026, 1, 1)),
-            self._make_transaction("Netflix", Decimal("-15.99"), datetime(2026, 2, 1)),
+        txns = [
+            self._make_transaction(Decimal("-15.99"), datetime(2026, m, 1))
+            for m in (1, 2, 3)
         ]
 
-        db = AsyncMock()
-        groups = await detect_subscriptions(db, user_id, transactions)
-
-        assert len(groups) == 0
+        new_rows = MagicMock()
+        new_rows.all.return_value = [(*astuple(txns[-1]), "netflix")]
+        no_assignments = MagicMock()
+        no_assignments.all.return_value = []
+        no_states = MagicMock()
+        no_states.scalars.return_value.all.return_value = []
+        summaries = MagicMock()
+        summaries.all.return_value = [self._summary(txns)]
 
-    @pytest.mark.asyncio
-    async def test_skips_inconsistent_amounts(self):
-        """Should skip if amounts vary too much."""
-        user_id = uuid4()
-        transactions = [
-            self._make_transaction(
-                "Random Shop", Decimal("-10.00"), datetime(2026, 1, 1)
-            ),
-            self._make_transaction(
-                "Random Shop", Decimal("-50.00"), datetime(2026, 2, 1)
-            ),
-            self._make_transaction(
-                "Random Shop", Decimal("-100.00"), datetime(2026, 3, 1)
-            ),
+        db = AsyncMock()
+        db.add = MagicMock()
+        db.scalar.side_effect = [datetime(2026, 2, 2), HORIZON]
+        db.execute.side_effect = [
+            new_rows,
+            no_assignments,
+            no_states,
+            summaries,
+            no_states,
+            MagicMock(),
+            MagicMock(),
         ]
 
-        db = AsyncMock()
-        groups = await detect_subscriptions(db, user_id, transactions)
+        groups = await detect_subscriptions_incremental(db, user_id)
 
-        assert len(groups) == 0
+        assert [g.name for g in groups] == ["Netflix"]
+        (state,) = [c.args[0] for c in db.add.call_args_list]
+        assert state.txn_count == 3
 
     @pytest.mark.asyncio
-    async def test_skips_irregular_frequency(self):
-        """Should skip if dates don't match a known frequency."""
+    async def test_incremental_run_folds_into_existing_state(self):
         user_id = uuid4()
-        transactions = [
-            self._make_transaction("Random", Decimal("-10.00"), datetime(2026, 1, 1)),
-            self._make_transaction("Random", Decimal("-10.00"), datetime(2026, 1, 5)),
-            self._make_transaction("Random", Decimal("-10.00"), datetime(2026, 3, 20)),
+        txns = [
+            self._make_transaction(Decimal("-15.99"), datetime(2026, m, 1))
+            for m in (1, 2, 3)
         ]
+        state = self._new_state()
+        state.merchant_keys = ["netflix"]
+        _fold_into_state(state, txns[:2])
+
+        new_rows = MagicMock()
+        new_rows.all.return_value = [(*astuple(txns[-1]), "netflix")]
+        assignments = MagicMock()
+        assignments.all.return_value = [("netflix", "netflix")]
+        states = MagicMock()
+        states.scalars.return_value.all.return_value = [state]
+        no_groups = MagicMock()
+        no_groups.scalars.return_value.all.return_value = []
 
         db = AsyncMock()
-        result_mock = MagicMock()
-        result_mock.scalar_one_or_none.return_value = None
-        db.execute.return_value = result_mock
-
-        groups = await detect_subscriptions(db, user_id, transactions)
+        db.add = MagicMock()
+        db.scalar.side_effect = [txns[1].created_at, HORIZON]
+        db.execute.side_effect = [
+            new_rows,
+            assignments,
+            states,
+            no_groups,
+            MagicMock(),
+            MagicMock(),
+        ]
 
-        assert len(groups) == 0
+        groups = await detect_subscriptions_incremental(db, user_id)
+
+        assert [g.name for g in groups] == ["Netflix"]
+        assert state.txn_count == 3
+        assert state.watermark == HORIZON
+        db.add.assert_not_called()
+        new_rows_sql = str(
+            db.execute.call_args_list[0].args[0].compile(dialect=asyncpg.dialect())
+        )
+        assert "transactions.created_at >=" in new_rows_sql
+        assert "transactions.created_at <" in new_rows_sql
+        horizon_sql = str(
+            db.scalar.call_args_list[1].args[0].compile(dialect=asyncpg.dialect())
+        )
+        assert "pg_stat_activity" in horizon_sql
 
     @pytest.mark.asyncio
-    async def test_skips_existing_group(self):
-        """Should not create a duplicate if RecurringGroup already exists."""
+    async def test_incremental_run_folds_merchant_variant_into_its_cluster(self):
+        """A new reference-number variant joins the existing cluster's state."""
         user_id = uuid4()
-        transactions = [
-            self._make_transaction("Netflix", Decimal("-15.99"), datetime(2026, 1, 1)),
-            self._make_transaction("Netflix", Decimal("-15.99"), datetime(2026, 2, 1)),
-            self._make_transaction("Netflix", Decimal("-15.99"), datetime(2026, 3, 1)),
+        txns = [
+            self._make_transaction(
+                Decimal("-15.99"), datetime(2026, m, 1), merchant=f"NETFLIX.COM {m}"
+            )
+            for m in (1, 2, 3)
         ]
+        state = DetectorState(
+            user_id=user_id,
+            merchant_key="netflix com",
+            merchant_keys=["netflix.com 1", "netflix.com 2"],
+            txn_count=0,
+            watermark=None,
+        )
+        _fold_into_state(state, txns[:2])
+
+        new_rows = MagicMock()
+        new_rows.all.return_value = [(*astuple(txns[-1]), "netflix.com 3")]
+        assignments = MagicMock()
+        assignments.all.return_value = [
+            ("netflix.com 1", "netflix com"),
+            ("netflix.com 2", "netflix com"),
+        ]
+        states = MagicMock()
+        states.scalars.return_value.all.return_value = [state]
+        no_groups = MagicMock()
+        no_groups.scalars.return_value.all.return_value = []
 
         db = AsyncMock()
-        # Simulate existing group found
-        existing_group = MagicMock()
-        result_mock = MagicMock()
-        result_mock.scalar_one_or_none.return_value = existing_group
-        db.execute.return_value = result_mock
-
-        groups = await detect_subscriptions(db, user_id, transactions)
+        db.add = MagicMock()
+        db.scalar.side_effect = [txns[1].created_at, HORIZON]
+        db.execute.side_effect = [
+            new_rows,
+            assignments,
+            states,
+            no_groups,
+            MagicMock(),
+            MagicMock(),
+        ]
 
-        assert len(groups) == 0
+        groups = await detect_subscriptions_incremental(db, user_id)
 
-    @pytest.mark.asyncio
-    async def test_detects_direct_debit_type(self):
-        """Should classify council/water/electric/gas as direct_debit."""
+        assert len(groups) == 1
+        assert state.txn_count == 3
+        assert state.merchant_keys == [
+            "netflix.com 1",
+            "netflix.com 2",
+            "netflix.com 3",
+        ]
+        db.add.assert_not_called()
+        link_params = (
+            db.execute.call_args_list[-1].args[0].compile(dialect=asyncpg.dialect())
+        ).params
+        linked = {value for value in link_params.values() if isinstance(value, str)}
+        assert linked == {"netflix.com 1", "netflix.com 2", "netflix.com 3"}
+
+    def test_first_run_merges_merchant_variants_into_one_state(self):
         user_id = uuid4()
-        transactions = [
-            self._make_transaction(
-                "Council Tax", Decimal("-150.00"), datetime(2026, 1, 1)
-            ),
+        first = [
             self._make_transaction(
-                "Council Tax", Decimal("-150.00"), datetime(2026, 2, 1)
-            ),
+                Decimal("-15.99"), datetime(2026, m, 1), merchant="NETFLIX.COM 1234"
+            )
+            for m in (1, 3)
+        ]
+        second = [
             self._make_transaction(
-                "Council Tax", Decimal("-150.00"), datetime(2026, 3, 1)
-            ),
+                Decimal("-15.99"), datetime(2026, 2, 1), merchant="NETFLIX.COM 5678"
+            )
+        ]
+        summaries = [
+            self._summary(first, merchant_key="netflix.com 1234"),
+            self._summary(second, merchant_key="netflix.com 5678"),
         ]
 
+        states = _states_from_summaries(
+            user_id,
+            summaries,
+            {"netflix.com 1234": "netflix com", "netflix.com 5678": "netflix com"},
+            HORIZON,
+        )
+
+        state = states["netflix com"]
+        assert state.merchant_keys == ["netflix.com 1234", "netflix.com 5678"]
+        assert state.txn_count == 3
+        assert state.merchant_name == "NETFLIX.COM 1234"
+        assert state.recent_dates == [date(2026, m, 1) for m in (1, 2, 3)]
+        (detection,) = _evaluate_states([state])[0]
+        assert detection.frequency == Frequency.monthly
+
+    @pytest.mark.asyncio
+    async def test_incremental_run_without_new_rows_is_noop(self):
+        no_rows = MagicMock()
+        no_rows.all.return_value = []
         db = AsyncMock()
-        result_mock = MagicMock()
-        result_mock.scalar_one_or_none.return_value = None
-        db.execute.return_value = result_mock
+        db.scalar.side_effect = [datetime(2026, 3, 2), HORIZON]
+        db.execute.return_value = no_rows
 
-        groups = await detect_subscriptions(db, user_id, transactions)
+        assert await detect_subscriptions_incremental(db, uuid4()) == []
+        db.execute.assert_awaited_once()
 
-        assert len(groups) == 1
-        assert groups[0].type == "direct_debit"
 
-    @pytest.mark.asyncio
-    async def test_detects_salary_type(self):
-        """Should classify salary/wages/pay as salary."""
-        user_id = uuid4()
-        transactions = [
-            self._make_transaction(
-                "ACME Salary", Decimal("3000.00"), datetime(2026, 1, 28)
-            ),
-            self._make_transaction(
-                "ACME Salary", Decimal("3000.00"), datetime(2026, 2, 28)
-            ),
-            self._make_transaction(
-                "ACME Salary", Decimal("3000.00"), datetime(2026, 3, 28)
-            ),
-        ]
+class _AsyncRows:
+    """Async-iterable stand-in for the AsyncResult of AsyncSession.stream."""
 
-        db = AsyncMock()
-        result_mock = MagicMock()
-        result_mock.scalar_one_or_none.return_value = None
-        db.execute.return_value = result_mock
+    def __init__(self, rows):
+        self.rows = iter(rows)
 
-        groups = await detect_subscriptions(db, user_id, transactions)
+    def __aiter__(self):
+        return self
 
-        assert len(groups) == 1
-        assert groups[0].type == "salary"
+    async def __anext__(self):
+        try:
+            return next(self.rows)
+        except StopIteration:
+            raise StopAsyncIteration from None
 
-    @pytest.mark.asyncio
-    async def test_multiple_subscriptions_detected(self):
-        """Should detect multiple different subscriptions."""
-        user_id = uuid4()
-        transactions = [
-            # Netflix - monthly
-            self._make_transaction("Netflix", Decimal("-15.99"), datetime(2026, 1, 1)),
-            self._make_transaction("Netflix", Decimal("-15.99"), datetime(2026, 2, 1)),
-            self._make_transaction("Netflix", Decimal("-15.99"), datetime(2026, 3, 1)),
-            # Spotify - monthly
-            self._make_transaction("Spotify", Decimal("-9.99"), datetime(2026, 1, 15)),
-            self._make_transaction("Spotify", Decimal("-9.99"), datetime(2026, 2, 15)),
-            self._make_transaction("Spotify", Decimal("-9.99"), datetime(2026, 3, 15)),
-        ]
 
-        db = AsyncMock()
-        result_mock = MagicMock()
-        result_mock.scalar_one_or_none.return_value = None
-        db.execute.return_value = result_mock
+class TestFleetDetection:
+    """Detection for every user in one job."""
 
-        groups = await detect_subscriptions(db, user_id, transactions)
+    def _rows(self, merchant, amount, months):
+        return [
+            (merchant.lower(), merchant, date(2026, m, 1), Decimal(amount))
+            for m in months
+        ]
 
-        assert len(groups) == 2
-        names = {g.name for g in groups}
-        assert "Netflix" in names
-        assert "Spotify" in names
+    def test_partition_detects_per_user_series(self):
+        alice, bob = uuid4(), uuid4()
+        partition = [
+            (alice, self._rows("Netflix", "15.99", (1, 2, 3)), {}),
+            (
+                bob,
+                self._rows("Gym", "30.00", (1, 2, 3)) + self._rows("Cafe", "3", (1,)),
+                {},
+            ),
+        ]
 
-    @pytest.mark.asyncio
-    async def test_uses_description_when_no_merchant(self):
-        """Should fall back to description for grouping when merchant_name is None."""
-        user_id = uuid4()
-        transactions = [
-            self._make_transaction(
-                None, Decimal("-15.99"), datetime(2026, 1, 1), description="NETFLIX"
+        results = _detect_partition(partition)
+
+        assert [(user, key, keys) for user, key, keys, _, _ in results] == [
+            (alice, "netflix", ["netflix"]),
+            (bob, "gym", ["gym"]),
+        ]
+        assert results[1][4].frequency == Frequency.monthly
+        assert results[1][4].next_date == date(2026, 4, 1)
+
+    def test_partition_clusters_similar_merchant_keys(self):
+        user = uuid4()
+        rows = [
+            (
+                "netflix.com 1234",
+                "NETFLIX.COM 1234",
+                date(2026, 1, 1),
+                Decimal("15.99"),
             ),
-            self._make_transaction(
-                None, Decimal("-15.99"), datetime(2026, 2, 1), description="NETFLIX"
+            (
+                "netflix.com 5678",
+                "NETFLIX.COM 5678",
+                date(2026, 2, 1),
+                Decimal("15.99"),
             ),
-            self._make_transaction(
-                None, Decimal("-15.99"), datetime(2026, 3, 1), description="NETFLIX"
+            (
+                "netflix.com 1234",
+                "NETFLIX.COM 1234",
+                date(2026, 3, 1),
+                Decimal("15.99"),
             ),
         ]
 
-        db = AsyncMock()
-        result_mock = MagicMock()
-        result_mock.scalar_one_or_none.return_value = None
-        db.execute.return_value = result_mock
+        ((_, key, keys, merchant_name, detection),) = _detect_partition(
+            [(user, rows, {})]
+        )
 
-        groups = await detect_subscriptions(db, user_id, transactions)
+        assert key == "netflix com"
+        assert keys == ["netflix.com 1234", "netflix.com 5678"]
+        assert merchant_name == "NETFLIX.COM 1234"
+        assert detection.frequency == Frequency.monthly
 
-        assert len(groups) == 1
-        assert groups[0].name == "NETFLIX"
+        # A cluster key already assigned by DetectorState is kept
+        ((_, key, *_),) = _detect_partition(
+            [(user, rows, {"netflix.com 1234": "netflix"})]
+        )
+        assert key == "netflix"
 
     @pytest.mark.asyncio
-    async def test_marks_transactions_as_recurring(self):
-        """Should set is_recurring=True on matched transactions."""
-        user_id = uuid4()
-        transactions = [
-            self._make_transaction("Netflix", Decimal("-15.99"), datetime(2026, 1, 1)),
-            self._make_transaction("Netflix", Decimal("-15.99"), datetime(2026, 2, 1)),
-            self._make_transaction("Netflix", Decimal("-15.99"), datetime(2026, 3, 1)),
+    async def test_streamed_batches_hold_whole_users(self):
+        alice, bob, carol = uuid4(), uuid4(), uuid4()
+        rows = [
+            (user, *row)
+            for user, months in ((alice, (1, 2, 3)), (bob, (1,)), (carol, (1, 2)))
+            for row in self._rows("Gym", "30.00", months)
         ]
-
         db = AsyncMock()
-        result_mock = MagicMock()
-        result_mock.scalar_one_or_none.return_value = None
-        db.execute.return_value = result_mock
+        db.stream.return_value = _AsyncRows(rows)
+        known = {bob: {"gym": "gym"}}
+
+        batches = [
+            batch
+            async for batch in _stream_user_batches(
+                db, [alice, bob, carol], known, rows_per_batch=4
+            )
+        ]
 
-        await detect_subscriptions(db, user_id, transactions)
+        assert [[(user, len(rows)) for user, rows, _ in b] for b in batches] == [
+            [(alice, 3), (bob, 1)],
+            [(carol, 2)],
+        ]
+        assert batches[0][1][2] == {"gym": "gym"}
 
-        for txn in transactions:
-            assert txn.is_recurring is True
+    @pytest.mark.asyncio
+    async def test_fleet_pages_users_and_writes_in_bulk(self):
+        first_page = [uuid4(), uuid4()]
+        user_ids = MagicMock()
+        user_ids.scalars.return_value.all.return_value = first_page
+        txns = [
+            (user, *row)
+            for user in first_page
+            for row in self._rows("Netflix", "15.99", (1, 2, 3))
+        ]
+        no_assignments = MagicMock()
+        no_assignments.all.return_value = []
+        existing = MagicMock()
+        netflix = MagicMock(
+            user_id=first_page[0],
+            merchant_key="netflix",
+            estimated_amount=Decimal("15.99"),
+        )
+        existing.scalars.return_value.all.return_value = [netflix]
+        last_page = MagicMock()
+        last_page.scalars.return_value.all.return_value = []
+
+        db = AsyncMock()
+        db.sync_session.info = {}
+        db.execute.side_effect = [
+            user_ids,
+            no_assignments,
+            existing,
+            MagicMock(),
+            MagicMock(),
+            last_page,
+        ]
+        db.stream.return_value = _AsyncRows(txns)
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            created = await detect_subscriptions_fleet(
+                db, pool, partitions=2, users_per_page=2, rows_per_batch=3
+            )
+
+        # The first user's cluster already has its group
+        assert created == 1
+        streamed = db.stream.call_args.args[0]
+        assert streamed.get_execution_options()["yield_per"] == 3
+        assert "ORDER BY transactions.user_id, transactions.date" in str(
+            streamed.compile(dialect=asyncpg.dialect())
+        )
+        statements = [call.args[0] for call in db.execute.call_args_list]
+        assert statements[3].is_insert
+        assert statements[4].is_update
+        assert "users.id >" in str(statements[5].compile(dialect=asyncpg.dialect()))
+        db.commit.assert_awaited_once()
+        assert db.sync_session.info["changed_user_ids"] == {first_page[1]}
+
+
+def test_transaction_created_at_comes_from_the_database_clock():
+    """The ingest horizon compares created_at with pg_stat_activity.xact_start."""
+    created_at = Transaction.__table__.c.created_at
+
+    assert created_at.default is None
+    assert "now()" in str(created_at.server_default.arg)
@@ -0,0 +1,85 @@
+from datetime import date
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.dialects.postgresql import asyncpg
+
+from app.models.recurring_group import Frequency, RecurringStatus
+from app.services.subscription_service import (
+    dismiss_subscription,
+    refresh_next_expected_dates,
+)
+
+
+def _rows(*rows):
+    result = MagicMock()
+    result.all.return_value = list(rows)
+    return result
+
+
+def _owners(*user_ids):
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = list(user_ids)
+    return result
+
+
+@pytest.mark.asyncio
+async def test_refresh_pages_through_groups_and_bulk_updates():
+    first = SimpleNamespace(
+        id=uuid4(),
+        frequency=Frequency.monthly,
+        recent_dates=[date(2026, 2, 1), date(2026, 1, 1)],
+    )
+    second = SimpleNamespace(
+        id=uuid4(),
+        frequency=Frequency.weekly,
+        recent_dates=[date(2026, 1, 12), date(2026, 1, 5)],
+    )
+
+    owner = uuid4()
+    db = AsyncMock()
+    db.sync_session.info = {}
+    db.execute.side_effect = [
+        _rows(first),
+        _owners(owner),
+        _rows(second),
+        _owners(),
+        _rows(),
+    ]
+
+    assert await refresh_next_expected_dates(db, batch_size=1) == 1
+    assert db.sync_session.info["changed_user_ids"] == {owner}
+
+    statements = [call.args[0] for call in db.execute.call_args_list]
+    select_sql = str(statements[2].compile(dialect=asyncpg.dialect()))
+    assert "recurring_groups.id >" in select_sql
+    assert "JOIN LATERAL" in select_sql
+    assert "transactions.recurring_group_id = recurring_groups.id" in select_sql
+    update_sql = statements[1].compile(dialect=asyncpg.dialect())
+    assert str(update_sql).startswith("UPDATE recurring_groups SET")
+    assert str(update_sql).endswith("RETURNING recurring_groups.user_id")
+    assert date(2026, 3, 1) in update_sql.params.values()
+
+
+@pytest.mark.asyncio
+async def test_refresh_with_no_active_groups():
+    db = AsyncMock()
+    db.execute.return_value = _rows()
+
+    assert await refresh_next_expected_dates(db) == 0
+    db.execute.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_dismiss_marks_the_users_data_changed():
+    user_id = uuid4()
+    sub = MagicMock()
+    db = AsyncMock()
+    db.sync_session.info = {}
+    db.execute.return_value.scalar_one_or_none = MagicMock(return_value=sub)
+
+    assert await dismiss_subscription(db, uuid4(), user_id) is sub
+    assert sub.status == RecurringStatus.cancelled
+    assert db.sync_session.info["changed_user_ids"] == {user_id}
@@ -19,6 +19,9 @@ from httpx import ASGITransport, AsyncClient
 
 from app.routes.subscriptions import router
 
+# Read routes tag responses with the user's data version from Redis
+pytestmark = pytest.mark.usefixtures("fake_redis")
+
 # ---------------------------------------------------------------------------
 # Helpers
 # ---------------------------------------------------------------------------
@@ -64,6 +67,8 @@ def _fake_subscription(user_id=None):
     sub.category_id = None
     sub.merchant_name = "Netflix"
     sub.next_expected_date = None
+    sub.last_seen_date = None
+    sub.last_amount = None
     sub.cancel_url = None
     sub.cancel_steps = None
     sub.created_at = datetime(2025, 1, 1, 0, 0, 0)
@@ -0,0 +1,46 @@
+import asyncio
+
+import pytest
+
+from app.tasks import runtime
+
+
+@pytest.fixture(autouse=True)
+def _reset_runtime():
+    runtime.shutdown_worker_runtime()
+    yield
+    runtime.shutdown_worker_runtime()
+
+
+async def _current_loop():
+    return asyncio.get_running_loop()
+
+
+def test_run_async_reuses_one_event_loop():
+    """Consecutive tasks run on the same long-lived loop."""
+    first = runtime.run_async(_current_loop())
+    second = runtime.run_async(_current_loop())
+
+    assert first is second
+    assert not first.is_closed()
+
+
+def test_session_factory_is_shared_across_tasks():
+    """The engine and session factory are built once per worker process."""
+    runtime.init_worker_runtime()
+    factory = runtime.get_session_factory()
+    engine = factory.kw["bind"]
+
+    runtime.init_worker_runtime()
+
+    assert runtime.get_session_factory() is factory
+    assert factory.kw["bind"] is engine
+
+
+def test_shutdown_closes_loop_and_resets_state():
+    loop = runtime.run_async(_current_loop())
+
+    runtime.shutdown_worker_runtime()
+
+    assert loop.is_closed()
+    assert runtime.run_async(_current_loop()) is not loop
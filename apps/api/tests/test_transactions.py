@@ -9,13 +9,30 @@ tests with a real DB will come later.
 """
 
 import uuid
+from datetime import datetime, timedelta, timezone
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from fastapi import FastAPI
 from httpx import ASGITransport, AsyncClient
+from sqlalchemy.dialects.postgresql import asyncpg
 
+from app.models.transaction import Transaction
 from app.routes.transactions import router
+from app.services.transaction_service import (
+    bulk_update_category,
+    bulk_update_transactions,
+    decode_cursor,
+    encode_cursor,
+    get_transactions,
+    filter_criteria,
+    narrows_selection,
+    search_query,
+    search_transactions,
+)
+
+# Read routes tag responses with the user's data version from Redis
+pytestmark = pytest.mark.usefixtures("fake_redis")
 
 # ---------------------------------------------------------------------------
 # Helpers
@@ -292,3 +309,375 @@ async def test_list_transactions_limit_validation():
 
     assert resp_too_high.status_code == 422
     assert resp_too_low.status_code == 422
+
+
+def test_cursor_round_trips_and_rejects_tampering():
+    """Cursor tokens decode to the (date, id) they encode; edits are rejected."""
+    date = datetime(2026, 3, 1, 12, 30, tzinfo=timezone.utc)
+    txn_id = uuid.uuid4()
+    token = encode_cursor(date, txn_id)
+
+    assert decode_cursor(token) == (date, txn_id)
+
+    payload, signature = token.split(".")
+    forged = encode_cursor(date, uuid.uuid4()).split(".")[0]
+    assert decode_cursor(f"{forged}.{signature}") is None
+    assert decode_cursor(payload) is None
+    assert decode_cursor("not a cursor") is None
+
+
+@pytest.mark.asyncio
+async def test_get_transactions_seeks_past_cursor_without_lookup():
+    """The cursor becomes a row-value comparison; the cursor row is not fetched
+    and accounts is not joined."""
+    date = datetime(2026, 3, 1, tzinfo=timezone.utc)
+    rows = []
+    for day in (3, 2, 1):
+        txn = MagicMock()
+        txn.id = uuid.uuid4()
+        txn.date = date - timedelta(days=day)
+        rows.append(txn)
+    db = AsyncMock()
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = rows
+    db.execute.return_value = result
+
+    items, next_cursor, has_more = await get_transactions(
+        db, uuid.uuid4(), cursor=(date, uuid.uuid4()), limit=2
+    )
+
+    db.get.assert_not_called()
+    sql = str(db.execute.call_args.args[0])
+    assert "(transactions.date, transactions.id) <" in sql
+    assert "transactions.user_id =" in sql and "accounts" not in sql
+    assert has_more and items == rows[:2]
+    assert decode_cursor(next_cursor) == (rows[1].date, rows[1].id)
+
+
+@pytest.mark.asyncio
+async def test_list_transactions_rejects_invalid_cursor():
+    """GET /api/v1/transactions returns 400 for a malformed or forged cursor."""
+    user = _fake_user()
+    db = _mock_db_session(user)
+
+    app = _make_test_app()
+
+    async def override_get_db():
+        yield db
+
+    from app.database import get_db
+
+    app.dependency_overrides[get_db] = override_get_db
+
+    with patch("app.routes.transactions.get_transactions") as mock_get:
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get(
+                "/api/v1/transactions", params={"cursor": str(uuid.uuid4())}
+            )
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+    mock_get.assert_not_called()
+
+
+def test_search_query_prefix_matches_every_token():
+    """Tokens come from Postgres's parser and are quoted into prefix terms."""
+    query = search_query("Netf & !prime|")
+    compiled = query.compile(dialect=asyncpg.dialect())
+
+    sql = str(compiled)
+    assert sql.startswith("CAST((SELECT string_agg(quote_literal(lexeme) ||")
+    assert "FROM unnest(tsvector_to_array(to_tsvector(" in sql
+    assert sql.endswith("AS TSQUERY)")
+    assert list(compiled.params.values()) == [":*", " & ", "simple", "Netf & !prime|"]
+    assert search_query(" &|! ") is None
+
+
+def test_search_query_keeps_dotted_merchants_whole():
+    """ "netflix.com" is parsed as the host token it was indexed as, not split."""
+    compiled = search_query("netflix.com").compile(dialect=asyncpg.dialect())
+
+    assert "netflix.com" in compiled.params.values()
+    search_vector = Transaction.__table__.c.search_vector.computed.sqltext.text
+    assert "regexp_replace(" in search_vector
+
+
+def test_search_without_words_matches_nothing():
+    """A punctuation-only search narrows to no rows instead of being dropped."""
+    criteria = filter_criteria(uuid.uuid4(), search="!!!")
+    assert len(criteria) == 2
+    assert str(criteria[1]) == "false"
+    assert narrows_selection({"search": "!!!"})
+    assert not narrows_selection({"search": ""})
+    assert not narrows_selection({"search": None, "category_id": None})
+
+
+@pytest.mark.asyncio
+async def test_get_transactions_search_uses_text_index():
+    """The search filter matches search_vector instead of ILIKE scans."""
+    db = AsyncMock()
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = []
+    db.execute.return_value = result
+
+    await get_transactions(db, uuid.uuid4(), search="tesco")
+
+    sql = str(db.execute.call_args.args[0])
+    assert "transactions.search_vector @@ CAST((SELECT string_agg(" in sql
+    assert "ILIKE" not in sql.upper()
+
+
+@pytest.mark.asyncio
+async def test_search_transactions_ranks_matches():
+    """search_transactions orders by ts_rank and skips the query for no words."""
+    db = AsyncMock()
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = []
+    db.execute.return_value = result
+
+    assert await search_transactions(db, uuid.uuid4(), "???") == []
+    db.execute.assert_not_called()
+
+    await search_transactions(db, uuid.uuid4(), "netflix", limit=5)
+
+    sql = str(db.execute.call_args.args[0])
+    assert "ORDER BY ts_rank(transactions.search_vector" in sql
+    assert "search_vector," not in sql.split("FROM")[0]
+    # Only the newest matches are ranked
+    assert "ORDER BY transactions.date DESC" in sql and "LIMIT" in sql
+
+
+@pytest.mark.asyncio
+async def test_search_route_returns_ranked_items():
+    """GET /api/v1/transactions/search is not captured by /{transaction_id}."""
+    user = _fake_user()
+    db = _mock_db_session(user)
+
+    app = _make_test_app()
+
+    async def override_get_db():
+        yield db
+
+    from app.database import get_db
+
+    app.dependency_overrides[get_db] = override_get_db
+
+    with patch(
+        "app.routes.transactions.search_transactions", return_value=[]
+    ) as mock_search:
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get(
+                "/api/v1/transactions/search", params={"q": "netf", "limit": 5}
+            )
+
+    assert response.status_code == 200
+    assert response.json() == []
+    assert mock_search.call_args.args[2] == "netf"
+    assert mock_search.call_args.kwargs["limit"] == 5
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_category_is_one_update_statement():
+    """Explicit ids are updated with one UPDATE ... WHERE id = ANY(...) RETURNING."""
+    db = AsyncMock()
+    db.sync_session.info = {}
+    db.scalar.return_value = uuid.uuid4()
+    updated = MagicMock()
+    day = datetime(2026, 3, 1).date()
+    updated.all.return_value = [(uuid.uuid4(), day), (uuid.uuid4(), day)]
+    db.execute.return_value = updated
+    txn_ids = [uuid.uuid4() for _ in range(5000)]
+    user_id = uuid.uuid4()
+
+    with patch("app.services.transaction_service.refresh_daily_spend") as refresh:
+        count = await bulk_update_category(db, txn_ids, uuid.uuid4(), user_id)
+
+    assert count == 2
+    assert refresh.call_args.args[2] == [day, day]
+    assert db.sync_session.info["changed_user_ids"] == {user_id}
+    db.execute.assert_awaited_once()
+    statement = db.execute.call_args.args[0]
+    sql = str(statement.compile(dialect=asyncpg.dialect()))
+    assert sql.startswith("UPDATE transactions SET category_id")
+    assert "transactions.user_id = $" in sql
+    assert "transactions.id = ANY ($" in sql
+    assert sql.endswith(
+        "RETURNING transactions.id, CAST(transactions.date AS DATE) AS date"
+    )
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_category_by_filters():
+    """Filter-based selection reuses the listing filters."""
+    db = AsyncMock()
+    db.sync_session.info = {}
+    db.scalar.return_value = uuid.uuid4()
+    db.execute.return_value = MagicMock()
+
+    await bulk_update_category(
+        db, None, uuid.uuid4(), uuid.uuid4(), filters={"search": "uber"}
+    )
+
+    sql = str(db.execute.call_args.args[0])
+    assert "transactions.search_vector @@ CAST((SELECT string_agg(" in sql
+    assert "ANY" not in sql
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_category_rejects_invisible_category():
+    """Another user's category is refused before anything is updated."""
+    db = AsyncMock()
+    db.scalar.return_value = None
+
+    assert (
+        await bulk_update_category(db, [uuid.uuid4()], uuid.uuid4(), uuid.uuid4())
+        is None
+    )
+    db.execute.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_bulk_assign_category_by_filters_and_404():
+    """POST /bulk forwards filters and returns 404 for an unknown category."""
+    user = _fake_user()
+    db = _mock_db_session(user)
+
+    app = _make_test_app()
+
+    async def override_get_db():
+        yield db
+
+    from app.database import get_db
+
+    app.dependency_overrides[get_db] = override_get_db
+
+    category_id = str(uuid.uuid4())
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        with patch(
+            "app.routes.transactions.bulk_update_category", return_value=12
+        ) as mock_bulk:
+            response = await client.post(
+                "/api/v1/transactions/bulk",
+                json={"category_id": category_id, "filters": {"search": "uber"}},
+            )
+        assert response.status_code == 200
+        assert response.json()["updated"] == 12
+        assert mock_bulk.call_args.args[1] is None
+        assert mock_bulk.call_args.kwargs["filters"]["search"] == "uber"
+
+        with patch("app.routes.transactions.bulk_update_category", return_value=None):
+            missing = await client.post(
+                "/api/v1/transactions/bulk",
+                json={"category_id": category_id, "transaction_ids": []},
+            )
+        assert missing.status_code == 404
+
+        ambiguous = await client.post(
+            "/api/v1/transactions/bulk", json={"category_id": category_id}
+        )
+        assert ambiguous.status_code == 422
+
+        with patch("app.routes.transactions.bulk_update_category") as mock_bulk:
+            for filters in ({}, {"search": None}, {"search": ""}):
+                unfiltered = await client.post(
+                    "/api/v1/transactions/bulk",
+                    json={"category_id": category_id, "filters": filters},
+                )
+                assert unfiltered.status_code == 400
+        mock_bulk.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_transactions_sets_fields_and_tags():
+    """Tags are added without duplicates and removed in the same UPDATE."""
+    db = AsyncMock()
+    db.sync_session.info = {}
+    db.execute.return_value = MagicMock()
+
+    await bulk_update_transactions(
+        db,
+        uuid.uuid4(),
+        {"is_recurring": False, "add_tags": ["food", "food"], "remove_tags": ["old"]},
+        filters={"search": "deliveroo"},
+    )
+
+    db.scalar.assert_not_called()
+    statement = db.execute.call_args.args[0]
+    compiled = statement.compile(dialect=asyncpg.dialect())
+    sql = str(compiled)
+    assert "is_recurring=" in sql and "recurring_group_id=" in sql
+    assert "array_cat(array_remove(array_remove(transactions.tags" in sql
+    assert ["food"] in compiled.params.values()
+    assert "notes" not in sql and "category_id" not in sql
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_transactions_without_assignments_skips_the_update():
+    """Empty tag lists leave nothing to SET, so no UPDATE is issued."""
+    db = AsyncMock()
+
+    count = await bulk_update_transactions(
+        db, uuid.uuid4(), {"add_tags": []}, filters={"search": "uber"}
+    )
+
+    assert count == 0
+    db.execute.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_patch_transactions_applies_changes_to_filtered_rows():
+    """PATCH /api/v1/transactions updates every row matching the filters."""
+    user = _fake_user()
+    db = _mock_db_session(user)
+
+    app = _make_test_app()
+
+    async def override_get_db():
+        yield db
+
+    from app.database import get_db
+
+    app.dependency_overrides[get_db] = override_get_db
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        with patch(
+            "app.routes.transactions.bulk_update_transactions", return_value=42
+        ) as mock_bulk:
+            response = await client.patch(
+                "/api/v1/transactions",
+                params={"search": "deliveroo", "date_from": "2025-01-01T00:00:00Z"},
+                json={"add_tags": ["takeaway"], "notes": None},
+            )
+        assert response.status_code == 200
+        assert response.json() == {"updated": 42}
+        changes = mock_bulk.call_args.args[2]
+        assert changes == {"add_tags": ["takeaway"], "notes": None}
+        filters = mock_bulk.call_args.kwargs["filters"]
+        assert filters["search"] == "deliveroo"
+        assert filters["date_from"].year == 2025
+
+        unfiltered = await client.patch(
+            "/api/v1/transactions", json={"is_recurring": True}
+        )
+        assert unfiltered.status_code == 400
+
+        blank_search = await client.patch(
+            "/api/v1/transactions", params={"search": ""}, json={"notes": "x"}
+        )
+        assert blank_search.status_code == 400
+
+        no_changes = await client.patch(
+            "/api/v1/transactions", params={"search": "uber"}, json={}
+        )
+        assert no_changes.status_code == 422
+
+        empty_tags = await client.patch(
+            "/api/v1/transactions",
+            params={"search": "uber"},
+            json={"add_tags": [], "remove_tags": []},
+        )
+        assert empty_tags.status_code == 422
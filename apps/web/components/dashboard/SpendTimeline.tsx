@@ -14,8 +14,7 @@ import { motion } from "framer-motion";
 import { Card, CardHeader, CardTitle, CardContent } from "@/components/ui/card";
 import { Skeleton } from "@/components/ui/skeleton";
 import { useSpendTimeline } from "@/hooks/use-dashboard";
-
-type Granularity = "daily" | "weekly" | "monthly";
+import type { TimelineGranularity as Granularity } from "@vault/shared-types";
 
 function formatCurrency(amount: number): string {
   return new Intl.NumberFormat("en-GB", {
@@ -27,10 +26,10 @@ function formatCurrency(amount: number): string {
 
 function formatDate(dateStr: string, granularity: Granularity): string {
   const date = new Date(dateStr);
-  if (granularity === "daily") {
+  if (granularity === "day") {
     return date.toLocaleDateString("en-GB", { day: "numeric", month: "short" });
   }
-  if (granularity === "weekly") {
+  if (granularity === "week") {
     return `w/c ${date.toLocaleDateString("en-GB", { day: "numeric", month: "short" })}`;
   }
   return date.toLocaleDateString("en-GB", { month: "short", year: "2-digit" });
@@ -68,7 +67,7 @@ function CustomTooltip({ active, payload, label }: CustomTooltipProps) {
 }
 
 export function SpendTimeline() {
-  const [granularity, setGranularity] = useState<Granularity>("monthly");
+  const [granularity, setGranularity] = useState<Granularity>("month");
   const { data, isLoading } = useSpendTimeline(granularity);
 
   if (isLoading) {
@@ -103,9 +102,9 @@ export function SpendTimeline() {
             onChange={(e) => setGranularity(e.target.value as Granularity)}
             className="rounded-md border border-[var(--border)] bg-[var(--background)] px-3 py-1.5 text-sm focus:outline-none focus:ring-2 focus:ring-[var(--ring)]"
           >
-            <option value="daily">Daily</option>
-            <option value="weekly">Weekly</option>
-            <option value="monthly">Monthly</option>
+            <option value="day">Daily</option>
+            <option value="week">Weekly</option>
+            <option value="month">Monthly</option>
           </select>
         </CardHeader>
         <CardContent>
@@ -5,7 +5,9 @@ import { apiFetch } from "@/lib/api-client";
 import type {
   DashboardStats,
   CategoryBreakdown,
+  SpendTimeline,
   SpendTimelinePoint,
+  TimelineGranularity,
   TopMerchant,
 } from "@vault/shared-types";
 
@@ -29,10 +31,17 @@ export function useCategoryBreakdown(params?: { date_from?: string; date_to?: st
   });
 }
 
-export function useSpendTimeline(granularity: "daily" | "weekly" | "monthly" = "monthly") {
-  return useQuery<SpendTimelinePoint[]>({
+export function useSpendTimeline(granularity: TimelineGranularity = "month") {
+  return useQuery<SpendTimeline, Error, SpendTimelinePoint[]>({
     queryKey: ["dashboard", "timeline", granularity],
     queryFn: () => apiFetch(`/api/v1/analytics/timeline?granularity=${granularity}`),
+    select: (timeline) =>
+      timeline.dates.map((date, i) => ({
+        date,
+        income: timeline.income[i],
+        spending: timeline.spending[i],
+        net: timeline.net[i],
+      })),
   });
 }
 
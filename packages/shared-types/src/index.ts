@@ -164,6 +164,17 @@ export interface SpendTimelinePoint {
   net: number;
 }
 
+export type TimelineGranularity = "day" | "week" | "month";
+
+/** Timeline buckets as parallel arrays: index i of each array is one period. */
+export interface SpendTimeline {
+  granularity: TimelineGranularity;
+  dates: string[];
+  income: number[];
+  spending: number[];
+  net: number[];
+}
+
 export interface TopMerchant {
   merchant_name: string;
   total: number;